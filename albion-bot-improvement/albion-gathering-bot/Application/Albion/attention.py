@@ -0,0 +1,111 @@
+"""
+Attention windows: inference on crops of the captured frame around the character.
+
+Downsizing the whole window to the model input wastes resolution on the UI and
+on far-away terrain. Each configured crop is centred on the character, clamped
+inside the frame and run through the model on its own; in tile mode a crop is
+further split into overlapping tiles of the model size, so pixels reach the
+model at native resolution. Detections of every pass are mapped back into the
+model space of the full frame (a linear map of window coordinates, see
+Capture.to_screen()) and merged with a class-aware NMS.
+"""
+
+import math
+
+import numpy as np
+
+
+class AttentionWindows:
+    """Crop layout around the character and mapping of the detections back to the full frame"""
+
+    OVERLAP = 32
+
+    def __init__(self, crops, model_size, tiles=False, overlap=OVERLAP):
+        """
+        :param crops: Crops in window pixels centred on the character, as (width, height) tuples
+                      or "WIDTHxHEIGHT" strings.
+        :param model_size: Side of the square model input.
+        :param tiles: Split each crop into native-resolution tiles of the model size.
+        :param overlap: Overlap in pixels between neighbouring tiles.
+        """
+        if not crops:
+            raise ValueError("Au moins une fenêtre d'attention est requise")
+
+        self.crops = self.parse(crops)
+        self.model_size = model_size
+        self.tiles = tiles
+        self.overlap = overlap
+
+    @staticmethod
+    def parse(specs):
+        """
+        :param specs: Crops as (width, height) tuples or "WIDTHxHEIGHT" strings (e.g. ["1280x720", "640x640"]).
+        :return: List of (width, height).
+        """
+        crops = []
+        for spec in specs:
+            try:
+                values = spec.lower().split("x") if isinstance(spec, str) else spec
+                width, height = (int(value) for value in values)
+            except ValueError:
+                raise ValueError(f"Fenêtre d'attention invalide '{spec}', format attendu LARGEURxHAUTEUR")
+            if width <= 0 or height <= 0:
+                raise ValueError(f"Fenêtre d'attention invalide '{spec}', dimensions positives attendues")
+            crops.append((width, height))
+        return crops
+
+    def regions(self, frame_width, frame_height, center_x, center_y):
+        """
+        Crops to run through the model for one frame.
+
+        :param frame_width: Width of the captured frame.
+        :param frame_height: Height of the captured frame.
+        :param center_x: Character position in frame pixels.
+        :param center_y: Character position in frame pixels.
+        :return: List of (left, top, width, height) inside the frame.
+        """
+        regions = []
+        for width, height in self.crops:
+            width, height = min(width, frame_width), min(height, frame_height)
+            left = int(np.clip(center_x - width / 2, 0, frame_width - width))
+            top = int(np.clip(center_y - height / 2, 0, frame_height - height))
+
+            if self.tiles:
+                regions.extend(self._tile(left, top, width, height))
+            else:
+                regions.append((left, top, width, height))
+        return regions
+
+    def _tile(self, left, top, width, height):
+        size = self.model_size
+        tile_width, tile_height = min(size, width), min(size, height)
+
+        def starts(origin, length, tile):
+            # Tuiles réparties uniformément, chevauchement d'au moins `overlap` pixels
+            if length <= tile:
+                return [origin]
+            count = math.ceil((length - self.overlap) / (tile - self.overlap))
+            step = (length - tile) / (count - 1)
+            return [origin + round(i * step) for i in range(count)]
+
+        return [(x, y, tile_width, tile_height)
+                for y in starts(top, height, tile_height)
+                for x in starts(left, width, tile_width)]
+
+    def to_model(self, rows, region, frame_width, frame_height):
+        """
+        Map detections of one crop into the model space of the full frame.
+
+        :param rows: Array (n, 6) of [x1, y1, x2, y2, confidence, class] in the crop's model space.
+        :param region: Crop (left, top, width, height) in frame pixels.
+        :param frame_width: Width of the captured frame.
+        :param frame_height: Height of the captured frame.
+        :return: The rows, modified in place.
+        """
+        left, top, width, height = region
+        size = self.model_size
+
+        # Modèle (recadrage) -> pixels de la fenêtre -> modèle (image entière)
+        rows[:, [0, 2]] = left * size / frame_width + rows[:, [0, 2]] * (width / frame_width)
+        rows[:, [1, 3]] = top * size / frame_height + rows[:, [1, 3]] * (height / frame_height)
+        return rows
@@ -0,0 +1,490 @@
+"""
+Interchangeable inference engines for the detection model.
+
+Every backend takes the preprocessed (1, 3, size, size) float32 input tensor and
+returns the raw YOLOv5 output (1, N, 5 + classes) as a torch tensor, so that
+non_max_suppression() gives the same [x1, y1, x2, y2, confidence, class] rows
+whatever the engine.
+
+Exported models are produced once with the yolov5 export script and kept in a
+cache directory keyed by a hash of the weights file (see ModelCache). The INT8
+model is derived from the ONNX export by post-training static quantization,
+calibrated on recorded frames.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+import numpy as np
+
+from Application.lazy import lazy_import
+
+torch = lazy_import("torch")
+
+logger = logging.getLogger("InferenceBackend")
+
+BACKENDS = ("torch", "torchscript", "onnxruntime", "openvino", "onnxruntime-int8")
+
+# Format passé à yolov5/export.py --include pour chaque backend exporté
+EXPORT_FORMATS = {
+    "torchscript": "torchscript",
+    "onnxruntime": "onnx",
+    "openvino": "openvino",
+}
+
+# Backends quantifiés : export d'origine dont ils sont dérivés
+QUANTIZED_BACKENDS = {
+    "onnxruntime-int8": "onnxruntime",
+}
+
+CALIBRATION_FRAMES = 100
+
+
+class ModelCache:
+    """
+    On-disk cache of the artifacts derived from one weights file.
+
+    Artifacts live in `root/<hash>/`, where the hash is the SHA-256 of the
+    weights, so a retrained best.pt never reuses stale exports.
+    """
+
+    ROOT = ".model_cache"
+    YOLOV5_DIR = "yolov5"
+
+    def __init__(self, weights, root=ROOT, yolov5_dir=YOLOV5_DIR):
+        """
+        :param weights: Path of the .pt weights file.
+        :param root: Cache root directory.
+        :param yolov5_dir: Local clone of the yolov5 repository (used for exports).
+        """
+        self.weights = weights
+        self.yolov5_dir = yolov5_dir
+        self.key = self.hash_file(weights)
+        self.directory = os.path.join(root, self.key[:16])
+
+    @staticmethod
+    def hash_file(path, chunk_size=1 << 20):
+        """
+        :return: Hex SHA-256 of the file contents.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, name):
+        """
+        :return: Path of `name` inside the cache directory.
+        """
+        return os.path.join(self.directory, name)
+
+    def artifact(self, backend, size):
+        """
+        :param backend: Exported backend name (see EXPORT_FORMATS).
+        :param size: Square input size the model was exported for.
+        :return: Path of the exported model (file, or directory for OpenVINO).
+        """
+        if backend == "torchscript":
+            return self.path(f"model_{size}.torchscript")
+        if backend == "onnxruntime":
+            return self.path(f"model_{size}.onnx")
+        if backend == "openvino":
+            return self.path(f"model_{size}_openvino_model")
+        if backend == "onnxruntime-int8":
+            return self.path(f"model_{size}_int8.onnx")
+        raise ValueError(f"Backend sans export: {backend}")
+
+    @property
+    def prepared(self):
+        """Path of the prepared eager model (fused DetectionModel pickled with torch.save)"""
+        return self.path("model_prepared.pt")
+
+    def save_prepared(self, module):
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self.prepared + ".tmp"
+        torch.save(module, temporary)
+        os.replace(temporary, self.prepared)
+
+    def load_prepared(self):
+        """
+        Load the prepared eager model without going through torch.hub.
+
+        Only the yolov5 model classes are imported (for unpickling); hubconf,
+        its requirement checks and the AutoShape wrapper are skipped.
+
+        :return: DetectionModel in eval mode, on the GPU if one is available.
+        """
+        if self.yolov5_dir not in sys.path:
+            sys.path.insert(0, self.yolov5_dir)
+
+        kwargs = {"map_location": "cpu"}
+        if "weights_only" in inspect.signature(torch.load).parameters:
+            kwargs["weights_only"] = False
+
+        module = torch.load(self.prepared, **kwargs).eval()
+        if torch.cuda.is_available():
+            module = module.to("cuda:0")
+        return module
+
+    def load_names(self):
+        """
+        :return: Class names {id: label} saved at export time, or None.
+        """
+        path = self.path("names.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return {int(k): v for k, v in json.load(f).items()}
+
+    def save_names(self, names):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path("names.json"), "w") as f:
+            json.dump({str(k): v for k, v in names.items()}, f)
+
+    def export(self, backend, size):
+        """
+        Export the weights for a backend with yolov5/export.py, once.
+
+        :param backend: Exported backend name (see EXPORT_FORMATS).
+        :param size: Square input size of the exported model.
+        :return: Path of the exported artifact.
+        """
+        target = self.artifact(backend, size)
+        if os.path.exists(target):
+            return target
+
+        script = os.path.join(self.yolov5_dir, "export.py")
+        if not os.path.exists(script):
+            raise FileNotFoundError(f"Script d'export introuvable: '{script}'")
+
+        os.makedirs(self.directory, exist_ok=True)
+        weights = self.path("model.pt")
+        if not os.path.exists(weights):
+            shutil.copyfile(self.weights, weights)
+
+        logger.info(f"Export du modèle pour {backend} ({size}x{size}), une seule fois...")
+        subprocess.run(
+            [sys.executable, script, "--weights", weights, "--include", EXPORT_FORMATS[backend],
+             "--imgsz", str(size), "--device", "cpu"],
+            check=True
+        )
+
+        # export.py écrit à côté des poids sous le nom « model » : renommer selon la taille
+        produced = {
+            "torchscript": self.path("model.torchscript"),
+            "onnxruntime": self.path("model.onnx"),
+            "openvino": self.path("model_openvino_model"),
+        }[backend]
+        os.replace(produced, target)
+        if backend == "openvino":
+            for name in os.listdir(target):
+                stem, extension = os.path.splitext(name)
+                if stem == "model":
+                    os.replace(os.path.join(target, name), os.path.join(target, f"model_{size}{extension}"))
+
+        logger.info(f"Modèle exporté dans '{target}'")
+        return target
+
+    def quantize(self, size, calibration=None, frames=CALIBRATION_FRAMES):
+        """
+        Produce the INT8 ONNX model by static quantization of the ONNX export, once.
+
+        Weights are quantized per channel (int8) and activations per tensor
+        (uint8) in QDQ format, with activation ranges calibrated on recorded
+        frames. The post-processing of the Detect head (sigmoid, grid and
+        anchor arithmetic) is kept in float32, as it is sensitive to rounding.
+
+        :param size: Square input size of the model.
+        :param calibration: Recorded session, image directory or video used for calibration.
+        :param frames: Number of frames sampled from the calibration source.
+        :return: Path of the quantized model.
+        """
+        target = self.artifact("onnxruntime-int8", size)
+        if os.path.exists(target):
+            return target
+
+        if calibration is None:
+            raise FileNotFoundError("Modèle INT8 absent du cache : des images de calibration sont nécessaires "
+                                    "(--calibration chemin/vers/une/session)")
+        try:
+            from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+        except ImportError as e:
+            raise ImportError("La quantification INT8 nécessite le paquet 'onnxruntime' (pip install onnxruntime)") from e
+
+        source = self.export("onnxruntime", size)
+        reader = CalibrationFrames(calibration, size, frames)
+
+        logger.info(f"Quantification INT8 du modèle ({size}x{size}) sur {len(reader)} images de '{calibration}'...")
+        temporary = target + ".tmp"
+        try:
+            quantize_static(
+                source, temporary, reader,
+                quant_format=QuantFormat.QDQ,
+                per_channel=True,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                nodes_to_exclude=_detect_head_nodes(source)
+            )
+        finally:
+            reader.close()
+        os.replace(temporary, target)
+
+        with open(self.path(f"model_{size}_int8.json"), "w") as f:
+            json.dump({"calibration": os.path.abspath(calibration), "frames": len(reader)}, f)
+
+        logger.info(f"Modèle INT8 enregistré dans '{target}'")
+        return target
+
+
+class CalibrationFrames:
+    """
+    Calibration data reader for onnxruntime.quantization: model inputs of
+    frames sampled evenly from a replay source, prepared like at inference time.
+    """
+
+    def __init__(self, source, size, frames=CALIBRATION_FRAMES, input_name="images"):
+        """
+        :param source: Recorded session, image directory or video.
+        :param size: Square model input size.
+        :param frames: Maximum number of frames sampled.
+        :param input_name: Name of the model input (the yolov5 export uses "images").
+        """
+        from Application.Capture.replay import ReplayCapture
+        from Application.Albion.preprocess import FramePreprocessor
+
+        self.capture = ReplayCapture(source)
+        self.preprocessor = FramePreprocessor(size)
+        self.input_name = input_name
+
+        count = len(self.capture.source)
+        self.indices = np.unique(np.linspace(0, count - 1, min(frames, count)).astype(int))
+        self._position = 0
+
+    def __len__(self):
+        return len(self.indices)
+
+    def get_next(self):
+        while self._position < len(self.indices):
+            image = self.capture.source.read(self.indices[self._position])
+            self._position += 1
+            if image is not None:
+                _, model_input = self.preprocessor(image)
+                return {self.input_name: model_input.copy()}
+        return None
+
+    def rewind(self):
+        self._position = 0
+
+    def close(self):
+        self.capture.close()
+
+
+def _detect_head_nodes(path):
+    """
+    :return: Names of the non-convolution nodes of the last module (Detect head) of an exported yolov5 ONNX model.
+    """
+    import onnx
+
+    nodes = onnx.load(path).graph.node
+    modules = [int(match.group(1)) for match in (re.match(r"/model\.(\d+)/", node.name) for node in nodes) if match]
+    if not modules:
+        return []
+
+    head = f"/model.{max(modules)}/"
+    return [node.name for node in nodes if node.name.startswith(head) and node.op_type != "Conv"]
+
+
+class InferenceBackend:
+    """Common interface: names, input device/dtype and __call__(tensor) -> raw output"""
+
+    name = None
+
+    def __init__(self, names):
+        self.names = names
+        self.device = torch.device("cpu")
+        self.dtype = torch.float32
+
+    def __call__(self, tensor):
+        """
+        :param tensor: Model input (1, 3, size, size).
+        :return: Raw model output (1, N, 5 + classes) as a torch tensor.
+        """
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """Eager PyTorch, below the AutoShape wrapper returned by torch.hub"""
+
+    name = "torch"
+
+    def __init__(self, module, names):
+        """
+        :param module: Network called on the input tensor (DetectionModel or DetectMultiBackend).
+        :param names: Class names {id: label}.
+        """
+        super().__init__(names)
+        self.model = module
+
+        parameter = next(self.model.parameters())
+        self.device = parameter.device
+        self.dtype = parameter.dtype
+
+    def __call__(self, tensor):
+        with torch.inference_mode():
+            return self.model(tensor)
+
+
+class TorchScriptBackend(InferenceBackend):
+    """TorchScript module traced by the yolov5 export"""
+
+    name = "torchscript"
+
+    def __init__(self, path, names):
+        super().__init__(names)
+        self.model = torch.jit.load(path, map_location="cpu").eval()
+
+    def __call__(self, tensor):
+        with torch.inference_mode():
+            return self.model(tensor)
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime on the CPU execution provider"""
+
+    name = "onnxruntime"
+
+    def __init__(self, path, names, threads=None):
+        """
+        :param threads: Intra-op threads (None = ONNX Runtime default).
+        """
+        super().__init__(names)
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("Le backend onnxruntime nécessite le paquet 'onnxruntime' (pip install onnxruntime)") from e
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, tensor):
+        # Sur CPU, numpy() partage la mémoire du tenseur
+        output = self.session.run(None, {self.input_name: tensor.numpy()})[0]
+        return torch.from_numpy(output)
+
+
+class OnnxRuntimeInt8Backend(OnnxRuntimeBackend):
+    """ONNX Runtime on the statically quantized INT8 model (see ModelCache.quantize)"""
+
+    name = "onnxruntime-int8"
+
+
+class OpenVinoBackend(InferenceBackend):
+    """OpenVINO runtime compiled for the CPU"""
+
+    name = "openvino"
+
+    def __init__(self, path, names):
+        """
+        :param path: Directory produced by the export (contains the .xml/.bin pair).
+        """
+        super().__init__(names)
+        try:
+            from openvino.runtime import Core
+        except ImportError as e:
+            raise ImportError("Le backend openvino nécessite le paquet 'openvino' (pip install openvino)") from e
+
+        xml = next(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".xml"))
+        self.compiled = Core().compile_model(xml, "CPU")
+        self.output = self.compiled.output(0)
+
+        # Une requête d'inférence par thread (les workers du pipeline en utilisent plusieurs)
+        self._local = threading.local()
+
+    def __call__(self, tensor):
+        request = getattr(self._local, "request", None)
+        if request is None:
+            request = self._local.request = self.compiled.create_infer_request()
+
+        output = request.infer({0: tensor.numpy()})[self.output]
+        return torch.from_numpy(output)
+
+
+def load_backend(name, weights, size, load_torch_model, cache_root=ModelCache.ROOT, calibration=None):
+    """
+    Build the requested backend, exporting (and quantizing) the weights first if needed.
+
+    :param name: Backend name (see BACKENDS).
+    :param weights: Path of the .pt weights file.
+    :param size: Square input size of the model.
+    :param load_torch_model: Function returning the torch.hub AutoShape model, only called when needed.
+    :param cache_root: Root of the on-disk export cache.
+    :param calibration: Replay source of calibration frames, needed the first time an INT8 backend is used.
+    :return: InferenceBackend.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu '{name}', choix possibles: {', '.join(BACKENDS)}")
+
+    cache = ModelCache(weights, root=cache_root)
+    names = cache.load_names()
+
+    if name == "torch":
+        return _load_torch_backend(cache, names, load_torch_model)
+
+    if names is None or not os.path.exists(cache.artifact(name, size)):
+        export = QUANTIZED_BACKENDS.get(name, name)
+        if names is None or not os.path.exists(cache.artifact(export, size)):
+            # Premier lancement pour ces poids : le modèle PyTorch fournit les classes
+            names = dict(load_torch_model().names)
+            cache.save_names(names)
+        cache.export(export, size)
+
+    if name in QUANTIZED_BACKENDS:
+        return OnnxRuntimeInt8Backend(cache.quantize(size, calibration), names)
+
+    path = cache.artifact(name, size)
+    if name == "torchscript":
+        return TorchScriptBackend(path, names)
+    if name == "onnxruntime":
+        return OnnxRuntimeBackend(path, names)
+    return OpenVinoBackend(path, names)
+
+
+def _load_torch_backend(cache, names, load_torch_model):
+    """
+    Eager backend with warm start: the fused network is loaded from the cache when
+    it was prepared by a previous run, otherwise loaded through torch.hub and saved.
+    """
+    if names is not None and os.path.exists(cache.prepared):
+        try:
+            module = cache.load_prepared()
+            logger.info(f"Modèle préparé chargé depuis '{cache.prepared}'")
+            return TorchBackend(module, names)
+        except Exception as e:
+            logger.warning(f"Modèle préparé illisible ({e}), rechargement via torch.hub")
+
+    model = load_torch_model()
+    names = dict(model.names)
+    # AutoShape -> DetectMultiBackend -> DetectionModel fusionné
+    module = getattr(model.model, "model", model.model)
+
+    try:
+        cache.save_names(names)
+        cache.save_prepared(module)
+    except Exception as e:
+        logger.warning(f"Impossible d'enregistrer le modèle préparé: {e}")
+
+    return TorchBackend(module, names)
@@ -0,0 +1,107 @@
+import numpy as np
+from time import perf_counter
+
+from Application.lazy import lazy_import
+
+cv = lazy_import("cv2")
+
+
+class DetectionCache:
+    """
+    Cache of the last detections, reused while the scene has not materially changed.
+
+    Each frame is reduced to a small grayscale signature (block averages). When
+    no block of the current signature differs from the signature of the cached
+    frame by more than the threshold, and the cached detections are younger than
+    the staleness bound, the cached detections are returned instead of running
+    the model.
+    """
+
+    SIGNATURE_SIZE = 32
+    THRESHOLD = 6.0
+    MAX_AGE = 0.5
+
+    def __init__(self, max_age=MAX_AGE, threshold=THRESHOLD, signature_size=SIGNATURE_SIZE):
+        """
+        :param max_age: Maximum age in seconds of reusable detections (staleness bound).
+        :param threshold: Maximum per-block difference (0-255) still considered the same scene.
+        :param signature_size: Side of the square signature, in blocks.
+        """
+        self.max_age = max_age
+        self.threshold = threshold
+        self.signature_size = signature_size
+
+        self._reduced = None
+        self._signature = np.empty((signature_size, signature_size), dtype=np.uint8)
+        self._reference = np.empty_like(self._signature)
+        self._diff = np.empty_like(self._signature)
+
+        self._detections = None
+        self._timestamp = 0.0
+
+        self.hits = 0
+        self.misses = 0
+
+    def _compute_signature(self, img):
+        """
+        Downsample the image into the reusable signature buffer.
+
+        :param img: Image (HxWx3 or HxWx4).
+        """
+        self._reduced = cv.resize(img, (self.signature_size, self.signature_size),
+                                  dst=self._reduced, interpolation=cv.INTER_AREA)
+        code = cv.COLOR_BGRA2GRAY if self._reduced.shape[2] == 4 else cv.COLOR_BGR2GRAY
+        cv.cvtColor(self._reduced, code, dst=self._signature)
+
+    def lookup(self, img, now=None):
+        """
+        Return the cached detections if the scene is unchanged, otherwise None.
+
+        On a miss the signature of `img` is kept so that the next store() ties
+        the new detections to this frame.
+
+        :param img: Frame about to be analysed.
+        :param now: Current time (perf_counter), computed if omitted.
+        :return: Cached detections or None.
+        """
+        if now is None:
+            now = perf_counter()
+
+        self._compute_signature(img)
+
+        if self._detections is not None and now - self._timestamp <= self.max_age:
+            cv.absdiff(self._signature, self._reference, dst=self._diff)
+            if self._diff.max() <= self.threshold:
+                self.hits += 1
+                return self._detections
+
+        self.misses += 1
+        return None
+
+    def store(self, detections, now=None):
+        """
+        Cache the detections computed for the frame passed to the last lookup().
+
+        :param detections: Detections to reuse.
+        :param now: Time of the detection (perf_counter), computed if omitted.
+        """
+        self._detections = detections
+        self._timestamp = perf_counter() if now is None else now
+        np.copyto(self._reference, self._signature)
+
+    def invalidate(self):
+        """
+        Drop the cached detections (e.g. after the camera or character moved).
+        """
+        self._detections = None
+
+    def stats(self):
+        """
+        :return: Dictionary with the hit/miss counters and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
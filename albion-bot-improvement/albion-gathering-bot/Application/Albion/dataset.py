@@ -0,0 +1,72 @@
+"""
+Labelled frames in the YOLO format, for offline accuracy measurements.
+
+A dataset is a directory of images, either flat with one `<name>.txt` label
+file next to each image, or laid out like yolov5 datasets with `images/` and
+`labels/` side by side. Each label line is `class x_center y_center width
+height`, normalised to [0, 1]. An image without a label file has no object.
+"""
+
+import os
+
+import numpy as np
+
+from Application.Capture.replay import ImageDirectorySource
+
+
+class LabelledFrames:
+    """Images of a YOLO dataset directory with their ground-truth boxes"""
+
+    def __init__(self, path):
+        """
+        :param path: Dataset directory (flat, or containing images/ and labels/).
+        """
+        images = os.path.join(path, "images")
+        self.directory = images if os.path.isdir(images) else path
+        self.source = ImageDirectorySource(self.directory, fps=1.0)
+
+    def __len__(self):
+        return len(self.source)
+
+    @property
+    def paths(self):
+        return self.source.paths
+
+    def read(self, index):
+        """
+        :return: Image as stored on disk (BGR or BGRA).
+        """
+        return self.source.read(index)
+
+    def label_path(self, index):
+        """
+        :return: Path of the label file of an image (yolov5 convention: /images/ -> /labels/).
+        """
+        stem = os.path.splitext(self.source.paths[index])[0]
+        separator = os.sep + "images" + os.sep
+        if separator in stem:
+            head, tail = stem.rsplit(separator, 1)
+            return os.path.join(head, "labels", tail) + ".txt"
+        return stem + ".txt"
+
+    def labels(self, index, size):
+        """
+        :param index: Image index.
+        :param size: Side of the square model space the boxes are expressed in.
+        :return: Array (n, 6) of [x1, y1, x2, y2, 1, class] in model coordinates, like the detections.
+        """
+        path = self.label_path(index)
+        if not os.path.exists(path):
+            return np.zeros((0, 6), dtype=np.float32)
+
+        values = np.loadtxt(path, dtype=np.float32, ndmin=2)
+        if not values.size:
+            return np.zeros((0, 6), dtype=np.float32)
+
+        cls, center, extent = values[:, 0], values[:, 1:3] * size, values[:, 3:5] * size
+        rows = np.empty((len(values), 6), dtype=np.float32)
+        rows[:, :2] = center - extent / 2
+        rows[:, 2:4] = center + extent / 2
+        rows[:, 4] = 1.0
+        rows[:, 5] = cls
+        return rows
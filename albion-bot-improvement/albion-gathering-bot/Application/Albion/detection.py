@@ -1,10 +1,24 @@
-import cv2 as cv
-import torch
+from Application.lazy import lazy_import
 from Application.Capture.Factory import CaptureFactory
-from time import time
-from math import sqrt
+from Application.Albion.cache import DetectionCache
+from Application.Albion.preprocess import FramePreprocessor
+from Application.Albion.postprocess import non_max_suppression, merge_detections, to_detection_array, rank, \
+    EMPTY_DETECTIONS
+from Application.Albion.metrics import PipelineMetrics
+from Application.Albion.backends import load_backend
+from Application.Albion.tracker import ResourceTracker
+from Application.Albion.attention import AttentionWindows
+from Application.Albion.resolution import ResolutionController
+from Application.Albion.variants import VariantSelector
+from time import time, perf_counter
 import os
 import logging
+import threading
+import numpy as np
+
+# Importés au premier usage : charger ce module ne coûte pas l'import de torch et d'OpenCV
+cv = lazy_import("cv2")
+torch = lazy_import("torch")
 
 # Configuration du logging
 logging.basicConfig(
@@ -17,16 +31,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AlbionDetection")
 
+EMPTY_ROWS = np.zeros((0, 6), dtype=np.float32)
+
+
+class InferenceContext:
+    """
+    Buffers owned by one inference thread: preprocessor, model input tensor,
+    detection cache, resource tracker and, with attention windows, the
+    preprocessor of the crops (writing into the same model input). With an
+    adaptive input size, `scaled` holds (preprocessor, tensor, device_tensor)
+    for every other supported size.
+
+    predict() uses the main context; each pipeline worker gets its own so that
+    several frames can be processed concurrently without sharing buffers.
+    """
+
+    def __init__(self, preprocessor, tensor, device_tensor, cache, tracker=None, crop_preprocessor=None, scaled=None):
+        self.preprocessor = preprocessor
+        self.tensor = tensor
+        self.device_tensor = device_tensor
+        self.cache = cache
+        self.tracker = tracker
+        self.crop_preprocessor = crop_preprocessor
+        self.scaled = scaled or {}
+
+
 class AlbionDetection:
     MODEL_NAME = "best.pt"
     IMG_SIZE = 640
     CONFIDENCE = 0.5
+    IOU = 0.45
+    MAX_DET = 1000
+    PIPELINE_FPS = 30
 
     def __init__(self,
                  model_name=MODEL_NAME,
                  debug=False,
                  confidence=CONFIDENCE,
-                 window_name="Albion Online Client"
+                 window_name="Albion Online Client",
+                 background_capture=False,
+                 cache_max_age=0,
+                 cache_threshold=DetectionCache.THRESHOLD,
+                 capture_source=None,
+                 replay_speed=0.0,
+                 record_path=None,
+                 metrics_interval=PipelineMetrics.LOG_INTERVAL,
+                 backend="torch",
+                 warmup=True,
+                 track_interval=1,
+                 attention=None,
+                 attention_tiles=False,
+                 calibration=None,
+                 latency_budget=None,
+                 input_sizes=ResolutionController.SIZES,
+                 variants=None,
+                 validation=VariantSelector.VALIDATION,
+                 accuracy_floor=VariantSelector.ACCURACY_FLOOR
                  ):
         """
         Initialize the AlbionDetection object.
@@ -35,50 +95,505 @@ class AlbionDetection:
         :param debug: Flag to enable debug mode.
         :param confidence: Confidence threshold for detections.
         :param window_name: Name of the window to capture.
+        :param background_capture: Capture continuously on a producer thread so predict() uses the freshest frame.
+        :param cache_max_age: Maximum age in seconds of cached detections reused on unchanged frames
+                              (0 or None, the default, disables the cache; DetectionCache.MAX_AGE is a sensible bound).
+        :param cache_threshold: Per-block difference (0-255) below which a frame is considered unchanged.
+        :param capture_source: Image directory, video or recorded session to replay instead of the game window.
+        :param replay_speed: Replay speed for capture_source (1.0 = real time, 0 = unthrottled).
+        :param record_path: Directory where every captured frame is recorded for offline replay.
+        :param metrics_interval: Seconds between two logged per-stage latency summaries (0 disables logging).
+        :param backend: Inference engine: torch, torchscript, onnxruntime or openvino (see backends.BACKENDS).
+        :param warmup: Run warm-up inferences on a background thread once the model is loaded (see wait_until_ready()).
+        :param track_interval: Run the model at most every N frames and track the resources in between
+                               (1 runs the model on every frame).
+        :param attention: List of (width, height) crops in window pixels around the character; the model
+                          runs on these crops instead of the whole downsized window (None = whole window).
+        :param attention_tiles: Split each attention crop into native-resolution tiles of the model size.
+        :param calibration: Recorded frames used to calibrate the INT8 model the first time the
+                            onnxruntime-int8 backend is used (see backends.ModelCache.quantize()).
+        :param latency_budget: Target inference time per frame in milliseconds; the model input size is then
+                               picked among input_sizes from recent inference times (None = always IMG_SIZE).
+        :param input_sizes: Supported model input sizes for latency_budget.
+        :param variants: Candidate weight files of the same classes; on the first start on a machine the fastest
+                         one reaching accuracy_floor on the validation set replaces model_name (see variants.py).
+        :param validation: Labelled validation directory (YOLO format) the variants are evaluated on;
+                           required as soon as there are several variants.
+        :param accuracy_floor: Minimum F1 score of a variant on the validation set.
         """
+        started_at = perf_counter()
         self.model_name = model_name
         self.debug = debug
         self.confidence = confidence
+        self.iou = self.IOU
+        self.max_det = self.MAX_DET
+        self.backend_name = backend
+
+        # Modèle torch.hub (AutoShape), chargé seulement si le backend en a besoin
+        self.model = None
+
+        # Dernière image utilisée par predict() (image, horodatage, numéro) et ses détections
+        self.last_frame = None
+        self.last_detections = EMPTY_DETECTIONS
+
+        # Cache des détections pour les images quasi identiques (un par contexte d'inférence)
+        self.cache_max_age = cache_max_age
+        self.cache_threshold = cache_threshold
+
+        # Suivi des ressources entre deux inférences complètes (un par contexte d'inférence)
+        self.track_interval = track_interval
+
+        # Fenêtres d'attention autour du personnage (inférence sur des recadrages)
+        self.attention = AttentionWindows(attention, self.IMG_SIZE, tiles=attention_tiles) if attention else None
+
+        # Taille d'entrée adaptative : les détections restent exprimées dans l'espace IMG_SIZE
+        self.resolution = ResolutionController(latency_budget, input_sizes) if latency_budget else None
 
         try:
             # Tentative de capture de la fenêtre
-            self.window_capture = CaptureFactory(window_name).capture
+            self.window_capture = CaptureFactory(window_name, source=capture_source, speed=replay_speed).capture
             logger.info(f"Fenêtre '{window_name}' capturée avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de la capture de la fenêtre: {e}")
             raise
 
+        # Latences par étape du pipeline (voir metrics.stats())
+        self.metrics = PipelineMetrics(log_interval=metrics_interval)
+
+        # Pipeline asynchrone optionnel (voir start_pipeline)
+        self.pipeline = None
+        self._contexts = []
+
         try:
-            # Chargement du modèle
-            self.model = self._load_model()
+            # Variante du modèle la plus rapide pour cette machine (mesurée une fois, puis lue du cache)
+            if variants:
+                model_name = VariantSelector(variants, self._load_model, validation, backend, self.IMG_SIZE,
+                                             accuracy_floor, confidence, self.iou, calibration=calibration).select()
+                self.model_name = model_name
+
+            # Chargement du modèle dans le moteur d'inférence choisi (export mis en cache au besoin)
+            self.backend = load_backend(backend, model_name, self.IMG_SIZE, self._load_model, calibration=calibration)
+            # Un moteur par taille d'entrée : le modèle PyTorch accepte toutes les tailles,
+            # les modèles exportés ont une taille fixe (un export en cache par taille)
+            self._backends = {self.IMG_SIZE: self.backend}
+            for size in self.resolution.sizes if self.resolution else ():
+                if size not in self._backends:
+                    self._backends[size] = self.backend if backend == "torch" else \
+                        load_backend(backend, model_name, size, self._load_model, calibration=calibration)
+
+            if backend != "torch":
+                # Le modèle PyTorch n'a servi qu'à l'export initial
+                self.model = None
             self.classes = self._load_classes()
-            logger.info(f"Modèle '{model_name}' chargé avec succès")
+
+            # Prétraitement fusionné vers une entrée du modèle réutilisée
+            self._context = self.new_context()
+            self.preprocessor = self._context.preprocessor
+            self.detection_cache = self._context.cache
+            logger.info(f"Modèle '{model_name}' chargé avec succès (backend {backend})")
         except Exception as e:
             logger.error(f"Erreur lors du chargement du modèle: {e}")
             raise
 
+        # Préchauffage du moteur d'inférence en arrière-plan
+        self.ready = threading.Event()
+        if warmup:
+            threading.Thread(target=self._warm_up, args=(started_at,), name="ModelWarmUp", daemon=True).start()
+        else:
+            self.ready.set()
+
         # Position par défaut du personnage (centre de l'écran)
         self.character_position_X = self.IMG_SIZE / 2
         self.character_position_Y = self.IMG_SIZE / 2 - 60
 
-    def _process_image(self, img):
+        if background_capture:
+            self.window_capture.start_background_capture()
+            logger.info("Capture en arrière-plan activée")
+
+        if record_path:
+            self.window_capture.start_recording(record_path)
+
+    def cache_stats(self):
+        """
+        Return the detection cache counters.
+
+        Counters of every inference context (predict() and pipeline workers) are summed.
+
+        :return: Dictionary with hits, misses and hit_rate, or None if the cache is disabled.
+        """
+        caches = [context.cache for context in self._contexts if context.cache is not None]
+        if not caches:
+            return None
+
+        hits = sum(cache.hits for cache in caches)
+        misses = sum(cache.misses for cache in caches)
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+    def tracking_stats(self):
+        """
+        Return the tracker counters, summed over every inference context.
+
+        :return: Dictionary with detections (full inferences), tracked and degraded frames
+                 and tracked_rate, or None if tracking is disabled.
+        """
+        trackers = [context.tracker for context in self._contexts if context.tracker is not None]
+        if not trackers:
+            return None
+
+        stats = {key: sum(tracker.stats()[key] for tracker in trackers) for key in ("detections", "tracked", "degraded")}
+        total = stats["detections"] + stats["tracked"]
+        stats["tracked_rate"] = stats["tracked"] / total if total else 0.0
+        return stats
+
+    def latency_stats(self, stage=None):
+        """
+        Return the rolling per-stage latency percentiles.
+
+        :param stage: Stage name (see PipelineMetrics.STAGES), or None for every stage.
+        :return: Dictionary with p50, p95, p99 and mean in milliseconds (keyed by stage when stage is None).
+        """
+        return self.metrics.stats(stage)
+
+    def start_pipeline(self, workers=1, queue_size=2, fps=None):
+        """
+        Start asynchronous inference: a capture thread feeds a small pool of
+        inference workers through a bounded drop-oldest queue.
+
+        :param workers: Number of inference workers.
+        :param queue_size: Frames waiting for a worker; the oldest is dropped when full.
+        :param fps: Continuous capture rate, or None to only process frames submitted with predict_async().
+        :return: The running InferencePipeline.
+        """
+        from Application.Albion.pipeline import InferencePipeline
+
+        self.stop_pipeline()
+        self.pipeline = InferencePipeline(self, workers=workers, queue_size=queue_size, fps=fps)
+        self.pipeline.start()
+        return self.pipeline
+
+    def stop_pipeline(self):
+        """
+        Stop the asynchronous inference pipeline, cancelling pending futures.
+        """
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
+
+    def predict_async(self):
+        """
+        Capture a frame now and queue it for inference.
+
+        Starts a pipeline without continuous capture if none is running.
+
+        :return: concurrent.futures.Future resolved with a DetectionResult (cancelled if the frame is dropped).
+        """
+        if self.pipeline is None:
+            self.start_pipeline()
+        return self.pipeline.submit()
+
+    def stream(self, timeout=None):
+        """
+        Iterate over detection results as the pipeline produces them, newest first-come.
+
+        :param timeout: Maximum wait in seconds for each result; iteration stops on timeout.
+        :return: Iterator of DetectionResult.
+        """
+        if self.pipeline is None:
+            self.start_pipeline(fps=self.PIPELINE_FPS)
+        return self.pipeline.stream(timeout)
+
+    def latest_prediction(self, after=None, timeout=None):
+        """
+        Return the newest result of the pipeline.
+
+        :param after: Only accept a result for a frame captured after this perf_counter() time.
+        :param timeout: Maximum wait in seconds for such a result (None = do not wait).
+        :return: DetectionResult or None.
+        """
+        if self.pipeline is None:
+            return None
+        return self.pipeline.latest(after=after, timeout=timeout)
+
+    def close(self):
+        """
+        Release the capture resources (inference pipeline, background thread and capture session).
+        """
+        self.stop_pipeline()
+
+        try:
+            self.window_capture.close()
+        except Exception as e:
+            logger.error(f"Erreur lors de la fermeture de la capture: {e}")
+
+    def _warm_up(self, started_at, iterations=2):
+        """
+        Run a few inferences on a blank input so that the first real frame does
+        not pay for lazy initialisation (kernel selection, memory arenas).
+
+        :param started_at: perf_counter() time at which the constructor started.
+        :param iterations: Number of warm-up inferences.
+        """
+        try:
+            for size, backend in self._backends.items():
+                tensor = torch.zeros((1, 3, size, size), device=backend.device, dtype=backend.dtype)
+                for _ in range(iterations):
+                    backend(tensor)
+            logger.info(f"Modèle prêt en {perf_counter() - started_at:.2f} s")
+        except Exception as e:
+            logger.error(f"Erreur lors du préchauffage du modèle: {e}")
+        finally:
+            self.ready.set()
+
+    @property
+    def input_size(self):
+        """Model input size used for the next frame"""
+        return self.resolution.size if self.resolution else self.IMG_SIZE
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Wait for the background warm-up to finish.
+
+        :param timeout: Maximum wait in seconds (None = no limit).
+        :return: True if the model is warmed up.
+        """
+        return self.ready.wait(timeout)
+
+    def new_context(self):
+        """
+        Create the buffers needed to run inference on one thread.
+
+        On CPU the input tensor shares the preprocessor buffer's memory; on other
+        devices a destination tensor is allocated once and refreshed with copy_().
+
+        :return: InferenceContext.
+        """
+        preprocessor, tensor, device_tensor = self._model_input(self.IMG_SIZE, self.backend)
+        scaled = {size: self._model_input(size, backend) for size, backend in self._backends.items()
+                  if size != self.IMG_SIZE}
+
+        cache = DetectionCache(self.cache_max_age, self.cache_threshold) if self.cache_max_age else None
+        tracker = ResourceTracker(self.IMG_SIZE, interval=self.track_interval) if self.track_interval > 1 else None
+        crop_preprocessor = FramePreprocessor(self.IMG_SIZE, input=preprocessor.input) if self.attention else None
+
+        context = InferenceContext(preprocessor, tensor, device_tensor, cache, tracker, crop_preprocessor, scaled)
+        self._contexts.append(context)
+        return context
+
+    @staticmethod
+    def _model_input(size, backend):
+        """
+        :return: Tuple (preprocessor, tensor, device_tensor) for one input size.
+        """
+        preprocessor = FramePreprocessor(size)
+        tensor = torch.from_numpy(preprocessor.input)
+
+        if backend.device.type != "cpu" or backend.dtype != torch.float32:
+            device_tensor = torch.empty(tensor.shape, device=backend.device, dtype=backend.dtype)
+        else:
+            device_tensor = None
+        return preprocessor, tensor, device_tensor
+
+    def _process_image(self, img, context=None, size=IMG_SIZE):
         """
         Preprocess the image.
 
-        :param img: Input image.
-        :return: Processed image.
+        :param img: Captured BGRA frame.
+        :param context: Inference context whose buffers are used (main context by default).
+        :param size: Model input size of this frame.
+        :return: The frame resized to IMG_SIZE (shared buffer), or None on failure. The model
+                 input is written into the context's buffer at the same time, except with attention
+                 windows or another input size, where it is prepared at inference time.
         """
         if img is None:
             logger.error("Capture d'écran vide")
             return None
 
         try:
-            img = cv.cvtColor(img, cv.COLOR_RGB2BGR)
-            return cv.resize(img, (self.IMG_SIZE, self.IMG_SIZE))
+            preprocessor = (context or self._context).preprocessor
+            if self.attention is not None or size != self.IMG_SIZE:
+                return preprocessor.resize(img)
+            resized, _ = preprocessor(img)
+            return resized
         except Exception as e:
             logger.error(f"Erreur lors du traitement de l'image: {e}")
             return None
 
+    def _infer(self, context=None, size=IMG_SIZE):
+        """
+        Run the inference backend on the prepared input.
+
+        :param context: Inference context holding the prepared input (main context by default).
+        :param size: Model input size of the prepared input.
+        :return: Raw model output, see non_max_suppression().
+        """
+        context = context or self._context
+        if size == self.IMG_SIZE:
+            tensor, device_tensor = context.tensor, context.device_tensor
+        else:
+            _, tensor, device_tensor = context.scaled[size]
+
+        if device_tensor is not None:
+            tensor = device_tensor.copy_(tensor, non_blocking=True)
+
+        return self._backends[size](tensor)
+
+    def _rows_to_model_space(self, rows, size):
+        """
+        Scale detections made at another input size to the IMG_SIZE model space (in place).
+        """
+        if size != self.IMG_SIZE:
+            rows[:, :4] *= self.IMG_SIZE / size
+        return rows
+
+    def _infer_attention(self, image, context=None, size=IMG_SIZE):
+        """
+        Run the model on every attention crop of the full-resolution frame.
+
+        :param image: Captured frame (not resized).
+        :param context: Inference context (main context by default).
+        :param size: Model input size the crops are prepared at.
+        :return: Tuple (rows, inference_seconds): merged detections in the model space of the full
+                 frame, see _postprocess(), and the time spent preparing the crops and running the model.
+        """
+        context = context or self._context
+        height, width = image.shape[:2]
+        center_x = self.character_position_X * width / self.IMG_SIZE
+        center_y = self.character_position_Y * height / self.IMG_SIZE
+
+        crop_preprocessor = context.crop_preprocessor if size == self.IMG_SIZE else context.scaled[size][0]
+
+        inference_seconds = 0.0
+        passes = []
+        for region in self.attention.regions(width, height, center_x, center_y):
+            left, top, crop_width, crop_height = region
+            start = perf_counter()
+            crop_preprocessor(image[top:top + crop_height, left:left + crop_width])
+            prediction = self._infer(context, size)
+            inference_seconds += perf_counter() - start
+
+            rows = self._rows_to_model_space(self._postprocess(prediction), size)
+            if len(rows):
+                passes.append(self.attention.to_model(rows, region, width, height))
+
+        if not passes:
+            return EMPTY_ROWS, inference_seconds
+        if len(passes) == 1:
+            return passes[0], inference_seconds
+        # Recadrages qui se chevauchent : une seule boîte par ressource
+        return merge_detections(np.concatenate(passes), self.iou), inference_seconds
+
+    def _postprocess(self, prediction):
+        """
+        Turn the raw model output into detections above the confidence threshold.
+
+        :param prediction: Raw model output.
+        :return: Array (n, 6) of rows [x1, y1, x2, y2, confidence, class] in model coordinates.
+        """
+        with torch.inference_mode():
+            # Le seuil de confiance est déjà appliqué par la NMS
+            return non_max_suppression(prediction, self.confidence, self.iou, self.max_det).cpu().numpy()
+
+    def detect(self, image, context=None):
+        """
+        Run preprocessing, inference and closest-resource selection on a captured frame.
+
+        Thread-safe as long as each thread uses its own context (see new_context()).
+
+        :param image: Captured BGRA frame.
+        :param context: Inference context (main context by default).
+        :return: Tuple (screen_x, screen_y, resource_id, img, detections); the first three are None
+                 if no resource was found, img is None if the frame could not be processed.
+                 detections is an array of postprocess.DETECTION_DTYPE sorted by distance to the
+                 character, with screen coordinates filled in.
+        """
+        context = context or self._context
+        metrics = self.metrics
+        size = self.input_size
+
+        # Conversion des couleurs et redimensionnement
+        mark = perf_counter()
+        img = self._process_image(image, context, size)
+        now = perf_counter()
+        metrics.record("preprocess", now - mark)
+        mark = now
+
+        if img is None:
+            return None, None, None, None, EMPTY_DETECTIONS
+
+        rows = track_ids = None
+        tracker = context.tracker
+        if tracker is not None:
+            if not tracker.needs_detection(img):
+                # Les pistes suivent le déplacement de la vue : pas d'inférence sur cette image
+                rows = tracker.step()
+                track_ids = tracker.track_ids()
+            now = perf_counter()
+            metrics.record("track", now - mark)
+            mark = now
+
+        if rows is None:
+            # Réutiliser les détections si la scène n'a pas changé
+            rows = context.cache.lookup(img) if context.cache else None
+
+            if rows is None:
+                if self.attention is not None:
+                    rows, inference_seconds = self._infer_attention(image, context, size)
+                    # Le reste (post-traitement des recadrages et fusion) compte comme post-traitement
+                    mark += inference_seconds
+                else:
+                    if size != self.IMG_SIZE:
+                        # Entrée réduite à partir de l'image déjà redimensionnée
+                        context.scaled[size][0](img)
+
+                    # Prédiction avec le modèle, sans passer par AutoShape
+                    prediction = self._infer(context, size)
+                    now = perf_counter()
+                    inference_seconds = now - mark
+                    mark = now
+
+                    rows = self._rows_to_model_space(self._postprocess(prediction), size)
+
+                metrics.record("inference", inference_seconds)
+                metrics.gauge("input_size", size)
+                if self.resolution is not None:
+                    # Taille de la prochaine image selon le budget de latence
+                    self.resolution.record(inference_seconds, size)
+
+                if context.cache:
+                    context.cache.store(rows)
+
+            if tracker is not None:
+                # Identifiants de piste stables d'une inférence à l'autre
+                rows = tracker.update(rows)
+                track_ids = tracker.track_ids()
+
+            now = perf_counter()
+            metrics.record("postprocess", now - mark)
+            mark = now
+
+        # Centres, distances et classement de toutes les détections en une passe
+        origin = (self.character_position_X, self.character_position_Y)
+        detections = rank(to_detection_array(rows, origin, track_ids))
+        now = perf_counter()
+        metrics.record("closest", now - mark)
+        mark = now
+
+        if not len(detections):
+            if self.debug:
+                logger.debug("Aucune ressource détectée")
+            return None, None, None, img, detections
+
+        # Conversion des coordonnées de tous les centres
+        centers = detections["center"]
+        screen_x, screen_y = self.__convert_coordinates_to_screen_position(centers[:, 0], centers[:, 1])
+        detections["screen"][:, 0] = screen_x
+        detections["screen"][:, 1] = screen_y
+        metrics.record("convert", perf_counter() - mark)
+
+        closest = detections[0]
+        return float(closest["screen"][0]), float(closest["screen"][1]), int(closest["cls"]), img, detections
+
     def _load_classes(self):
         """
         Load class information.
@@ -86,7 +601,7 @@ class AlbionDetection:
         :return: Dictionary containing class information.
         """
         classes = {}
-        for k, v in self.model.names.items():
+        for k, v in self.backend.names.items():
             classes[k] = {
                 "label": v,
                 "color": (0, 255, k * 10)
@@ -94,28 +609,30 @@ class AlbionDetection:
         logger.debug(f"Classes chargées: {classes}")
         return classes
 
-    def draw_boxes(self, img, coordinates):
+    def draw_boxes(self, img, detections):
         """
         Draw bounding boxes on the image.
 
         :param img: Input image.
-        :param coordinates: Bounding box coordinates.
+        :param detections: Array of postprocess.DETECTION_DTYPE.
         """
         if img is None:
             return
 
-        for coord in coordinates:
-            x1, y1, x2, y2 = coord[:4].int()
-            confidence, class_id = coord[4], self.classes[int(coord[5])]
+        for detection in detections:
+            x1, y1, x2, y2 = detection["box"].astype(int)
+            confidence, class_id = detection["conf"], self.classes[int(detection["cls"])]
             cv.rectangle(img, (int(x1), int(y1)), (int(x2), int(y2)), class_id["color"], 2)
             label = f"{class_id['label']} {confidence:.2f}"
+            if detection["track"] >= 0:
+                label += f" #{detection['track']}"
             cv.putText(img, label, (int(x1), int(y1) - 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, class_id["color"], 2)
 
         self.__cross_line(img)
 
         cv.drawMarker(img, (int(self.character_position_X), int(self.character_position_Y)), (255, 255, 255),
                       cv.MARKER_DIAMOND, 10, 2)
-        self.__marker_closest(img, coordinates)
+        self.__marker_closest(img, detections)
 
     def __cross_line(self, img):
         """
@@ -131,99 +648,103 @@ class AlbionDetection:
         cv.line(img, (int(self.character_position_X), 0), (int(self.character_position_X), self.IMG_SIZE),
                 (255, 255, 255), 2)
 
-    def __marker_closest(self, img, coordinates):
+    def __marker_closest(self, img, detections):
         """
         Mark the closest resource point on the image.
 
         :param img: Input image.
-        :param coordinates: Bounding box coordinates.
+        :param detections: Array of postprocess.DETECTION_DTYPE.
         """
         if img is None:
             return
 
-        closest = self.closest_point(coordinates)
+        closest = self.closest_point(detections)
 
         if closest is not None:
             cv.drawMarker(img, (int(closest[0]), int(closest[1])), (37, 150, 190), cv.MARKER_CROSS, 10, 2)
             cv.putText(img, "Closest", (int(closest[0]), int(closest[1]) + 50), cv.FONT_HERSHEY_SIMPLEX, 0.5,
                        (0, 255, 0), 2)
 
-    def closest_point(self, coordinates):
+    def closest_point(self, detections):
         """
         Find the closest resource point to the character.
 
-        :param coordinates: Bounding box coordinates.
-        :return: Tuple containing (x, y, resource_id) or None if no resources found.
+        :param detections: Array of postprocess.DETECTION_DTYPE.
+        :return: Tuple containing (x, y, resource_id) in model coordinates or None if no resources found.
         """
-        if not coordinates or len(coordinates) == 0:
-            if self.debug:
-                logger.debug("Aucune ressource détectée")
+        nearest = rank(detections, k=1)
+        if not len(nearest):
             return None
 
-        min_dist = float('inf')
-        position = 0
-        centers = []
-
-        for index, coord in enumerate(coordinates):
-            x1, y1, x2, y2 = coord[:4].int()
+        center_x, center_y = nearest[0]["center"]
+        return float(center_x), float(center_y), int(nearest[0]["cls"])
 
-            center_x, center_y = ((x2 - x1) / 2) + x1, ((y2 - y1) / 2) + y1
-
-            computed = sqrt(
-                abs(self.character_position_X - center_x) ** 2 + abs(self.character_position_Y - center_y) ** 2)
-
-            if computed < min_dist:
-                min_dist = computed
-                position = index
+    def nearest(self, k=None, classes=None, detections=None):
+        """
+        Rank candidate resources by distance to the character.
 
-            centers.append((center_x, center_y, coord[5].int()))
+        :param k: Maximum number of candidates (None = all).
+        :param classes: Class ids or labels to keep (None = every class).
+        :param detections: Array of postprocess.DETECTION_DTYPE (detections of the last predict() by default).
+        :return: Array of postprocess.DETECTION_DTYPE sorted by increasing distance.
+        """
+        if detections is None:
+            detections = self.last_detections
 
-        if not centers:
-            return None
+        if classes is not None:
+            labels = {v["label"]: class_id for class_id, v in self.classes.items()}
+            classes = [labels[c] if isinstance(c, str) else c for c in classes]
 
-        return centers[position]
+        return rank(detections, k, classes)
 
     def __convert_coordinates_to_screen_position(self, center_x, center_y):
         """
         Convert normalized coordinates to screen position.
 
-        :param center_x: Center X coordinate.
-        :param center_y: Center Y coordinate.
+        Uses the capture's cached window geometry, so the conversion follows the
+        window when it is moved or resized.
+
+        :param center_x: Center X coordinate (scalar or array).
+        :param center_y: Center Y coordinate (scalar or array).
         :return: Tuple containing screen position (x, y).
         """
-        if not hasattr(self.window_capture, 'window'):
-            logger.error("Information de fenêtre manquante")
-            return center_x, center_y
-
         try:
             # Conversion des coordonnées de l'image vers les coordonnées de l'écran
-            screen_x = ((center_x * self.window_capture.window.width) / self.IMG_SIZE) + self.window_capture.window.left
-            screen_y = ((center_y * self.window_capture.window.height) / self.IMG_SIZE) + self.window_capture.window.top
-            return screen_x, center_y
+            return self.window_capture.to_screen(center_x, center_y, self.IMG_SIZE)
         except Exception as e:
             logger.error(f"Erreur lors de la conversion des coordonnées: {e}")
             return center_x, center_y
 
-    def _load_model(self):
+    def _load_model(self, weights=None):
         """
-        Load the YOLOv5 model.
+        Load the YOLOv5 model with torch.hub.
 
+        Only needed the first time a weights file is used: afterwards the backend
+        is loaded from its prepared artifact in the model cache.
+
+        :param weights: Weights file to load instead of model_name (variant selection, not kept in self.model).
         :return: Loaded YOLOv5 model.
         """
-        if not os.path.exists(self.model_name):
-            logger.error(f"Le fichier modèle '{self.model_name}' n'existe pas")
-            raise FileNotFoundError(f"Le fichier modèle '{self.model_name}' n'existe pas")
+        if weights is None and self.model is not None:
+            return self.model
+
+        path = weights or self.model_name
+        if not os.path.exists(path):
+            logger.error(f"Le fichier modèle '{path}' n'existe pas")
+            raise FileNotFoundError(f"Le fichier modèle '{path}' n'existe pas")
 
         try:
-            model = torch.hub.load('yolov5', 'custom', path=self.model_name, source="local", force_reload=True,
-                               verbose=self.debug)
+            # Le dépôt local suffit : pas de reconstruction du cache torch.hub à chaque lancement
+            model = torch.hub.load('yolov5', 'custom', path=path, source="local", verbose=self.debug)
             # Réduire l'utilisation de la mémoire
             model.conf = self.confidence  # Seuil de confiance
-            model.iou = 0.45  # Seuil IoU pour NMS
+            model.iou = self.iou  # Seuil IoU pour NMS
 
             # Passer en mode évaluation pour de meilleures performances
             model.eval()
 
+            if weights is None:
+                self.model = model
             return model
         except Exception as e:
             logger.error(f"Échec du chargement du modèle: {str(e)}")
@@ -233,43 +754,40 @@ class AlbionDetection:
         """
         Make predictions using the YOLOv5 model.
 
+        The returned img is the frame resized to IMG_SIZE, in BGRA (shared buffer).
+
         :return: Tuple containing (center_x, center_y, resource_id, img) or (None, None, None, img) if no resources found.
         """
         loop_time = time()
+        metrics = self.metrics
 
         try:
-            # Capture et prétraitement de l'image
-            screenshot = self.window_capture.screenshot()
-            img = self._process_image(screenshot)
+            # Capture (ou image la plus récente du producteur)
+            start = perf_counter()
+            self.last_frame = self.window_capture.latest_frame()
+            metrics.record("capture", perf_counter() - start)
+
+            screen_x, screen_y, resource_id, img, detections = self.detect(self.last_frame.image)
+            self.last_detections = detections
+            now = perf_counter()
 
             if img is None:
                 logger.error("Échec du traitement de l'image de capture d'écran")
                 return None, None, None, None
 
-            # Prédiction avec le modèle
-            res = self.model(img)
+            metrics.record("total", now - start)
+            metrics.frame_done(now)
 
-            # Filtrage des détections par seuil de confiance
-            coordinates = [coord for coord in res.xyxy[0] if coord[4].item() > self.confidence]
-
-            # Affichage du debug si activé
+            # Affichage du debug si activé (hors mesures)
             if self.debug:
-                self.draw_boxes(img, coordinates)
+                self.draw_boxes(img, detections)
                 fps = 1 / (time() - loop_time)
                 cv.putText(img, f'FPS {fps:.1f}', (10, 30), cv.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
                 cv.imshow("Détection Albion", img)
 
-            # Trouver le point le plus proche
-            closest = self.closest_point(coordinates)
-
-            if closest is None:
+            if resource_id is None:
                 return None, None, None, img
 
-            center_x, center_y, resource_id = closest
-
-            # Conversion des coordonnées
-            screen_x, screen_y = self.__convert_coordinates_to_screen_position(center_x, center_y)
-
             logger.debug(f"Ressource détectée: {self.classes[resource_id]['label']} à ({screen_x}, {screen_y})")
 
             return screen_x, screen_y, resource_id, img
@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+import numpy as np
+
+from Application.Albion.postprocess import box_iou
+
+MATCH_IOU = 0.5
+
+
+class ClassCounts:
+    """
+    Per-class true positives, predictions and expected boxes.
+
+    Detections are (n, 6) arrays of [x1, y1, x2, y2, confidence, class]. A
+    prediction is correct when it overlaps (IoU >= threshold) an expected box of
+    the same class not matched yet, the most confident predictions being matched
+    first.
+    """
+
+    def __init__(self):
+        self.true_positives = defaultdict(int)
+        self.predicted = defaultdict(int)
+        self.expected = defaultdict(int)
+
+    def add(self, predicted, expected, iou_threshold=MATCH_IOU):
+        """
+        Match the predictions of one frame with the expected boxes.
+
+        :param predicted: Array (n, 6) of evaluated detections.
+        :param expected: Array (m, 6) of reference detections or labels (confidence ignored).
+        :param iou_threshold: Minimum IoU of a match.
+        """
+        predicted = np.asarray(predicted, dtype=np.float32).reshape(-1, 6)
+        expected = np.asarray(expected, dtype=np.float32).reshape(-1, 6)
+
+        for cls in predicted[:, 5].astype(int):
+            self.predicted[cls] += 1
+        for cls in expected[:, 5].astype(int):
+            self.expected[cls] += 1
+
+        if not len(predicted) or not len(expected):
+            return
+
+        predicted = predicted[np.argsort(-predicted[:, 4], kind="stable")]
+        iou = box_iou(predicted[:, :4], expected[:, :4])
+        iou[predicted[:, None, 5] != expected[None, :, 5]] = 0
+
+        used = np.zeros(len(expected), dtype=bool)
+        for row, cls in zip(iou, predicted[:, 5].astype(int)):
+            row = np.where(used, 0, row)
+            best = int(row.argmax())
+            if row[best] >= iou_threshold:
+                used[best] = True
+                self.true_positives[cls] += 1
+
+    def overall(self):
+        """
+        :return: Scores over every class, see report().
+        """
+        return self._scores(sum(self.true_positives.values()), sum(self.predicted.values()),
+                            sum(self.expected.values()))
+
+    def report(self, names=None):
+        """
+        :param names: Class names {id: label}, optional.
+        :return: Dictionary {label: {precision, recall, f1, predicted, expected}} plus an "all" entry.
+        """
+        report = {}
+        for cls in sorted(set(self.predicted) | set(self.expected)):
+            label = names.get(cls, str(cls)) if names else str(cls)
+            report[label] = self._scores(self.true_positives[cls], self.predicted[cls], self.expected[cls])
+
+        report["all"] = self.overall()
+        return report
+
+    @staticmethod
+    def _scores(true_positives, predicted, expected):
+        precision = true_positives / predicted if predicted else 1.0
+        recall = true_positives / expected if expected else 1.0
+        return {
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "predicted": predicted,
+            "expected": expected,
+        }
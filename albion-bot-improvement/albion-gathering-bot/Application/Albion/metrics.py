@@ -0,0 +1,211 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+import numpy as np
+
+logger = logging.getLogger("PipelineMetrics")
+
+
+class StageTimer:
+    """
+    Rolling window of the latest durations of one pipeline stage.
+
+    Samples are written into a fixed NumPy ring, so recording costs one array
+    store and percentiles are only computed when someone asks for them.
+    Not thread-safe on its own: PipelineMetrics serializes access to its timers.
+    """
+
+    def __init__(self, window):
+        """
+        :param window: Number of most recent samples kept.
+        """
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+
+    def record(self, seconds):
+        """
+        Add one duration.
+
+        :param seconds: Duration of the stage in seconds.
+        """
+        self._samples[self._index] = seconds
+        self._index = (self._index + 1) % len(self._samples)
+        self.count += 1
+
+    def values(self):
+        """
+        :return: Copy of the samples currently in the window, in seconds.
+        """
+        return self._samples[:min(self.count, len(self._samples))].copy()
+
+    def stats(self):
+        """
+        :return: Dictionary with p50, p95, p99 and mean in milliseconds and the total sample count,
+                 or None if nothing was recorded yet.
+        """
+        return _summarize(self.values(), self.count)
+
+
+def _summarize(values, count):
+    """Percentiles of a copy of a timer's samples (see StageTimer.stats)"""
+    if not len(values):
+        return None
+
+    p50, p95, p99 = np.percentile(values, (50, 95, 99)) * 1000
+    return {
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "mean": float(values.mean() * 1000),
+        "count": count,
+    }
+
+
+class PipelineMetrics:
+    """
+    Per-stage latency of the detection pipeline.
+
+    Each stage keeps a rolling window of durations with p50/p95/p99 available at
+    any time through stats(), and a one-line summary is logged every
+    `log_interval` seconds. Non-duration settings that vary per frame (such as
+    the model input size) are recorded as gauges.
+
+    The capture thread and every inference worker record into the same
+    instance: all reads and writes go through one lock, and percentiles are
+    computed outside of it on copies of the samples.
+    """
+
+    STAGES = ("capture", "preprocess", "track", "inference", "postprocess", "closest", "convert", "total")
+    WINDOW = 512
+    LOG_INTERVAL = 30.0
+
+    def __init__(self, stages=STAGES, window=WINDOW, log_interval=LOG_INTERVAL):
+        """
+        :param stages: Names of the stages, in pipeline order.
+        :param window: Number of samples kept per stage.
+        :param log_interval: Seconds between two logged summaries (0 disables logging).
+        """
+        self.window = window
+        self.log_interval = log_interval
+        self.timers = {stage: StageTimer(window) for stage in stages}
+        self.gauges = {}
+        self.current = {}
+        self.frames = 0
+        self._logged_at = perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """
+        Record the duration of a stage, creating the stage on first use.
+
+        :param stage: Stage name.
+        :param seconds: Duration in seconds.
+        """
+        with self._lock:
+            timer = self.timers.get(stage)
+            if timer is None:
+                timer = self.timers[stage] = StageTimer(self.window)
+            timer.record(seconds)
+
+    def gauge(self, name, value):
+        """
+        Record the value a per-frame setting had for one frame.
+
+        :param name: Gauge name (e.g. "input_size").
+        :param value: Value used for the frame.
+        """
+        with self._lock:
+            counts = self.gauges.get(name)
+            if counts is None:
+                counts = self.gauges[name] = Counter()
+            counts[value] += 1
+            self.current[name] = value
+
+    def gauge_stats(self, name):
+        """
+        :param name: Gauge name.
+        :return: Dictionary with the current value and the number of frames per value, or None.
+        """
+        with self._lock:
+            counts = self.gauges.get(name)
+            if counts is None:
+                return None
+            return {"current": self.current[name], "frames": dict(counts)}
+
+    @contextmanager
+    def time(self, stage):
+        """
+        Time the enclosed block as one sample of `stage`.
+
+        :param stage: Stage name.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    def frame_done(self, now=None):
+        """
+        Mark the end of a frame and log the summary when the interval has elapsed.
+
+        :param now: Current time (perf_counter), computed if omitted.
+        """
+        now = perf_counter() if now is None else now
+        with self._lock:
+            self.frames += 1
+            frames = self.frames
+            due = self.log_interval > 0 and now - self._logged_at >= self.log_interval
+            if due:
+                self._logged_at = now
+
+        if due:
+            logger.info(f"Latences par étape ({frames} images): {self.summary()}")
+
+    def stats(self, stage=None):
+        """
+        Query the rolling percentiles.
+
+        :param stage: Stage name, or None for every stage.
+        :return: Stats of the stage (see StageTimer.stats), or a dictionary of them keyed by stage.
+        """
+        with self._lock:
+            timers = self.timers.items() if stage is None else [(stage, self.timers.get(stage))]
+            samples = {name: (timer.values(), timer.count) for name, timer in timers if timer is not None}
+
+        if stage is not None:
+            return _summarize(*samples[stage]) if stage in samples else None
+        return {name: _summarize(values, count) for name, (values, count) in samples.items()}
+
+    def summary(self):
+        """
+        :return: One line "stage p50/p95/p99 ms" for every stage with samples.
+        """
+        parts = []
+        for name, stats in self.stats().items():
+            if stats is not None:
+                parts.append(f"{name} {stats['p50']:.1f}/{stats['p95']:.1f}/{stats['p99']:.1f}")
+        if not parts:
+            return "aucune mesure"
+
+        with self._lock:
+            gauges = [(name, self.current[name], sorted(counts.items())) for name, counts in self.gauges.items()]
+
+        summary = " | ".join(parts) + " ms (p50/p95/p99)"
+        for name, current, counts in gauges:
+            frames = ", ".join(f"{value}: {count}" for value, count in counts)
+            summary += f" | {name} {current} ({frames})"
+        return summary
+
+    def reset(self):
+        """Forget every sample"""
+        with self._lock:
+            self.timers = {stage: StageTimer(self.window) for stage in self.timers}
+            self.gauges = {}
+            self.current = {}
+            self.frames = 0
+            self._logged_at = perf_counter()
@@ -0,0 +1,243 @@
+import logging
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future
+from time import perf_counter, sleep
+
+import numpy as np
+
+from Application.Capture.session import FramePool
+
+logger = logging.getLogger("InferencePipeline")
+
+# Detection result of one frame: closest resource in screen coordinates (None if
+# nothing was found), every detection as a DETECTION_DTYPE array sorted by
+# distance (see postprocess.to_detection_array()), the frame timestamp
+# given by the capture, perf_counter() times of capture and completion, and the
+# pipeline sequence number of the frame.
+DetectionResult = namedtuple(
+    "DetectionResult",
+    ["x", "y", "resource", "detections", "timestamp", "captured_at", "completed_at", "index"]
+)
+
+
+class InferencePipeline:
+    """
+    Asynchronous inference on a small pool of worker threads.
+
+    Frames are copied into buffers owned by the pipeline and put in a bounded
+    queue. When the queue is full the oldest frame is dropped (its future is
+    cancelled), so workers always process recent frames and producers never
+    block. An optional capture thread feeds the queue continuously, which lets
+    the capture of frame N+1 overlap the inference of frame N.
+    """
+
+    WORKERS = 1
+    QUEUE_SIZE = 2
+
+    def __init__(self, detection, workers=WORKERS, queue_size=QUEUE_SIZE, fps=None):
+        """
+        :param detection: AlbionDetection providing the capture and the model.
+        :param workers: Number of inference threads, each with its own inference context.
+        :param queue_size: Maximum number of frames waiting for a worker.
+        :param fps: Rate of the continuous capture thread, or None to only process submitted frames.
+        """
+        self.detection = detection
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.fps = fps
+
+        # Une image rendue par le pool reste valide tant qu'elle est en file ou en cours de traitement
+        self._pool = FramePool(self.queue_size + self.workers + 2)
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._result_ready = threading.Condition(threading.Lock())
+
+        self._latest = None
+        self._results = 0
+        self._index = 0
+        self._running = False
+        self._threads = []
+
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Start the workers and, if fps is set, the continuous capture thread"""
+        if self._running:
+            return
+
+        self._running = True
+        for number in range(self.workers):
+            context = self.detection.new_context()
+            thread = threading.Thread(target=self._worker_loop, args=(context,),
+                                      name=f"InferenceWorker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        if self.fps:
+            thread = threading.Thread(target=self._capture_loop, name="InferenceCapture", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Pipeline d'inférence démarré ({self.workers} worker(s), file de {self.queue_size}"
+                    f"{f', capture continue à {self.fps} FPS' if self.fps else ''})")
+
+    def stop(self, timeout=2.0):
+        """Stop every thread and cancel the futures of frames still queued"""
+        with self._available:
+            self._running = False
+            pending = list(self._queue)
+            self._queue.clear()
+            self._available.notify_all()
+
+        for _, future, _, _ in pending:
+            future.cancel()
+
+        with self._result_ready:
+            self._result_ready.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        logger.info(f"Pipeline d'inférence arrêté: {self._results} résultats, "
+                    f"{self.frames_dropped}/{self.frames_submitted} images ignorées")
+
+    def submit(self, frame=None, captured_at=None):
+        """
+        Queue a frame for inference without waiting.
+
+        :param frame: Frame to analyse; captured now if omitted.
+        :param captured_at: perf_counter() time of the capture of `frame` (now if omitted).
+        :return: Future resolved with a DetectionResult, cancelled if the frame is dropped.
+        """
+        future = Future()
+        if not self._running:
+            future.cancel()
+            return future
+
+        if captured_at is None:
+            captured_at = perf_counter()
+        if frame is None:
+            frame = self.detection.window_capture.latest_frame()
+
+        if frame.image is None:
+            future.set_result(None)
+            return future
+
+        # Copie dans un tampon du pipeline : ceux de la capture sont recyclés trop tôt
+        image = self._pool.acquire(frame.image.shape)
+        np.copyto(image, frame.image)
+
+        with self._available:
+            self.frames_submitted += 1
+            dropped = self._queue.popleft() if len(self._queue) >= self.queue_size else None
+            self._queue.append((frame._replace(image=image), future, captured_at, self._index))
+            self._index += 1
+            self._available.notify()
+
+        if dropped is not None:
+            self.frames_dropped += 1
+            dropped[1].cancel()
+
+        return future
+
+    def latest(self, after=None, timeout=None):
+        """
+        Return the newest result.
+
+        :param after: Only accept a result for a frame captured after this perf_counter() time.
+        :param timeout: Maximum wait in seconds for such a result (None = do not wait).
+        :return: DetectionResult or None.
+        """
+        deadline = None if timeout is None else perf_counter() + timeout
+
+        with self._result_ready:
+            while True:
+                result = self._latest
+                if result is not None and (after is None or result.captured_at >= after):
+                    return result
+
+                remaining = 0 if deadline is None else deadline - perf_counter()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._result_ready.wait(remaining)
+
+    def stream(self, timeout=None):
+        """
+        Yield results as they are produced, skipping results older than the last one yielded.
+
+        :param timeout: Maximum wait in seconds for each result; iteration stops on timeout or stop().
+        """
+        last = None
+        while self._running:
+            with self._result_ready:
+                ready = self._result_ready.wait_for(
+                    lambda: not self._running or (self._latest is not None and
+                                                  (last is None or self._latest.index > last.index)),
+                    timeout
+                )
+                if not ready or not self._running:
+                    return
+                last = self._latest
+            yield last
+
+    def _publish(self, result):
+        with self._result_ready:
+            # Les workers peuvent finir dans le désordre : garder le résultat de l'image la plus récente
+            if self._latest is None or result.index > self._latest.index:
+                self._latest = result
+            self._results += 1
+            self._result_ready.notify_all()
+
+    def _worker_loop(self, context):
+        while True:
+            with self._available:
+                while self._running and not self._queue:
+                    self._available.wait()
+                if not self._running:
+                    return
+                frame, future, captured_at, index = self._queue.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                x, y, resource, _, detections = self.detection.detect(frame.image, context)
+                completed_at = perf_counter()
+                self.detection.metrics.record("total", completed_at - captured_at)
+                self.detection.metrics.frame_done(completed_at)
+
+                result = DetectionResult(x, y, resource, detections, frame.timestamp, captured_at,
+                                         completed_at, index)
+                self._publish(result)
+                future.set_result(result)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'inférence asynchrone: {e}")
+                future.set_exception(e)
+
+    def _capture_loop(self):
+        period = 1.0 / self.fps
+        capture = self.detection.window_capture
+
+        while self._running:
+            start = perf_counter()
+            try:
+                frame = capture.latest_frame()
+                self.detection.metrics.record("capture", perf_counter() - start)
+                if frame.image is None:
+                    # Fin d'un rejeu
+                    break
+                self.submit(frame, captured_at=start)
+            except Exception as e:
+                logger.error(f"Erreur lors de la capture pour l'inférence: {e}")
+
+            remaining = period - (perf_counter() - start)
+            if remaining > 0:
+                sleep(remaining)
@@ -0,0 +1,142 @@
+import numpy as np
+
+from Application.lazy import lazy_import
+
+torch = lazy_import("torch")
+torchvision = lazy_import("torchvision")
+
+
+def non_max_suppression(prediction, conf_thres=0.5, iou_thres=0.45, max_det=1000):
+    """
+    Filter the raw YOLOv5 output of a single image into final detections.
+
+    Equivalent to what AutoShape runs after the model (best class per box,
+    confidence = objectness * class score, per-class NMS), without the
+    letterbox rescaling since the input is already at the model size.
+
+    :param prediction: Raw model output of shape (1, N, 5 + classes) in xywh.
+    :param conf_thres: Confidence threshold.
+    :param iou_thres: IoU threshold for NMS.
+    :param max_det: Maximum number of detections kept.
+    :return: Tensor (n, 6) of [x1, y1, x2, y2, confidence, class], like results.xyxy[0].
+    """
+    if isinstance(prediction, (list, tuple)):
+        prediction = prediction[0]
+
+    x = prediction[0]
+    x = x[x[:, 4] > conf_thres]
+    if not x.shape[0]:
+        return torch.zeros((0, 6), device=prediction.device)
+
+    scores = x[:, 5:] * x[:, 4:5]
+    conf, cls = scores.max(1, keepdim=True)
+
+    boxes = torch.empty_like(x[:, :4])
+    half_w, half_h = x[:, 2] / 2, x[:, 3] / 2
+    boxes[:, 0] = x[:, 0] - half_w
+    boxes[:, 1] = x[:, 1] - half_h
+    boxes[:, 2] = x[:, 0] + half_w
+    boxes[:, 3] = x[:, 1] + half_h
+
+    keep = conf.view(-1) > conf_thres
+    detections = torch.cat((boxes, conf, cls.float()), 1)[keep]
+    if not detections.shape[0]:
+        return detections
+
+    kept = torchvision.ops.batched_nms(detections[:, :4], detections[:, 4], detections[:, 5].long(), iou_thres)
+    return detections[kept[:max_det]]
+
+
+def box_iou(boxes, others):
+    """
+    :param boxes: Array (n, 4) of [x1, y1, x2, y2].
+    :param others: Array (m, 4) of [x1, y1, x2, y2].
+    :return: Array (n, m) of pairwise IoU.
+    """
+    top_left = np.maximum(boxes[:, None, :2], others[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], others[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    area = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    other_area = np.prod(others[:, 2:] - others[:, :2], axis=1)
+    return inter / np.maximum(area[:, None] + other_area[None, :] - inter, 1e-9)
+
+
+def merge_detections(rows, iou_thres=0.45):
+    """
+    Class-aware NMS over detections coming from several inference passes
+    (overlapping crops), keeping the most confident box of each duplicate group.
+
+    :param rows: Array (n, 6) of [x1, y1, x2, y2, confidence, class].
+    :param iou_thres: IoU above which two boxes of the same class are duplicates.
+    :return: Array (m, 6) of the kept rows, by decreasing confidence.
+    """
+    rows = rows[np.argsort(-rows[:, 4], kind="stable")]
+    duplicate = box_iou(rows[:, :4], rows[:, :4]) > iou_thres
+    duplicate &= rows[:, None, 5] == rows[None, :, 5]
+
+    keep = np.ones(len(rows), dtype=bool)
+    for i in range(len(rows)):
+        if keep[i]:
+            keep[i + 1:] &= ~duplicate[i, i + 1:]
+    return rows[keep]
+
+
+# One row per detection, in model coordinates except for screen
+DETECTION_DTYPE = np.dtype([
+    ("box", np.float32, (4,)),  # x1, y1, x2, y2
+    ("center", np.float32, (2,)),
+    ("cls", np.int32),
+    ("conf", np.float32),
+    ("distance", np.float32),  # to the character position
+    ("screen", np.float32, (2,)),  # center in screen coordinates
+    ("track", np.int32),  # stable id given by the tracker, -1 when untracked
+])
+
+EMPTY_DETECTIONS = np.zeros(0, dtype=DETECTION_DTYPE)
+
+
+def to_detection_array(rows, origin, track_ids=None):
+    """
+    Build the structured detection array from NMS output in one vectorized pass.
+
+    :param rows: Array (n, 6) of [x1, y1, x2, y2, confidence, class].
+    :param origin: Character position (x, y) in model coordinates, used for the distances.
+    :param track_ids: Track id of each row (see tracker.ResourceTracker), or None.
+    :return: Array of DETECTION_DTYPE; screen is left at zero (see AlbionDetection.detect()).
+    """
+    rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+
+    detections = np.zeros(len(rows), dtype=DETECTION_DTYPE)
+    if not len(rows):
+        return detections
+
+    box = rows[:, :4]
+    center = (box[:, :2] + box[:, 2:]) / 2
+    detections["box"] = box
+    detections["center"] = center
+    detections["conf"] = rows[:, 4]
+    detections["cls"] = rows[:, 5]
+    detections["distance"] = np.hypot(center[:, 0] - origin[0], center[:, 1] - origin[1])
+    detections["track"] = -1 if track_ids is None else track_ids
+    return detections
+
+
+def rank(detections, k=None, classes=None):
+    """
+    Select the detections nearest to the character.
+
+    :param detections: Array of DETECTION_DTYPE.
+    :param k: Maximum number of detections returned (None = all).
+    :param classes: Iterable of class ids to keep (None = every class).
+    :return: Array of DETECTION_DTYPE sorted by increasing distance.
+    """
+    if classes is not None:
+        detections = detections[np.isin(detections["cls"], np.fromiter(classes, dtype=np.int32))]
+
+    distance = detections["distance"]
+    if k is not None and k < len(detections):
+        # Sélection partielle puis tri des k plus proches seulement
+        nearest = np.argpartition(distance, k)[:k]
+        return detections[nearest[np.argsort(distance[nearest], kind="stable")]]
+    return detections[np.argsort(distance, kind="stable")]
@@ -0,0 +1,61 @@
+import numpy as np
+
+from Application.lazy import lazy_import
+
+cv = lazy_import("cv2")
+
+
+class FramePreprocessor:
+    """
+    Turn a captured BGRA frame into the model input in reused buffers.
+
+    The frame is resized once into a uint8 buffer, then a single strided pass
+    swaps BGR to RGB, transposes HWC to CHW and scales to [0, 1] straight into a
+    contiguous float32 (1, 3, size, size) array. The array is allocated once and
+    can be wrapped by torch.from_numpy() without copying, so no memory is
+    allocated per frame.
+    """
+
+    SIZE = 640
+    SCALE = np.float32(255.0)
+
+    def __init__(self, size=SIZE, input=None):
+        """
+        :param size: Side of the square model input.
+        :param input: Existing (1, 3, size, size) float32 array to write the model input into
+                      (shared with another preprocessor), or None to allocate one.
+        """
+        self.size = size
+        self._resized = np.empty((size, size, 4), dtype=np.uint8)
+        self.input = np.empty((1, 3, size, size), dtype=np.float32) if input is None else input
+
+    def resize(self, image):
+        """
+        Resize a frame to the model size without preparing the model input.
+
+        :param image: Captured frame (HxWx4 BGRA or HxWx3 BGR, uint8).
+        :return: The frame at the model size (the frame itself if already at that size, else a shared buffer).
+        """
+        if image.shape[:2] == (self.size, self.size):
+            # Déjà à la taille du modèle (région ou rejeu) : pas de redimensionnement
+            return image
+
+        channels = image.shape[2]
+        if self._resized.shape[2] != channels:
+            self._resized = np.empty((self.size, self.size, channels), dtype=np.uint8)
+        return cv.resize(image, (self.size, self.size), dst=self._resized, interpolation=cv.INTER_LINEAR)
+
+    def __call__(self, image):
+        """
+        Prepare a frame for inference.
+
+        :param image: Captured frame (HxWx4 BGRA or HxWx3 BGR, uint8).
+        :return: Tuple (resized, input): the frame resized to the model size (BGRA
+                 or BGR, shared buffer) and the float32 NCHW RGB model input.
+        """
+        resized = self.resize(image)
+
+        # BGR(A) -> RGB, HWC -> CHW et normalisation en une seule passe
+        np.divide(resized[..., 2::-1].transpose(2, 0, 1), self.SCALE, out=self.input[0])
+
+        return resized, self.input
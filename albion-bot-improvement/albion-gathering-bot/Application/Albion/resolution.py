@@ -0,0 +1,87 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class ResolutionController:
+    """
+    Pick the model input size that keeps inference under a latency budget.
+
+    The inference time of recent frames at the current size is kept in a short
+    window. When its 90th percentile exceeds the budget the next smaller size is
+    used; when the time expected at the next larger size (current time scaled by
+    the pixel ratio) fits in the budget with some headroom, the size goes back
+    up. A cooldown after each switch prevents oscillating between two sizes.
+
+    Every inference worker records into the same controller, so updates are
+    serialized by a lock. A worker may still be finishing a frame at the
+    previous size after a switch: samples are tagged with the size they were
+    measured at and those of another size are dropped.
+    """
+
+    SIZES = (320, 416, 512, 640)
+    WINDOW = 20
+    COOLDOWN = 10
+    HEADROOM = 0.85
+
+    def __init__(self, budget_ms, sizes=SIZES, window=WINDOW, cooldown=COOLDOWN, headroom=HEADROOM):
+        """
+        :param budget_ms: Target inference time per frame, in milliseconds.
+        :param sizes: Supported input sizes (multiples of 32).
+        :param window: Number of recent frames measured at the current size.
+        :param cooldown: Minimum number of frames between two size changes.
+        :param headroom: Share of the budget the expected time at the larger size must stay under.
+        """
+        if any(size % 32 for size in sizes):
+            raise ValueError(f"Tailles d'entrée invalides {sizes}, multiples de 32 attendus")
+
+        self.budget = budget_ms / 1000
+        self.sizes = sorted(sizes)
+        self.cooldown = cooldown
+        self.headroom = headroom
+
+        # Départ à la plus grande taille : la précision d'abord, la latence mesurée ensuite
+        self.size = self.sizes[-1]
+        self._samples = deque(maxlen=window)
+        self._since_switch = 0
+        self.switches = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, size=None):
+        """
+        Add the inference time of one frame.
+
+        :param seconds: Inference time of the frame.
+        :param size: Input size the frame was inferred at (default: the current size).
+        :return: Input size to use for the next frame.
+        """
+        with self._lock:
+            if size is not None and size != self.size:
+                # Image lancée avant le dernier changement de taille
+                return self.size
+            return self._record(seconds)
+
+    def _record(self, seconds):
+        self._samples.append(seconds)
+        self._since_switch += 1
+        if self._since_switch < self.cooldown or len(self._samples) < self._samples.maxlen // 2:
+            return self.size
+
+        recent = float(np.percentile(self._samples, 90))
+        index = self.sizes.index(self.size)
+
+        if recent > self.budget and index > 0:
+            self._switch(self.sizes[index - 1])
+        elif index < len(self.sizes) - 1:
+            larger = self.sizes[index + 1]
+            expected = recent * (larger / self.size) ** 2
+            if expected <= self.budget * self.headroom:
+                self._switch(larger)
+        return self.size
+
+    def _switch(self, size):
+        self.size = size
+        self._samples.clear()
+        self._since_switch = 0
+        self.switches += 1
@@ -0,0 +1,258 @@
+"""
+Tracking of detected resources between two full inferences.
+
+Resources are static in the world: between two frames every box moves by the
+same amount, the shift of the view while the character walks. ViewMotion
+measures that shift with a phase correlation on a small grayscale copy of the
+frame, and ResourceTracker moves its tracks accordingly. The model only has to
+run every `interval` frames, or sooner when tracking degrades (unreliable
+motion estimate, large cumulative shift, nothing tracked). Full detections are
+matched to the tracks by IoU so that each resource keeps a stable track id.
+"""
+
+import numpy as np
+
+from Application.lazy import lazy_import
+from Application.Albion.postprocess import box_iou
+
+cv = lazy_import("cv2")
+
+
+class ViewMotion:
+    """
+    Global translation of the view between consecutive frames (phase correlation).
+    """
+
+    SIZE = 128
+
+    def __init__(self, model_size, size=SIZE):
+        """
+        :param model_size: Side of the frames passed in (model input size).
+        :param size: Side of the downscaled grayscale copy that is correlated.
+        """
+        self.scale = model_size / size
+        self.size = size
+        self._small = None
+        self._current = np.empty((size, size), dtype=np.float32)
+        self._previous = np.empty((size, size), dtype=np.float32)
+        self._window = None
+        self._has_previous = False
+
+    def reset(self):
+        """Forget the reference frame (next call returns no motion)"""
+        self._has_previous = False
+
+    def __call__(self, img):
+        """
+        :param img: Frame at the model size (BGRA or BGR, uint8).
+        :return: Tuple (dx, dy, response): shift of the content since the previous
+                 frame in model pixels, and the correlation peak (0-1, higher is more reliable).
+        """
+        if self._window is None:
+            self._window = cv.createHanningWindow((self.size, self.size), cv.CV_32F)
+
+        self._small = cv.resize(img, (self.size, self.size), dst=self._small, interpolation=cv.INTER_AREA)
+        code = cv.COLOR_BGRA2GRAY if self._small.shape[2] == 4 else cv.COLOR_BGR2GRAY
+        gray = cv.cvtColor(self._small, code)
+        np.copyto(self._current, gray, casting="unsafe")
+
+        if not self._has_previous:
+            shift, response = (0.0, 0.0), 1.0
+            self._has_previous = True
+        else:
+            shift, response = cv.phaseCorrelate(self._previous, self._current, self._window)
+
+        # Image courante = référence de la prochaine mesure
+        self._previous, self._current = self._current, self._previous
+        return shift[0] * self.scale, shift[1] * self.scale, response
+
+
+class ResourceTracker:
+    """
+    IoU tracker with global motion compensation.
+
+    Tracks are kept in parallel NumPy arrays (boxes, confidence, class, id,
+    missed detections). Call needs_detection() on each preprocessed frame: when
+    it returns False, step() gives the moved tracks; otherwise run the model and
+    give its rows to update().
+    """
+
+    INTERVAL = 5
+    IOU_THRESHOLD = 0.3
+    MAX_MISSES = 2
+    MIN_RESPONSE = 0.1
+    MAX_SHIFT = 80.0
+
+    def __init__(self, model_size, interval=INTERVAL, iou_threshold=IOU_THRESHOLD, max_misses=MAX_MISSES,
+                 min_response=MIN_RESPONSE, max_shift=MAX_SHIFT):
+        """
+        :param model_size: Side of the model input, in pixels.
+        :param interval: Maximum number of frames between two full inferences.
+        :param iou_threshold: Minimum IoU to match a detection with a track.
+        :param max_misses: Full inferences a track may be missed before it is dropped.
+        :param min_response: Phase correlation peak below which the motion estimate is not trusted.
+        :param max_shift: Cumulative shift (model pixels) since the last inference that forces a new one,
+                          as resources may have entered the view.
+        """
+        self.model_size = model_size
+        self.interval = interval
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.min_response = min_response
+        self.max_shift = max_shift
+
+        self.motion = ViewMotion(model_size)
+
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.conf = np.zeros(0, dtype=np.float32)
+        self.cls = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.misses = np.zeros(0, dtype=np.int32)
+        self._next_id = 0
+
+        self._since_detection = interval
+        self._shift = np.zeros(2, dtype=np.float32)
+        self._pending = None
+
+        # Compteurs : inférences complètes, images suivies, inférences forcées par une dégradation
+        self.detections = 0
+        self.tracked = 0
+        self.degraded = 0
+
+    def reset(self):
+        """Drop every track; the next frame runs a full inference"""
+        self.boxes = self.boxes[:0]
+        self.conf = self.conf[:0]
+        self.cls = self.cls[:0]
+        self.ids = self.ids[:0]
+        self.misses = self.misses[:0]
+        self.motion.reset()
+        self._since_detection = self.interval
+
+    def needs_detection(self, img):
+        """
+        Measure the view motion on the new frame and decide whether the model must run.
+
+        :param img: Preprocessed frame at the model size.
+        :return: True if a full inference is required for this frame.
+        """
+        dx, dy, response = self.motion(img)
+        self._pending = (dx, dy)
+
+        if self._since_detection + 1 >= self.interval:
+            return True
+
+        self._shift += (abs(dx), abs(dy))
+        if not (self.misses == 0).any() or response < self.min_response or self._shift.max() > self.max_shift:
+            self.degraded += 1
+            return True
+        return False
+
+    def _apply_motion(self):
+        if self._pending is not None and len(self.boxes):
+            self.boxes += np.array(self._pending * 2, dtype=np.float32)
+        self._pending = None
+
+    def step(self):
+        """
+        Move the tracks by the measured view motion, without running the model.
+
+        :return: Array (n, 6) of [x1, y1, x2, y2, confidence, class] of the visible tracks.
+        """
+        self._apply_motion()
+        self._since_detection += 1
+        self.tracked += 1
+
+        # Pistes sorties de l'image
+        centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+        inside = ((centers >= 0) & (centers < self.model_size)).all(axis=1)
+        if not inside.all():
+            self._keep(inside)
+
+        return self.rows()
+
+    def update(self, rows):
+        """
+        Match a full detection to the tracks and refresh them.
+
+        :param rows: Array (n, 6) of [x1, y1, x2, y2, confidence, class] from the model.
+        :return: Array (n, 6) of the detections, in the same order as track_ids().
+        """
+        self._apply_motion()
+        self._since_detection = 0
+        self._shift[:] = 0
+        self.detections += 1
+
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        matched_tracks = np.full(len(rows), -1)
+
+        if len(rows) and len(self.boxes):
+            iou = box_iou(self.boxes, rows[:, :4])
+            iou[self.cls[:, None] != rows[None, :, 5]] = 0
+
+            # Appariement glouton par IoU décroissante
+            order = np.argsort(iou, axis=None)[::-1]
+            used_tracks = set()
+            for track, row in zip(*np.unravel_index(order, iou.shape)):
+                if iou[track, row] < self.iou_threshold:
+                    break
+                if track in used_tracks or matched_tracks[row] >= 0:
+                    continue
+                used_tracks.add(track)
+                matched_tracks[row] = track
+
+        matched = matched_tracks >= 0
+        missed = np.ones(len(self.boxes), dtype=bool)
+        missed[matched_tracks[matched]] = False
+
+        # Pistes non retrouvées : conservées quelques inférences pour garder leur identifiant
+        self.misses[missed] += 1
+        lost = missed & (self.misses > self.max_misses)
+        lost_ids = self.ids[missed & ~lost]
+
+        new_ids = np.empty(len(rows), dtype=np.int32)
+        new_ids[matched] = self.ids[matched_tracks[matched]]
+        created = np.count_nonzero(~matched)
+        new_ids[~matched] = np.arange(self._next_id, self._next_id + created, dtype=np.int32)
+        self._next_id += created
+
+        kept = missed & ~lost
+        self.boxes = np.concatenate((rows[:, :4], self.boxes[kept]))
+        self.conf = np.concatenate((rows[:, 4], self.conf[kept]))
+        self.cls = np.concatenate((rows[:, 5], self.cls[kept]))
+        self.ids = np.concatenate((new_ids, lost_ids))
+        self.misses = np.concatenate((np.zeros(len(rows), dtype=np.int32), self.misses[kept]))
+
+        return rows
+
+    def rows(self):
+        """
+        :return: Array (n, 6) of [x1, y1, x2, y2, confidence, class] of the tracks seen at the last inference.
+        """
+        visible = self.misses == 0
+        return np.hstack((self.boxes[visible], self.conf[visible, None], self.cls[visible, None]))
+
+    def track_ids(self):
+        """
+        :return: Track ids of the rows returned by rows() / update(), in the same order.
+        """
+        return self.ids[self.misses == 0]
+
+    def stats(self):
+        """
+        :return: Dictionary with full inferences, tracked frames, degraded frames and the tracked share.
+        """
+        total = self.detections + self.tracked
+        return {
+            "detections": self.detections,
+            "tracked": self.tracked,
+            "degraded": self.degraded,
+            "tracked_rate": self.tracked / total if total else 0.0,
+        }
+
+    def _keep(self, mask):
+        self.boxes = self.boxes[mask]
+        self.conf = self.conf[mask]
+        self.cls = self.cls[mask]
+        self.ids = self.ids[mask]
+        self.misses = self.misses[mask]
@@ -0,0 +1,249 @@
+"""
+Automatic choice of the model variant on each machine.
+
+Several weight files of the same classes (e.g. nano, small and medium exports)
+can be given as candidates. On the first start on a machine each candidate is
+run on a labelled validation set (YOLO format, see dataset.LabelledFrames) and
+micro-benchmarked; the fastest one whose F1 score reaches the accuracy floor is
+kept. No validation set ships with the weights: choosing among several
+candidates requires one and fails with a clear error without it. The choice is
+stored in the model cache, keyed by the machine profile, the candidates'
+contents, the backend and the validation set, so later starts load the chosen
+variant straight away and any change triggers a new selection.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from time import perf_counter
+
+import numpy as np
+
+from Application.lazy import lazy_import
+from Application.Albion.backends import ModelCache, load_backend
+from Application.Albion.dataset import LabelledFrames
+from Application.Albion.evaluation import ClassCounts
+from Application.Albion.postprocess import non_max_suppression
+from Application.Albion.preprocess import FramePreprocessor
+
+torch = lazy_import("torch")
+
+logger = logging.getLogger("VariantSelector")
+
+
+def machine_profile(gpu=True):
+    """
+    Describe the machine the measurements are made on.
+
+    :param gpu: Include the CUDA device name (imports torch; None if torch is not installed).
+    :return: Dictionary with the host name, OS, CPU model, core count and GPU.
+    """
+    try:
+        import cpuinfo
+        cpu = cpuinfo.get_cpu_info().get("brand_raw")
+    except Exception:
+        cpu = None
+
+    profile = {
+        "node": platform.node(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpu": cpu or platform.processor() or platform.machine(),
+        "cores": os.cpu_count(),
+    }
+    if gpu:
+        try:
+            profile["gpu"] = torch.cuda.get_device_name(0) if torch.cuda.is_available() else None
+        except ImportError:
+            profile["gpu"] = None
+    return profile
+
+
+def profile_id(profile):
+    """
+    :return: Short stable identifier of a machine profile.
+    """
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class VariantSelector:
+    """Benchmark candidate weight files once per machine and remember the best one"""
+
+    FILE = "variants.json"
+    VALIDATION = "validation"
+    ACCURACY_FLOOR = 0.8
+    RUNS = 30
+
+    def __init__(self, candidates, load_torch_model, validation=VALIDATION, backend="torch", size=640,
+                 accuracy_floor=ACCURACY_FLOOR, confidence=0.5, iou=0.45, runs=RUNS,
+                 cache_root=ModelCache.ROOT, calibration=None):
+        """
+        :param candidates: Paths of the candidate .pt weight files, of the same classes.
+        :param load_torch_model: Function weights -> torch.hub AutoShape model.
+        :param validation: Labelled validation directory (YOLO format).
+        :param backend: Inference engine the variants are measured with (see backends.BACKENDS).
+        :param size: Model input size.
+        :param accuracy_floor: Minimum F1 score (IoU 0.5, every class) on the validation set.
+        :param confidence: Confidence threshold of the detections.
+        :param iou: IoU threshold of the NMS.
+        :param runs: Number of timed inferences per candidate.
+        :param cache_root: Model cache root, where the choice is stored.
+        :param calibration: Calibration frames for the INT8 backend.
+        """
+        self.candidates = list(candidates)
+        self.load_torch_model = load_torch_model
+        self.validation = validation
+        self.backend = backend
+        self.size = size
+        self.accuracy_floor = accuracy_floor
+        self.confidence = confidence
+        self.iou = iou
+        self.runs = runs
+        self.cache_root = cache_root
+        self.calibration = calibration
+        self.path = os.path.join(cache_root, self.FILE)
+
+    def key(self):
+        """
+        :return: Identifier of this selection problem on this machine.
+        """
+        frames = LabelledFrames(self.validation)
+        validation = [(os.path.basename(path), os.path.getsize(path)) for path in frames.paths]
+
+        description = {
+            "machine": machine_profile(),
+            "candidates": [ModelCache.hash_file(weights) for weights in self.candidates],
+            "backend": self.backend,
+            "size": self.size,
+            "accuracy_floor": self.accuracy_floor,
+            "confidence": self.confidence,
+            "validation": validation,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:16]
+
+    def select(self):
+        """
+        Return the variant to load, benchmarking the candidates if this machine has no stored choice.
+
+        :return: Path of the chosen weight file.
+        :raises FileNotFoundError: Several candidates but no labelled validation images to compare them on.
+        """
+        if len(self.candidates) == 1:
+            return self.candidates[0]
+
+        # Sans jeu de validation le choix serait arbitraire : refuser plutôt que de garder le premier candidat
+        # (un dossier sans image lève aussi FileNotFoundError, voir ImageDirectorySource)
+        if not os.path.isdir(self.validation):
+            raise FileNotFoundError(
+                f"Jeu de validation '{self.validation}' introuvable : il faut des images annotées "
+                f"(format YOLO) pour choisir parmi {len(self.candidates)} variantes du modèle. "
+                f"Indiquez-le avec --validation, ou ne donnez qu'un seul fichier de poids")
+
+        key = self.key()
+        choices = self._load()
+        stored = choices.get(key)
+        if stored is not None and os.path.exists(stored["weights"]):
+            logger.info(f"Variante '{stored['weights']}' retenue pour cette machine "
+                        f"({stored['latency_ms']:.1f} ms, F1 {stored['f1']:.3f})")
+            return stored["weights"]
+
+        logger.info(f"Sélection de la variante du modèle parmi {len(self.candidates)} candidats...")
+        results = []
+        names = None
+        for weights in self.candidates:
+            try:
+                result = self.measure(weights)
+            except Exception as e:
+                logger.warning(f"Variante '{weights}' ignorée: {e}")
+                continue
+
+            # Les variantes doivent partager les classes, sinon les identifiants ne correspondent pas
+            if names is None:
+                names = result.pop("names")
+            elif result.pop("names") != names:
+                logger.warning(f"Variante '{weights}' ignorée: classes différentes du premier candidat")
+                continue
+
+            logger.info(f"Variante '{weights}': {result['latency_ms']:.1f} ms, F1 {result['f1']:.3f}")
+            results.append(result)
+
+        if not results:
+            raise RuntimeError("Aucune variante du modèle n'a pu être évaluée")
+
+        eligible = [result for result in results if result["f1"] >= self.accuracy_floor]
+        if eligible:
+            chosen = min(eligible, key=lambda result: result["latency_ms"])
+        else:
+            chosen = max(results, key=lambda result: result["f1"])
+            logger.warning(f"Aucune variante n'atteint le seuil F1 {self.accuracy_floor}, "
+                           f"la plus précise est retenue")
+
+        choices[key] = dict(chosen, results=results, selected_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        self._save(choices)
+
+        logger.info(f"Variante retenue: '{chosen['weights']}' ({chosen['latency_ms']:.1f} ms, F1 {chosen['f1']:.3f})")
+        return chosen["weights"]
+
+    def measure(self, weights):
+        """
+        Evaluate one candidate on the validation set and time its inference.
+
+        :param weights: Path of the candidate weight file.
+        :return: Dictionary with weights, latency_ms (p50, NMS included), precision, recall, f1 and names.
+        """
+        backend = load_backend(self.backend, weights, self.size, lambda: self.load_torch_model(weights),
+                               cache_root=self.cache_root, calibration=self.calibration)
+        frames = LabelledFrames(self.validation)
+        preprocessor = FramePreprocessor(self.size)
+
+        def run(model_input):
+            tensor = torch.from_numpy(model_input).to(backend.device, backend.dtype)
+            with torch.inference_mode():
+                return non_max_suppression(backend(tensor), self.confidence, self.iou).cpu().numpy()
+
+        counts = ClassCounts()
+        for index in range(len(frames)):
+            image = frames.read(index)
+            if image is None:
+                continue
+            _, model_input = preprocessor(image)
+            counts.add(run(model_input), frames.labels(index, self.size))
+
+        # Latence mesurée sur une entrée fixe, après préchauffage
+        for _ in range(3):
+            run(preprocessor.input)
+        latencies = np.empty(self.runs)
+        for i in range(self.runs):
+            start = perf_counter()
+            run(preprocessor.input)
+            latencies[i] = perf_counter() - start
+
+        scores = counts.overall()
+        return {
+            "weights": weights,
+            "latency_ms": float(np.median(latencies) * 1000),
+            "precision": scores["precision"],
+            "recall": scores["recall"],
+            "f1": scores["f1"],
+            "names": {int(k): v for k, v in backend.names.items()},
+        }
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Choix de variantes illisible ({e}), nouvelle sélection")
+            return {}
+
+    def _save(self, choices):
+        os.makedirs(self.cache_root, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(choices, f, indent=2)
+        os.replace(temporary, self.path)
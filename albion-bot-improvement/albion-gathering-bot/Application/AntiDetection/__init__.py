@@ -41,6 +41,9 @@ class AntiDetectionManager:
         self.monitoring_thread = None
         self.last_action_time = time.time()
 
+        # Attente des actions (remplacée par une attente annulable pendant une session asyncio)
+        self.sleep = time.sleep
+
         # Facteurs humains
         self.max_clicks_per_minute = random.randint(70, 120)  # Nombre max de clics par minute
         self.mouse_speed_variance = random.uniform(0.3, 0.6)  # Variance de vitesse de la souris
@@ -229,7 +232,7 @@ class AntiDetectionManager:
             )
 
             # Délai avant le clic (simuler le temps de réaction)
-            time.sleep(self.randomize_delay(0.1))
+            self.sleep(self.randomize_delay(0.1))
 
             # Effectuer le clic
             button = 'right' if right_click else 'left'
@@ -326,7 +329,7 @@ class AntiDetectionManager:
                 # Vérifier si le jeu est actif
                 if not self.is_game_window_active():
                     logger.warning("Fenêtre du jeu non active. Attente...")
-                    time.sleep(self.randomize_delay(2.0))
+                    self.sleep(self.randomize_delay(2.0))
                     retries += 1
                     continue
 
@@ -345,7 +348,7 @@ class AntiDetectionManager:
             except Exception as e:
                 logger.error(f"Erreur lors de l'exécution de l'action: {e}")
                 retries += 1
-                time.sleep(self.randomize_delay(1.0))
+                self.sleep(self.randomize_delay(1.0))
 
         logger.error(f"Action abandonnée après {max_retries} tentatives")
         return None
@@ -1,20 +1,61 @@
-from .Windows import WindowsCapture
-from .process_capture import ProcessCapture
 from platform import system
+import json
 import os
 
 class CaptureFactory:
     capture = None
 
-    def __init__(self, window_name="Albion Online Client"):
+    def __init__(self, window_name="Albion Online Client", source=None, speed=0.0, loop=False):
+        """
+        :param window_name: Nom de la fenêtre du jeu.
+        :param source: Dossier d'images, vidéo ou session .npy à rejouer à la place de la fenêtre.
+        :param speed: Vitesse de rejeu (1.0 = temps réel, 0 = sans limite).
+        :param loop: Rejoue la source en boucle.
+        """
         self.windowName = window_name
-        
+
+        if source is not None:
+            # Rejeu hors ligne, indépendant du système d'exploitation
+            from .replay import ReplayCapture
+            self.capture = ReplayCapture(source, speed=speed, loop=loop)
+        elif system() == "Linux":
+            # Capture X11 par mémoire partagée, par PID si le processus est connu
+            from .X11 import X11Capture
+            self.capture = X11Capture(window_name=window_name, pid=self._load_linux_pid())
         # Vérifier si le fichier d'informations de processus existe
-        if os.path.exists('albion_process.json'):
+        elif os.path.exists('albion_process.json'):
             # Utiliser la capture basée sur le processus
+            from .process_capture import ProcessCapture
             self.capture = ProcessCapture(window_name=window_name)
         elif system() == "Windows":
             # Utiliser la capture Windows standard
+            from .Windows import WindowsCapture
             self.capture = WindowsCapture(window_name=window_name)
         else:
-            raise NotImplementedError(f"Le système d'exploitation {system()} n'est pas pris en charge.")
\ No newline at end of file
+            raise NotImplementedError(f"Le système d'exploitation {system()} n'est pas pris en charge.")
+
+    @staticmethod
+    def _load_linux_pid():
+        """
+        PID de albion_process.json, seulement s'il désigne un processus Albion local.
+
+        Le fichier peut provenir d'une autre machine (PID Windows) : un processus
+        Linux sans rapport peut porter le même numéro, son nom est donc vérifié.
+        """
+        try:
+            with open('albion_process.json', 'r') as f:
+                pid = json.load(f).get('process', {}).get('pid')
+        except (OSError, ValueError):
+            return None
+        if not pid:
+            return None
+
+        # comm (tronqué à 15 caractères) ou ligne de commande, qui contient le chemin de l'exécutable sous Wine
+        for name in ("comm", "cmdline"):
+            try:
+                with open(f"/proc/{pid}/{name}", "rb") as f:
+                    if b"albion" in f.read().lower():
+                        return pid
+            except OSError:
+                return None
+        return None
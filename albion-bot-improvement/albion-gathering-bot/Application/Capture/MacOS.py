@@ -11,14 +11,8 @@ class MacOSCapture(Capture):
 
         self.hwnd = self.__get_window_id()
 
-        self.window = self.get_window_information()
-
-        self.grab_coordinates = {
-            "top": self.window.top,
-            "left": self.window.left,
-            "width": self.window.width,
-            "height": self.window.height
-        }
+        # Bornes de la fenêtre en cache, revalidées pour suivre ses déplacements
+        self.track_window()
 
     def get_window_information(self):
         window_info_list = Quartz.CGWindowListCopyWindowInfo(Quartz.kCGWindowListOptionIncludingWindow, self.hwnd)
@@ -0,0 +1,511 @@
+"""
+Capture Linux via X11.
+
+La fenêtre du jeu est trouvée par nom ou par PID (_NET_WM_PID), puis capturée
+avec l'extension MIT-SHM (XShmGetImage) dans un segment de mémoire partagée
+réutilisé, vu directement comme un tableau NumPy. Sans MIT-SHM (affichage
+distant), la capture retombe sur XGetImage.
+
+Le gestionnaire d'erreurs par défaut de Xlib termine le processus à la première
+erreur du protocole (fenêtre fermée, région hors de l'écran) : un gestionnaire
+non fatal est installé, qui note la dernière erreur de chaque connexion ; les
+captures synchronisent la connexion et lèvent XError si une requête a échoué.
+
+Fonctionne sous Xvfb, par exemple :
+    Xvfb :99 -screen 0 1920x1080x24 &
+    DISPLAY=:99 python -m benchmarks.capture_benchmark
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import threading
+
+import numpy as np
+
+from . import Capture, ScreenInformation
+from .session import FramePool
+
+logger = logging.getLogger("X11Capture")
+
+ZPixmap = 2
+AllPlanes = ctypes.c_ulong(~0 & 0xFFFFFFFFFFFFFFFF)
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+IsViewable = 2
+BadWindow = 3
+BadMatch = 8
+BadDrawable = 9
+
+
+class XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int), ("y", ctypes.c_int),
+        ("width", ctypes.c_int), ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int), ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p), ("root", ctypes.c_ulong),
+        ("class_", ctypes.c_int), ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int), ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong), ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int), ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int), ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long), ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long), ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p),
+    ]
+
+
+class XImage(ctypes.Structure):
+    # Seuls les premiers champs sont lus ; la structure est toujours allouée par Xlib
+    _fields_ = [
+        ("width", ctypes.c_int), ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int), ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int), ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int), ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int), ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong), ("green_mask", ctypes.c_ulong), ("blue_mask", ctypes.c_ulong),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int), ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong), ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte), ("request_code", ctypes.c_ubyte), ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+
+class XError(OSError):
+    """Erreur du protocole X11 reçue par le gestionnaire d'erreurs du module"""
+
+    def __init__(self, error_code, request_code, resource):
+        super().__init__(f"Erreur X11 {error_code} (requête {request_code}, ressource {resource:#x})")
+        self.error_code = error_code
+        self.request_code = request_code
+        self.resource = resource
+
+
+# Dernière erreur X11 de chaque connexion (adresse du Display), notée par _record_error
+_errors = {}
+
+
+@XErrorHandler
+def _record_error(display, event):
+    event = event.contents
+    _errors[display] = XError(event.error_code, event.request_code, event.resourceid)
+    # Valeur ignorée par Xlib ; le processus continue
+    return 0
+
+
+def _take_error(display):
+    """Renvoie et oublie la dernière erreur X11 notée pour la connexion"""
+    return _errors.pop(display, None)
+
+
+def _check(x11, display):
+    """Attend le traitement des requêtes envoyées et lève XError si l'une d'elles a échoué"""
+    x11.XSync(display, 0)
+    error = _take_error(display)
+    if error is not None:
+        raise error
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+def _load_libraries():
+    """Charge libX11, libXext et la libc, et déclare les signatures utilisées"""
+    x11 = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11") or "libX11.so.6")
+    xext = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xext") or "libXext.so.6")
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+    display_p, window, image_p = ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XImage)
+
+    signatures = {
+        (x11, "XInitThreads"): ([], ctypes.c_int),
+        (x11, "XOpenDisplay"): ([ctypes.c_char_p], display_p),
+        (x11, "XCloseDisplay"): ([display_p], ctypes.c_int),
+        (x11, "XDefaultRootWindow"): ([display_p], window),
+        (x11, "XInternAtom"): ([display_p, ctypes.c_char_p, ctypes.c_int], ctypes.c_ulong),
+        (x11, "XQueryTree"): ([display_p, window, ctypes.POINTER(window), ctypes.POINTER(window),
+                               ctypes.POINTER(ctypes.POINTER(window)), ctypes.POINTER(ctypes.c_uint)], ctypes.c_int),
+        (x11, "XGetWindowProperty"): ([display_p, window, ctypes.c_ulong, ctypes.c_long, ctypes.c_long,
+                                       ctypes.c_int, ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong),
+                                       ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_ulong),
+                                       ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_void_p)],
+                                      ctypes.c_int),
+        (x11, "XFetchName"): ([display_p, window, ctypes.POINTER(ctypes.c_char_p)], ctypes.c_int),
+        (x11, "XFree"): ([ctypes.c_void_p], ctypes.c_int),
+        (x11, "XGetWindowAttributes"): ([display_p, window, ctypes.POINTER(XWindowAttributes)], ctypes.c_int),
+        (x11, "XTranslateCoordinates"): ([display_p, window, window, ctypes.c_int, ctypes.c_int,
+                                          ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+                                          ctypes.POINTER(window)], ctypes.c_int),
+        (x11, "XGetImage"): ([display_p, window, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+                              ctypes.c_ulong, ctypes.c_int], image_p),
+        (x11, "XDestroyImage"): ([image_p], ctypes.c_int),
+        (x11, "XSync"): ([display_p, ctypes.c_int], ctypes.c_int),
+        (x11, "XSetErrorHandler"): ([XErrorHandler], ctypes.c_void_p),
+        (xext, "XShmQueryExtension"): ([display_p], ctypes.c_int),
+        (xext, "XShmCreateImage"): ([display_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_char_p,
+                                     ctypes.POINTER(XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint], image_p),
+        (xext, "XShmAttach"): ([display_p, ctypes.POINTER(XShmSegmentInfo)], ctypes.c_int),
+        (xext, "XShmDetach"): ([display_p, ctypes.POINTER(XShmSegmentInfo)], ctypes.c_int),
+        (xext, "XShmGetImage"): ([display_p, window, image_p, ctypes.c_int, ctypes.c_int, ctypes.c_ulong],
+                                 ctypes.c_int),
+        (libc, "shmget"): ([ctypes.c_int, ctypes.c_size_t, ctypes.c_int], ctypes.c_int),
+        (libc, "shmat"): ([ctypes.c_int, ctypes.c_void_p, ctypes.c_int], ctypes.c_void_p),
+        (libc, "shmdt"): ([ctypes.c_void_p], ctypes.c_int),
+        (libc, "shmctl"): ([ctypes.c_int, ctypes.c_int, ctypes.c_void_p], ctypes.c_int),
+    }
+
+    for (library, name), (argtypes, restype) in signatures.items():
+        function = getattr(library, name)
+        function.argtypes = argtypes
+        function.restype = restype
+
+    # Gestionnaire global à Xlib, pour toutes les connexions du processus
+    x11.XSetErrorHandler(_record_error)
+
+    return x11, xext, libc
+
+
+class _ShmImage:
+    """Segment de mémoire partagée attaché au serveur X, vu comme un tableau BGRA"""
+
+    def __init__(self, x11, xext, libc, display, visual, depth, width, height):
+        self.x11, self.xext, self.libc, self.display = x11, xext, libc, display
+        self.info = XShmSegmentInfo()
+
+        self.image = xext.XShmCreateImage(display, visual, depth, ZPixmap, None, ctypes.byref(self.info), width, height)
+        if not self.image:
+            raise OSError("XShmCreateImage a échoué")
+
+        image = self.image.contents
+        if image.bits_per_pixel != 32:
+            x11.XDestroyImage(self.image)
+            raise OSError(f"Format de pixel non pris en charge: {image.bits_per_pixel} bits")
+
+        size = image.bytes_per_line * image.height
+        self.info.shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            x11.XDestroyImage(self.image)
+            raise OSError(ctypes.get_errno(), "shmget a échoué")
+
+        address = libc.shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(self.info.shmid, IPC_RMID, None)
+            x11.XDestroyImage(self.image)
+            raise OSError(ctypes.get_errno(), "shmat a échoué")
+
+        self.info.shmaddr = address
+        self.info.readOnly = 0
+        image.data = address
+
+        # L'attachement échoue de façon asynchrone (BadAccess sur un affichage distant)
+        if not xext.XShmAttach(display, ctypes.byref(self.info)):
+            self._release_segment()
+            raise OSError("XShmAttach a échoué")
+        x11.XSync(display, 0)
+        error = _take_error(display)
+        if error is not None:
+            self._release_segment()
+            raise error
+
+        # Le segment est détruit automatiquement quand le dernier processus s'en détache
+        libc.shmctl(self.info.shmid, IPC_RMID, None)
+
+        buffer = (ctypes.c_ubyte * size).from_address(address)
+        rows = np.ctypeslib.as_array(buffer).reshape(image.height, image.bytes_per_line)
+        self.array = rows[:, :width * 4].reshape(height, width, 4)
+
+    def _release_segment(self):
+        self.libc.shmdt(ctypes.c_void_p(self.info.shmaddr))
+        self.libc.shmctl(self.info.shmid, IPC_RMID, None)
+        # data pointe vers le segment partagé : XDestroyImage ne doit pas le libérer
+        self.image.contents.data = None
+        self.x11.XDestroyImage(self.image)
+
+    def grab(self, drawable, left, top):
+        if not self.xext.XShmGetImage(self.display, drawable, self.image, left, top, AllPlanes):
+            _check(self.x11, self.display)
+            raise OSError("XShmGetImage a échoué")
+        return self.array
+
+    def close(self):
+        self.xext.XShmDetach(self.display, ctypes.byref(self.info))
+        self.x11.XSync(self.display, 0)
+        self._release_segment()
+
+
+class XShmSession:
+    """
+    Grabber X11 avec la même interface que CaptureSession (grab, pool, close).
+
+    Un segment partagé est gardé par taille de région ; chaque capture y est écrite
+    par le serveur X puis copiée dans un tampon du pool.
+    """
+
+    POOL_SIZE = 3
+    MAX_SEGMENTS = 4
+
+    def __init__(self, x11, xext, libc, display, root, pool_size=POOL_SIZE):
+        self.x11, self.xext, self.libc = x11, xext, libc
+        self.display = display
+        self.root = root
+        self.pool = FramePool(pool_size)
+        self._lock = threading.Lock()
+        self._segments = {}
+
+        attributes = XWindowAttributes()
+        x11.XGetWindowAttributes(display, root, ctypes.byref(attributes))
+        self.visual, self.depth = attributes.visual, attributes.depth
+        self.width, self.height = attributes.width, attributes.height
+
+        self.use_shm = bool(xext.XShmQueryExtension(display))
+        if not self.use_shm:
+            logger.warning("Extension MIT-SHM indisponible, capture par XGetImage")
+
+    def _segment(self, width, height):
+        key = (width, height)
+        segment = self._segments.get(key)
+        if segment is None:
+            if len(self._segments) >= self.MAX_SEGMENTS:
+                # Fenêtre redimensionnée : les anciens segments ne servent plus
+                for old in self._segments.values():
+                    old.close()
+                self._segments = {}
+            segment = _ShmImage(self.x11, self.xext, self.libc, self.display, self.visual, self.depth, width, height)
+            self._segments[key] = segment
+        return segment
+
+    def grab(self, region, out=None):
+        """
+        Capture une région de l'écran au format BGRA.
+
+        La région est limitée à l'écran avant la capture, une requête qui en déborde
+        échouant (BadMatch) : les parties hors de l'écran (fenêtre déplacée en partie
+        hors champ) sont noires et l'image garde la taille demandée.
+
+        :param region: Dictionnaire (top, left, width, height) en coordonnées absolues.
+        :param out: Tampon de destination optionnel, sinon un tampon du pool est utilisé.
+        :raises XError: Erreur du serveur X (par exemple écran redimensionné pendant la capture).
+        """
+        width, height = region["width"], region["height"]
+        if out is None or out.shape != (height, width, 4):
+            out = self.pool.acquire((height, width, 4))
+
+        with self._lock:
+            left, top = max(region["left"], 0), max(region["top"], 0)
+            right, bottom = min(region["left"] + width, self.width), min(region["top"] + height, self.height)
+            if right <= left or bottom <= top:
+                out[:] = 0
+                return out
+
+            target = out
+            if (right - left, bottom - top) != (width, height):
+                out[:] = 0
+                target = out[top - region["top"]:bottom - region["top"], left - region["left"]:right - region["left"]]
+
+            try:
+                self._grab(target, left, top)
+            except XError as e:
+                if e.error_code == BadMatch:
+                    # L'écran a changé de taille (xrandr) : les bornes sont relues
+                    self._read_root_size()
+                raise
+        return out
+
+    def _grab(self, out, left, top):
+        """Capture la région de l'écran de la taille de `out`, entièrement visible, dans `out`"""
+        height, width = out.shape[:2]
+        # Erreur antérieure sans rapport avec cette capture (fenêtre disparue pendant une recherche)
+        _take_error(self.display)
+
+        if self.use_shm:
+            try:
+                np.copyto(out, self._segment(width, height).grab(self.root, left, top))
+                return
+            except XError as e:
+                if e.error_code in (BadMatch, BadDrawable, BadWindow):
+                    # Région invalide et non MIT-SHM : XGetImage échouerait de même
+                    raise
+                logger.warning(f"Capture MIT-SHM impossible ({e}), passage à XGetImage")
+                self.use_shm = False
+            except OSError as e:
+                logger.warning(f"Capture MIT-SHM impossible ({e}), passage à XGetImage")
+                self.use_shm = False
+
+        image = self.x11.XGetImage(self.display, self.root, left, top, width, height, AllPlanes, ZPixmap)
+        if not image:
+            _check(self.x11, self.display)
+            raise OSError("XGetImage a échoué")
+        try:
+            contents = image.contents
+            buffer = (ctypes.c_ubyte * (contents.bytes_per_line * height)).from_address(contents.data)
+            rows = np.ctypeslib.as_array(buffer).reshape(height, contents.bytes_per_line)
+            np.copyto(out, rows[:, :width * 4].reshape(height, width, 4))
+        finally:
+            self.x11.XDestroyImage(image)
+
+    def _read_root_size(self):
+        attributes = XWindowAttributes()
+        if self.x11.XGetWindowAttributes(self.display, self.root, ctypes.byref(attributes)):
+            self.width, self.height = attributes.width, attributes.height
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                try:
+                    segment.close()
+                except Exception:
+                    pass
+            self._segments = {}
+
+
+class X11Capture(Capture):
+    """Capture d'une fenêtre X11 par nom ou par PID"""
+
+    def __init__(self, window_name=Capture.WINDOWS_NAME, pid=None, display=None):
+        """
+        :param window_name: Nom (ou partie du nom) de la fenêtre du jeu.
+        :param pid: PID du processus du jeu ; prioritaire sur le nom s'il est fourni.
+        :param display: Nom de l'affichage X (par défaut $DISPLAY).
+        """
+        self.x11, self.xext, self.libc = _load_libraries()
+        self.x11.XInitThreads()
+
+        display_name = display or os.environ.get("DISPLAY")
+        self.display = self.x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise Exception(f"Impossible d'ouvrir l'affichage X '{display_name}'")
+        self.root = self.x11.XDefaultRootWindow(self.display)
+        self.pid = pid
+
+        super().__init__(window_name)
+
+        # Le grabber mss par défaut est remplacé par la mémoire partagée X11
+        self.session.close()
+        self.session = XShmSession(self.x11, self.xext, self.libc, self.display, self.root)
+        self.hwnd = self.__get_window_id()
+
+        # Bornes de la fenêtre en cache, revalidées pour suivre ses déplacements
+        self.track_window()
+
+    def _get_screen_information(self) -> ScreenInformation:
+        attributes = XWindowAttributes()
+        self.x11.XGetWindowAttributes(self.display, self.root, ctypes.byref(attributes))
+        return ScreenInformation.from_client_area(top=0, left=0, width=attributes.width, height=attributes.height)
+
+    def get_window_information(self):
+        attributes = XWindowAttributes()
+        if not self.x11.XGetWindowAttributes(self.display, self.hwnd, ctypes.byref(attributes)):
+            # Fenêtre fermée : BadWindow noté par le gestionnaire d'erreurs, sans arrêter le processus
+            raise Exception(f"Fenêtre X11 {self.hwnd:#x} introuvable ({_take_error(self.display)})")
+
+        x, y, child = ctypes.c_int(), ctypes.c_int(), ctypes.c_ulong()
+        self.x11.XTranslateCoordinates(self.display, self.hwnd, self.root, 0, 0,
+                                       ctypes.byref(x), ctypes.byref(y), ctypes.byref(child))
+
+        # La fenêtre cliente X11 n'inclut pas la barre de titre du gestionnaire de fenêtres
+        return ScreenInformation.from_client_area(top=y.value, left=x.value,
+                                                  width=attributes.width, height=attributes.height)
+
+    def _children(self, window):
+        root, parent = ctypes.c_ulong(), ctypes.c_ulong()
+        children, count = ctypes.POINTER(ctypes.c_ulong)(), ctypes.c_uint()
+        if not self.x11.XQueryTree(self.display, window, ctypes.byref(root), ctypes.byref(parent),
+                                   ctypes.byref(children), ctypes.byref(count)):
+            return []
+        try:
+            return [children[i] for i in range(count.value)]
+        finally:
+            if children:
+                self.x11.XFree(children)
+
+    def _property(self, window, name, kind):
+        """Lit une propriété de fenêtre ; renvoie les octets bruts et le nombre d'éléments"""
+        atom = self.x11.XInternAtom(self.display, name, 0)
+        kind_atom = self.x11.XInternAtom(self.display, kind, 0)
+        actual_type, actual_format = ctypes.c_ulong(), ctypes.c_int()
+        count, remaining, data = ctypes.c_ulong(), ctypes.c_ulong(), ctypes.c_void_p()
+
+        status = self.x11.XGetWindowProperty(self.display, window, atom, 0, 1024, 0, kind_atom,
+                                             ctypes.byref(actual_type), ctypes.byref(actual_format),
+                                             ctypes.byref(count), ctypes.byref(remaining), ctypes.byref(data))
+        if status != 0 or not data.value:
+            return None, 0
+        try:
+            # Les propriétés de format 32 sont stockées en long côté client
+            item_size = {8: 1, 16: 2, 32: ctypes.sizeof(ctypes.c_long)}.get(actual_format.value, 1)
+            return ctypes.string_at(data.value, count.value * item_size), count.value
+        finally:
+            self.x11.XFree(data)
+
+    def _window_name(self, window):
+        raw, _ = self._property(window, b"_NET_WM_NAME", b"UTF8_STRING")
+        if raw:
+            return raw.decode("utf-8", "replace")
+
+        name = ctypes.c_char_p()
+        if self.x11.XFetchName(self.display, window, ctypes.byref(name)) and name.value:
+            try:
+                return name.value.decode("latin-1")
+            finally:
+                self.x11.XFree(name)
+        return ""
+
+    def _window_pid(self, window):
+        raw, count = self._property(window, b"_NET_WM_PID", b"CARDINAL")
+        if not raw or count < 1:
+            return None
+        return ctypes.c_long.from_buffer_copy(raw[:ctypes.sizeof(ctypes.c_long)]).value
+
+    def _is_viewable(self, window):
+        attributes = XWindowAttributes()
+        return self.x11.XGetWindowAttributes(self.display, window, ctypes.byref(attributes)) and \
+            attributes.map_state == IsViewable
+
+    def __get_window_id(self):
+        pending = list(self._children(self.root))
+        target = self.windowName.lower()
+        named = None
+
+        # Parcours en largeur : les fenêtres de premier niveau sont examinées en premier
+        while pending:
+            window = pending.pop(0)
+            if self._is_viewable(window):
+                if self.pid is not None and self._window_pid(window) == self.pid:
+                    return window
+                if named is None and target in self._window_name(window).lower():
+                    if self.pid is None:
+                        return window
+                    named = window
+            pending.extend(self._children(window))
+
+        if named is not None:
+            # PID périmé ou fenêtre sans _NET_WM_PID : la fenêtre est retrouvée par son nom
+            logger.warning(f"Aucune fenêtre pour le PID {self.pid}, fenêtre '{self.windowName}' utilisée")
+            return named
+
+        if self.pid is not None:
+            raise Exception('could not find window for pid %s or named %s' % (self.pid, self.windowName))
+        raise Exception('could not find window named %s' % self.windowName)
+
+    def close(self):
+        super().close()
+        if self.display:
+            self.x11.XCloseDisplay(self.display)
+            self.display = None
@@ -1,7 +1,14 @@
 from abc import abstractmethod
+from time import perf_counter
 from mss import mss
 from numpy import array
 
+from .session import CaptureSession
+from .background import BackgroundCapture, Frame
+from .regions import ScreenRegion
+from .recorder import SessionRecorder
+from .geometry import WindowGeometry
+
 
 class ScreenInformation:
     top = 0
@@ -17,6 +24,11 @@ class ScreenInformation:
         self.width = width
         self.height = height - self.ALBION_HEADER_HEIGHT
 
+    @classmethod
+    def from_client_area(cls, top, left, width, height):
+        """Construit l'information à partir d'une zone cliente sans barre de titre"""
+        return cls(top - cls.ALBION_HEADER_HEIGHT, left, width, height + cls.ALBION_HEADER_HEIGHT)
+
     def center(self):
         return (self.width + self.top) / 2, (self.height + self.left) / 2
 
@@ -30,7 +42,11 @@ class Capture:
     def __init__(self, window_name=WINDOWS_NAME):
         self.windowName = window_name
 
-        self.screen = self.__get_screen_information()
+        self.screen = self._get_screen_information()
+
+        # Géométrie de fenêtre en cache (voir track_window), sinon valeurs fixes
+        self.geometry = None
+        self._window = None
 
         self.grab_coordinates = {
             "top": 0,
@@ -39,7 +55,63 @@ class Capture:
             "height": 0
         }
 
-    def __get_screen_information(self) -> ScreenInformation:
+        # Session persistante : un seul grabber et des tampons réutilisés
+        self.session = CaptureSession()
+
+        # Producteur optionnel qui capture en continu (voir start_background_capture)
+        self.background = None
+
+        # Régions d'intérêt nommées (voir register_region)
+        self.regions = {}
+
+        # Enregistreur de session optionnel (voir start_recording)
+        self.recorder = None
+
+    @property
+    def window(self) -> ScreenInformation | None:
+        """Géométrie courante de la fenêtre capturée"""
+        if self.geometry is not None:
+            return self.geometry.current()
+        return self._window
+
+    @window.setter
+    def window(self, value):
+        self._window = value
+
+    @property
+    def grab_coordinates(self) -> dict:
+        """Région mss de la fenêtre, suivant ses déplacements si la géométrie est suivie"""
+        if self.geometry is not None:
+            return self.geometry.grab_coordinates()
+        return self._grab_coordinates
+
+    @grab_coordinates.setter
+    def grab_coordinates(self, value):
+        self._grab_coordinates = value
+
+    def track_window(self, refresh_interval=WindowGeometry.REFRESH_INTERVAL) -> WindowGeometry:
+        """
+        Suit la géométrie de la fenêtre via get_window_information(), revalidée
+        au plus toutes les `refresh_interval` secondes.
+        """
+        self.geometry = WindowGeometry(self.get_window_information, refresh_interval=refresh_interval)
+        # Après un redimensionnement, les tampons à l'ancienne taille ne resserviront plus
+        self.geometry.on_change(lambda window, resized: resized and self.session.pool.clear())
+        return self.geometry
+
+    def to_screen(self, x, y, model_size=WindowGeometry.MODEL_SIZE):
+        """
+        Convertit un point de l'espace carré du modèle en coordonnées d'écran.
+
+        :return: Tuple (x, y) à l'écran.
+        """
+        if self.geometry is not None and self.geometry.model_size == model_size:
+            return self.geometry.to_screen(x, y)
+
+        window = self.window or self.screen
+        return (x * window.width / model_size) + window.left, (y * window.height / model_size) + window.top
+
+    def _get_screen_information(self) -> ScreenInformation:
         with mss() as sct:
             info = sct.monitors[1]
             return ScreenInformation(
@@ -58,6 +130,107 @@ class Capture:
         pass
 
     def screenshot(self) -> array:
-        with mss() as sct:
-            return array(sct.grab(self.grab_coordinates))
+        """
+        Capture la fenêtre au format BGRA.
+
+        :return: Copie appartenant à l'appelant, qui peut la conserver ou la
+                 passer à un autre thread (voir latest_frame() pour le chemin sans copie).
+        """
+        return self.latest_frame().image.copy()
+
+    def latest_frame(self) -> Frame:
+        """
+        Renvoie l'image la plus récente avec son horodatage.
+
+        Si la capture en arrière-plan est active, l'image du producteur est copiée
+        sans attendre de nouvelle capture ; sinon la fenêtre est capturée directement.
+
+        Chemin interne de la prédiction : l'image appartient au pool de la session
+        et n'est valide que pendant les CaptureSession.POOL_SIZE - 1 captures
+        suivantes. Copier l'image pour la conserver (ou utiliser screenshot()).
+        """
+        if self.background is not None and self.background.is_alive():
+            frame = self.background.ring.latest(acquire=self.session.pool.acquire)
+            if frame is not None:
+                return frame
+
+        image = self.session.grab(self.grab_coordinates)
+        frame = Frame(image, perf_counter(), -1)
+
+        if self.recorder is not None:
+            self.recorder.record(image, frame.timestamp, getattr(self, "window", None))
+
+        return frame
+
+    def register_region(self, name, left, top, width, height, reference=(640, 640)) -> ScreenRegion:
+        """
+        Enregistre une région nommée de la fenêtre.
+
+        Les coordonnées sont exprimées dans l'espace de référence et suivent la
+        géométrie courante de la fenêtre au moment de chaque capture.
+        """
+        region = ScreenRegion(left, top, width, height, reference)
+        self.regions[name] = region
+        return region
+
+    def grab_region(self, name) -> array:
+        """
+        Capture une région enregistrée à la résolution native de la fenêtre.
+
+        :param name: Nom donné à register_region().
+        :return: Tableau BGRA de la région, appartenant à l'appelant (les régions sont petites,
+                 la copie évite qu'une capture d'un autre thread ne réutilise le tampon).
+        """
+        region = self.regions[name]
+        window = getattr(self, "window", None) or self.screen
+
+        if self.background is not None and self.background.is_alive():
+            # Découper la région dans l'image la plus récente du producteur
+            frame = self.background.ring.latest(bounds=region.bounds(window.width, window.height))
+            if frame is not None:
+                return frame.image
+
+        return self.session.grab(region.resolve(window)).copy()
+
+    def start_background_capture(self, fps=BackgroundCapture.DEFAULT_FPS):
+        """Démarre le thread de capture continue"""
+        if self.background is not None and self.background.is_alive():
+            return
+
+        self.background = BackgroundCapture(self, fps=fps)
+        self.background.start()
+
+    def stop_background_capture(self):
+        """Arrête le thread de capture continue"""
+        if self.background is not None:
+            self.background.stop()
+            self.background = None
+
+    def start_recording(self, path, **kwargs) -> SessionRecorder:
+        """
+        Enregistre chaque image capturée dans une session sur disque.
+
+        Avec la capture en arrière-plan, les images sont enregistrées par le
+        thread producteur ; sinon à chaque capture directe.
+
+        :param path: Dossier de la session.
+        :param kwargs: Options de SessionRecorder (chunk_size, queue_size, scale, codec, quality).
+        """
+        self.stop_recording()
+        recorder = SessionRecorder(path, **kwargs)
+        recorder.start()
+        self.recorder = recorder
+        return recorder
+
+    def stop_recording(self):
+        """Termine l'enregistrement en cours et écrit son manifeste"""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.stop()
+
+    def close(self):
+        """Arrête la capture en arrière-plan, l'enregistrement et libère la session de capture"""
+        self.stop_background_capture()
+        self.stop_recording()
+        self.session.close()
 
@@ -0,0 +1,166 @@
+"""
+Capture en arrière-plan.
+
+Un thread producteur capture la fenêtre en continu dans un petit anneau de
+tampons. Les consommateurs (prédiction, barre de récolte, affichage de débogage)
+récupèrent l'image la plus récente avec son horodatage, sans attendre la capture.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from time import perf_counter, sleep
+
+import numpy as np
+
+logger = logging.getLogger("BackgroundCapture")
+
+# Image capturée : tableau BGRA, horodatage perf_counter() pris juste après la
+# capture et numéro de séquence croissant (-1 pour une capture directe).
+Frame = namedtuple("Frame", ["image", "timestamp", "index"])
+
+
+class FrameRing:
+    """Anneau de tampons d'image à un producteur et plusieurs consommateurs"""
+
+    def __init__(self, size=3):
+        self.size = max(2, size)
+        self._slots = [None] * self.size
+        self._timestamps = [0.0] * self.size
+        self._indices = [-1] * self.size
+        self._head = -1
+        self._count = 0
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+
+    @property
+    def count(self):
+        """Nombre d'images publiées depuis la création de l'anneau"""
+        return self._count
+
+    def write_slot(self, shape):
+        """
+        Renvoie l'emplacement que le producteur peut remplir.
+
+        Cet emplacement n'est jamais la tête de l'anneau : les consommateurs,
+        qui ne lisent que la tête, ne le voient donc pas pendant l'écriture.
+        """
+        slot = (self._head + 1) % self.size
+        buffer = self._slots[slot]
+        if buffer is None or buffer.shape != tuple(shape):
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._slots[slot] = buffer
+        return slot, buffer
+
+    def publish(self, slot, image, timestamp):
+        """
+        Publie l'image écrite dans l'emplacement comme la plus récente.
+
+        Si l'image n'est pas le tampon rendu par write_slot() (capture rognée d'une
+        fenêtre en partie hors de l'écran, écrite par mss dans un tampon du pool de
+        la session), elle est d'abord copiée dans un tampon appartenant à l'anneau :
+        le pool la réutiliserait pendant que des consommateurs la copient.
+
+        :return: Image publiée, appartenant à l'anneau.
+        """
+        buffer = self._slots[slot]
+        if image is not buffer:
+            if buffer is None or buffer.shape != image.shape:
+                buffer = np.empty(image.shape, dtype=np.uint8)
+            np.copyto(buffer, image)
+            image = buffer
+
+        with self._new_frame:
+            self._slots[slot] = image
+            self._count += 1
+            self._timestamps[slot] = timestamp
+            self._indices[slot] = self._count
+            self._head = slot
+            self._new_frame.notify_all()
+        return image
+
+    def wait(self, after, timeout=None):
+        """
+        Attend une image de numéro strictement supérieur à `after`, sans la copier.
+
+        :return: Numéro de la dernière image publiée (inchangé si le délai est écoulé).
+        """
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: self._count > after, timeout)
+            return self._count
+
+    def latest(self, acquire=None, after=None, timeout=None, bounds=None):
+        """
+        Copie l'image la plus récente.
+
+        :param acquire: Fonction (shape) -> tampon de destination, sinon un tableau neuf est alloué.
+        :param after: Si fourni, attend une image de numéro strictement supérieur.
+        :param timeout: Attente maximale en secondes pour `after`.
+        :param bounds: Tuple (x0, y0, x1, y1) pour ne copier qu'une région de l'image.
+        :return: Frame ou None si aucune image n'est disponible.
+        """
+        with self._new_frame:
+            if after is not None:
+                self._new_frame.wait_for(lambda: self._count > after, timeout)
+
+            if self._head < 0:
+                return None
+
+            source = self._slots[self._head]
+            if bounds is not None:
+                x0, y0, x1, y1 = bounds
+                source = source[y0:y1, x0:x1]
+            out = acquire(source.shape) if acquire else np.empty_like(source)
+            np.copyto(out, source)
+            return Frame(out, self._timestamps[self._head], self._indices[self._head])
+
+
+class BackgroundCapture(threading.Thread):
+    """Thread producteur qui capture la fenêtre en continu dans un FrameRing"""
+
+    DEFAULT_FPS = 30
+    RING_SIZE = 3
+
+    def __init__(self, capture, fps=DEFAULT_FPS, ring_size=RING_SIZE):
+        """
+        :param capture: Instance de Capture à interroger.
+        :param fps: Cadence maximale de capture (0 pour capturer sans pause).
+        :param ring_size: Nombre d'emplacements de l'anneau.
+        """
+        super().__init__(name="BackgroundCapture", daemon=True)
+        self.capture = capture
+        self.interval = 1.0 / fps if fps else 0.0
+        self.ring = FrameRing(ring_size)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        logger.info("Capture en arrière-plan démarrée")
+
+        while not self._stop_event.is_set():
+            start = perf_counter()
+            try:
+                region = self.capture.grab_coordinates
+                slot, buffer = self.ring.write_slot((region["height"], region["width"], 4))
+                image = self.capture.session.grab(region, out=buffer)
+                timestamp = perf_counter()
+                image = self.ring.publish(slot, image, timestamp)
+
+                recorder = self.capture.recorder
+                if recorder is not None:
+                    recorder.record(image, timestamp, getattr(self.capture, "window", None))
+            except Exception as e:
+                logger.error(f"Erreur lors de la capture en arrière-plan: {e}")
+                self._stop_event.wait(0.5)
+                continue
+
+            remaining = self.interval - (perf_counter() - start)
+            if remaining > 0:
+                sleep(remaining)
+
+        logger.info("Capture en arrière-plan arrêtée")
+
+    def stop(self, timeout=1.0):
+        """Arrête le producteur et attend la fin du thread"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=timeout)
@@ -0,0 +1,142 @@
+"""
+Géométrie de la fenêtre du jeu mise en cache.
+
+Les bornes de la fenêtre et les facteurs d'échelle de l'espace du modèle vers
+l'écran sont gardés en cache et revalidés au plus toutes les `refresh_interval`
+secondes, pour suivre un déplacement ou un redimensionnement de la fenêtre
+sans redémarrer le bot.
+
+Le cache est lu par plusieurs threads (capture en arrière-plan, workers du
+pipeline, predict()) : une seule revalidation à la fois, sous verrou, et l'état
+est publié d'un bloc sous forme d'instantané immuable, qu'un lecteur ne voit
+jamais à moitié mis à jour.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+from time import perf_counter
+
+logger = logging.getLogger("WindowGeometry")
+
+# État publié d'un bloc : fenêtre, échelles de l'espace du modèle vers l'écran, région mss, version
+GeometrySnapshot = namedtuple("GeometrySnapshot", ["window", "scale_x", "scale_y", "grab_coordinates", "version"])
+
+
+class WindowGeometry:
+    """Cache des bornes de la fenêtre et des échelles dérivées"""
+
+    REFRESH_INTERVAL = 0.25
+    MODEL_SIZE = 640
+
+    def __init__(self, provider, refresh_interval=REFRESH_INTERVAL, model_size=MODEL_SIZE):
+        """
+        :param provider: Fonction renvoyant la ScreenInformation courante de la fenêtre.
+        :param refresh_interval: Délai minimal en secondes entre deux interrogations du système.
+        :param model_size: Taille de l'espace carré du modèle (pour les facteurs d'échelle).
+        """
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.model_size = model_size
+
+        self._snapshot = GeometrySnapshot(None, 1.0, 1.0, None, 0)
+        self._checked_at = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        self.refresh()
+
+    @property
+    def window(self):
+        return self._snapshot.window
+
+    @property
+    def scale_x(self):
+        return self._snapshot.scale_x
+
+    @property
+    def scale_y(self):
+        return self._snapshot.scale_y
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def on_change(self, callback):
+        """Enregistre une fonction appelée avec (ScreenInformation, redimensionnée) à chaque changement"""
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        """Force une revalidation à la prochaine lecture"""
+        self._checked_at = 0.0
+
+    def snapshot(self):
+        """Renvoie l'instantané en cache, revalidé s'il est plus vieux que l'intervalle"""
+        if perf_counter() - self._checked_at >= self.refresh_interval:
+            self.refresh(max_age=self.refresh_interval)
+        return self._snapshot
+
+    def current(self):
+        """Renvoie la géométrie en cache, revalidée si elle est plus vieille que l'intervalle"""
+        return self.snapshot().window
+
+    def refresh(self, max_age=None):
+        """
+        Interroge le système et met à jour le cache si la fenêtre a bougé ou changé de taille.
+
+        :param max_age: Ne rien faire si la dernière revalidation a moins de max_age secondes
+                        (un autre thread l'a faite pendant l'attente du verrou).
+        """
+        with self._lock:
+            if max_age is not None and self._checked_at and perf_counter() - self._checked_at < max_age:
+                return self._snapshot.window
+            self._checked_at = perf_counter()
+
+            try:
+                window = self.provider()
+            except Exception as e:
+                logger.error(f"Erreur lors de la lecture de la géométrie de la fenêtre: {e}")
+                return self._snapshot.window
+
+            previous = self._snapshot
+            if window is None or self._same(previous.window, window):
+                return previous.window
+
+            resized = previous.window is not None and \
+                (window.width, window.height) != (previous.window.width, previous.window.height)
+
+            grab_coordinates = {
+                "top": window.top,
+                "left": window.left,
+                "width": window.width,
+                "height": window.height
+            }
+            version = previous.version + 1
+            self._snapshot = GeometrySnapshot(window, window.width / self.model_size, window.height / self.model_size,
+                                              grab_coordinates, version)
+
+        if version > 1:
+            logger.info(f"Fenêtre {'redimensionnée' if resized else 'déplacée'}: {window}")
+
+        for callback in self._listeners:
+            callback(window, resized)
+
+        return window
+
+    @staticmethod
+    def _same(current, window):
+        return current is not None and (current.top, current.left, current.width, current.height) == \
+            (window.top, window.left, window.width, window.height)
+
+    def grab_coordinates(self):
+        """Région mss de la fenêtre, à jour"""
+        return self.snapshot().grab_coordinates
+
+    def to_screen(self, x, y):
+        """
+        Convertit un point de l'espace du modèle en coordonnées d'écran.
+
+        :return: Tuple (x, y) à l'écran.
+        """
+        snapshot = self.snapshot()
+        return x * snapshot.scale_x + snapshot.window.left, y * snapshot.scale_y + snapshot.window.top
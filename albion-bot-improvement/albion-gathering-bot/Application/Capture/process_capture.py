@@ -19,13 +19,8 @@ class ProcessCapture(Capture):
         
         # Si un handle de fenêtre est trouvé, récupérer ses informations
         if self.hwnd:
-            self.window = self.get_window_information()
-            self.grab_coordinates = {
-                "top": self.window.top,
-                "left": self.window.left,
-                "width": self.window.width,
-                "height": self.window.height
-            }
+            # Bornes de la fenêtre en cache, revalidées pour suivre ses déplacements
+            self.track_window()
         else:
             # Utiliser les coordonnées par défaut si aucune fenêtre n'est trouvée
             self.window = ScreenInformation(0, 0, 1920, 1080)
@@ -0,0 +1,245 @@
+"""
+Enregistrement de sessions de capture.
+
+Chaque image capturée est copiée telle quelle (BGRA) dans un tampon libre : le
+thread de capture ne fait qu'une copie mémoire. Un thread dédié réduit l'image
+si une échelle est demandée, la convertit en BGR, la compresse et l'écrit sur
+disque avec son horodatage et la géométrie de la fenêtre.
+
+Format d'une session (version 2) :
+    session.json         manifeste (version, codec, horodatages et géométries par groupe d'images)
+    frame_000000.jpg     une image compressée par fichier
+    frame_000001.jpg     ...
+
+Les images sont stockées une par fichier ; le manifeste les décrit par groupes
+de chunk_size images et est réécrit à chaque groupe fermé, pour qu'une session
+interrompue reste lisible. Les sessions de la version 1 (morceaux .npy non
+compressés) restent lisibles par le rejeu (voir replay.SessionSource).
+
+Par défaut les images sont enregistrées en pleine résolution mais en JPEG, donc
+avec perte : la géométrie correspond à la fenêtre (les fenêtres d'attention en
+pixels de la fenêtre restent valables au rejeu), mais les pixels diffèrent
+légèrement de la capture en direct. Le codec "png" donne un enregistrement sans
+perte. Une échelle inférieure à 1 allège l'enregistrement, mais le rejeu est
+alors agrandi vers l'entrée du modèle et ne reflète plus l'entrée réelle.
+
+Coût indicatif pour une fenêtre 1920x1080 à 30 images/s (une image brute pèse
+environ 6 Mo, soit près de 180 Mo/s sans compression) :
+    scale 1.0, jpg (défaut)  ~420 Ko par image, ~13 Mo/s, ~30 ms d'encodage
+    scale 0.5, jpg           ~120 Ko par image, ~4 Mo/s, ~8 ms d'encodage
+    scale 1.0, png           ~3,8 Mo par image (sans perte), ~130 ms d'encodage
+L'encodage se fait sur le thread d'écriture : s'il ne suit pas la cadence (JPEG
+pleine résolution sur un processeur lent, PNG), la file se remplit et les
+images suivantes sont ignorées (frames_dropped) sans ralentir la capture.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from Application.lazy import lazy_import
+
+cv = lazy_import("cv2")
+
+logger = logging.getLogger("SessionRecorder")
+
+MANIFEST_NAME = "session.json"
+FORMAT_VERSION = 2
+
+# Codec -> (extension, paramètres d'encodage OpenCV selon la qualité)
+CODECS = {
+    "jpg": (".jpg", lambda quality: [cv.IMWRITE_JPEG_QUALITY, quality]),
+    "png": (".png", lambda quality: [cv.IMWRITE_PNG_COMPRESSION, 1]),
+}
+
+
+def frame_name(index, codec):
+    """Nom du fichier de l'image `index` d'une session de la version 2"""
+    return f"frame_{index:06d}{CODECS[codec][0]}"
+
+
+class SessionRecorder:
+    """Enregistreur d'images à thread d'écriture séparé"""
+
+    CHUNK_SIZE = 64
+    QUEUE_SIZE = 8
+    SCALE = 1.0
+    CODEC = "jpg"
+    QUALITY = 90
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE, scale=SCALE, codec=CODEC,
+                 quality=QUALITY):
+        """
+        :param path: Dossier de la session (créé si nécessaire).
+        :param chunk_size: Nombre d'images par groupe du manifeste.
+        :param queue_size: Nombre d'images en attente d'écriture ; au-delà les
+                           images sont ignorées plutôt que de bloquer la capture.
+        :param scale: Facteur de réduction appliqué aux images enregistrées (1.0 = résolution de la fenêtre).
+        :param codec: "jpg" (compact, avec perte) ou "png" (sans perte, bien plus lourd et lent).
+        :param quality: Qualité JPEG (0-100).
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Codec d'enregistrement inconnu '{codec}' (attendu: {', '.join(CODECS)})")
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self.scale = scale
+        self.codec = codec
+        self.quality = quality
+
+        self._queue = queue.Queue()
+        self._free = deque()
+        self._queue_size = queue_size
+        self._thread = None
+
+        # Tampons du thread d'écriture
+        self._scaled = None
+        self._bgr = None
+
+        self._chunks = []
+        self._chunk_meta = None
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self._first_timestamp = None
+
+    def start(self):
+        """Crée le dossier de session et démarre le thread d'écriture"""
+        os.makedirs(self.path, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer_loop, name="SessionRecorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Enregistrement de la session dans '{self.path}' ({self.codec}, échelle {self.scale})")
+
+    def record(self, image, timestamp, window):
+        """
+        Met une image en file d'écriture sans jamais bloquer l'appelant.
+
+        Seule une copie mémoire est faite ici : réduction, conversion et
+        compression ont lieu sur le thread d'écriture.
+
+        :param image: Image BGRA capturée (copiée, l'appelant peut réutiliser son tampon).
+        :param timestamp: Horodatage de capture (perf_counter).
+        :param window: ScreenInformation de la fenêtre au moment de la capture.
+        """
+        if image is None or self._thread is None:
+            return
+
+        buffer = self._acquire(image.shape)
+        if buffer is None:
+            self.frames_dropped += 1
+            return
+
+        np.copyto(buffer, image)
+
+        geometry = (window.left, window.top, window.width, window.height) if window else None
+        self._queue.put((buffer, timestamp, geometry))
+
+    def _acquire(self, shape):
+        """Prend un tampon libre de la bonne forme, en alloue un si la file n'est pas pleine"""
+        while self._free:
+            try:
+                buffer = self._free.popleft()
+            except IndexError:
+                break
+            if buffer.shape == shape:
+                return buffer
+
+        if self._queue.qsize() >= self._queue_size:
+            return None
+        return np.empty(shape, dtype=np.uint8)
+
+    def stop(self):
+        """Vide la file, ferme le dernier morceau et écrit le manifeste"""
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        logger.info(f"Session enregistrée: {self.frames_written} images "
+                    f"({self.bytes_written / 1e6:.1f} Mo), {self.frames_dropped} ignorées")
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            buffer, timestamp, geometry = item
+            try:
+                self._write(self._prepare(buffer), timestamp, geometry)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture d'une image: {e}")
+            finally:
+                self._free.append(buffer)
+
+        self._close_chunk()
+
+    def _prepare(self, image):
+        """Réduit l'image BGRA et la convertit en BGR dans les tampons du thread d'écriture"""
+        if self.scale != 1.0:
+            height, width = image.shape[:2]
+            size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+            self._scaled = cv.resize(image, size, dst=self._scaled, interpolation=cv.INTER_AREA)
+            image = self._scaled
+
+        if image.shape[2] == 3:
+            return image
+        self._bgr = cv.cvtColor(image, cv.COLOR_BGRA2BGR, dst=self._bgr)
+        return self._bgr
+
+    def _write(self, image, timestamp, geometry):
+        shape = list(image.shape)
+        if self._chunk_meta is None or self._chunk_meta["shape"] != shape or \
+                self._chunk_meta["frames"] >= self.chunk_size:
+            self._close_chunk()
+            self._chunk_meta = {"first": self.frames_written, "shape": shape, "frames": 0,
+                                "timestamps": [], "windows": []}
+
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+
+        extension, parameters = CODECS[self.codec]
+        ok, encoded = cv.imencode(extension, image, parameters(self.quality))
+        if not ok:
+            raise RuntimeError(f"Échec de l'encodage {self.codec}")
+        with open(os.path.join(self.path, frame_name(self.frames_written, self.codec)), "wb") as f:
+            f.write(encoded.data)
+
+        self._chunk_meta["frames"] += 1
+        self._chunk_meta["timestamps"].append(round(timestamp - self._first_timestamp, 6))
+        self._chunk_meta["windows"].append(geometry)
+        self.frames_written += 1
+        self.bytes_written += encoded.nbytes
+
+    def _close_chunk(self):
+        if self._chunk_meta is None:
+            return
+
+        self._chunks.append(self._chunk_meta)
+        self._chunk_meta = None
+
+        # Manifeste réécrit à chaque morceau : une session interrompue reste lisible
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "version": FORMAT_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "codec": self.codec,
+            "chunk_size": self.chunk_size,
+            "frames": sum(chunk["frames"] for chunk in self._chunks),
+            "chunks": self._chunks,
+        }
+        temporary = os.path.join(self.path, MANIFEST_NAME + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temporary, os.path.join(self.path, MANIFEST_NAME))
@@ -0,0 +1,60 @@
+"""
+Régions d'intérêt de la fenêtre du jeu.
+
+Une région est décrite dans un espace de référence (par défaut l'espace 640x640
+utilisé par le modèle) et convertie à chaque capture vers la géométrie courante
+de la fenêtre, pour être capturée à la résolution native.
+"""
+
+
+class ScreenRegion:
+    """Rectangle exprimé dans un espace de référence indépendant de la taille de la fenêtre"""
+
+    def __init__(self, left, top, width, height, reference=(640, 640)):
+        """
+        :param left: Abscisse du coin supérieur gauche dans l'espace de référence.
+        :param top: Ordonnée du coin supérieur gauche dans l'espace de référence.
+        :param width: Largeur dans l'espace de référence.
+        :param height: Hauteur dans l'espace de référence.
+        :param reference: Taille (largeur, hauteur) de l'espace de référence.
+        """
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.reference = reference
+
+    def bounds(self, width, height):
+        """
+        Convertit la région en pixels pour une fenêtre de la taille donnée.
+
+        :return: Tuple (x0, y0, x1, y1) relatif au coin de la fenêtre, borné à celle-ci.
+        """
+        scale_x = width / self.reference[0]
+        scale_y = height / self.reference[1]
+
+        x0 = min(max(int(round(self.left * scale_x)), 0), width - 1)
+        y0 = min(max(int(round(self.top * scale_y)), 0), height - 1)
+        x1 = min(max(int(round((self.left + self.width) * scale_x)), x0 + 1), width)
+        y1 = min(max(int(round((self.top + self.height) * scale_y)), y0 + 1), height)
+
+        return x0, y0, x1, y1
+
+    def resolve(self, window):
+        """
+        Convertit la région en coordonnées d'écran absolues pour mss.
+
+        :param window: ScreenInformation de la fenêtre.
+        :return: Dictionnaire (top, left, width, height).
+        """
+        x0, y0, x1, y1 = self.bounds(window.width, window.height)
+        return {
+            "top": window.top + y0,
+            "left": window.left + x0,
+            "width": x1 - x0,
+            "height": y1 - y0
+        }
+
+    def __str__(self):
+        return (f"Region ({self.left}x, {self.top}y, {self.width}w, {self.height}h) "
+                f"in {self.reference[0]}x{self.reference[1]} space")
@@ -0,0 +1,281 @@
+"""
+Capture de rejeu.
+
+Sert des images depuis un dossier d'images, un fichier vidéo, une session
+enregistrée par SessionRecorder ou un tableau .npy (mappés en mémoire) à la
+place de la fenêtre du jeu, pour exécuter et profiler la détection hors ligne
+sur n'importe quel système.
+"""
+
+import json
+import logging
+import os
+from time import perf_counter
+
+import numpy as np
+
+from Application.lazy import lazy_import
+
+cv = lazy_import("cv2")
+
+from . import Capture, Frame, ScreenInformation
+from .recorder import MANIFEST_NAME, frame_name
+
+logger = logging.getLogger("ReplayCapture")
+
+
+class ImageDirectorySource:
+    """Images d'un dossier, lues dans l'ordre alphabétique"""
+
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, path, fps):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(self.EXTENSIONS)
+        )
+        if not self.paths:
+            raise FileNotFoundError(f"Aucune image trouvée dans '{path}'")
+
+        self.fps = fps
+        self.timestamps = np.arange(len(self.paths)) / fps
+        first = cv.imread(self.paths[0], cv.IMREAD_UNCHANGED)
+        self.shape = first.shape[:2]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def read(self, index):
+        return cv.imread(self.paths[index], cv.IMREAD_UNCHANGED)
+
+
+class VideoSource:
+    """Fichier vidéo lu séquentiellement, avec saut d'images pour le mode temps réel"""
+
+    def __init__(self, path, fps=None):
+        self.video = cv.VideoCapture(path)
+        if not self.video.isOpened():
+            raise FileNotFoundError(f"Impossible d'ouvrir la vidéo '{path}'")
+
+        self.fps = fps or self.video.get(cv.CAP_PROP_FPS) or 30.0
+        count = int(self.video.get(cv.CAP_PROP_FRAME_COUNT))
+        self.timestamps = np.arange(count) / self.fps
+        self.shape = (int(self.video.get(cv.CAP_PROP_FRAME_HEIGHT)), int(self.video.get(cv.CAP_PROP_FRAME_WIDTH)))
+        self._position = 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def read(self, index):
+        if index < self._position:
+            self.video.set(cv.CAP_PROP_POS_FRAMES, index)
+            self._position = index
+
+        # grab() décode sans convertir : les images sautées ne coûtent presque rien
+        while self._position < index:
+            self.video.grab()
+            self._position += 1
+
+        ok, image = self.video.read()
+        self._position += 1
+        return image if ok else None
+
+
+class ArraySource:
+    """Session enregistrée sous forme de tableau (N, H, W, C) mappé en mémoire"""
+
+    def __init__(self, path, fps):
+        self.frames = np.load(path, mmap_mode="r")
+        if self.frames.ndim != 4:
+            raise ValueError(f"Tableau de forme (N, H, W, C) attendu dans '{path}', reçu {self.frames.shape}")
+
+        self.fps = fps
+        self.timestamps = np.arange(len(self.frames)) / fps
+        self.shape = self.frames.shape[1:3]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def read(self, index):
+        return self.frames[index]
+
+
+class SessionSource:
+    """
+    Session enregistrée par SessionRecorder : une image compressée par fichier
+    (version 2) ou morceaux .npy mappés en mémoire (version 1)
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+
+        chunks = [chunk for chunk in manifest["chunks"] if chunk["frames"] > 0]
+        if not chunks:
+            raise ValueError(f"La session '{path}' ne contient aucune image")
+
+        self.path = path
+        self.version = manifest.get("version", 1)
+        if self.version >= 2:
+            self.codec = manifest["codec"]
+            self.chunks = None
+        else:
+            self.chunks = [np.load(os.path.join(path, chunk["file"]), mmap_mode="r") for chunk in chunks]
+        self._first = [chunk.get("first", 0) for chunk in chunks]
+        self.timestamps = np.concatenate([np.asarray(chunk["timestamps"], dtype=float) for chunk in chunks])
+        self.windows = [window for chunk in chunks for window in chunk["windows"]]
+
+        # Index global -> (morceau, position dans le morceau)
+        self._chunk_of = np.repeat(np.arange(len(chunks)), [chunk["frames"] for chunk in chunks])
+        self._offsets = np.concatenate([[0], np.cumsum([chunk["frames"] for chunk in chunks])[:-1]])
+
+        self.fps = len(self.timestamps) / max(self.timestamps[-1] - self.timestamps[0], 1e-6)
+        self.shape = tuple(chunks[0]["shape"][:2])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def read(self, index):
+        chunk = self._chunk_of[index]
+        position = index - self._offsets[chunk]
+        if self.chunks is None:
+            return cv.imread(os.path.join(self.path, frame_name(self._first[chunk] + position, self.codec)),
+                             cv.IMREAD_UNCHANGED)
+        return self.chunks[chunk][position]
+
+
+class ReplayCapture(Capture):
+    """Capture qui rejoue des images enregistrées au lieu de capturer l'écran"""
+
+    DEFAULT_FPS = 30.0
+
+    def __init__(self, source, speed=0.0, loop=False, fps=DEFAULT_FPS):
+        """
+        :param source: Dossier d'images, session enregistrée, fichier vidéo ou fichier .npy.
+        :param speed: Vitesse de rejeu (1.0 = temps réel) ; 0 sert chaque image
+                      une seule fois, aussi vite que le consommateur les demande.
+        :param loop: Recommence au début à la fin du flux.
+        :param fps: Cadence des images pour les sources sans horodatage.
+        """
+        self.source = self._open_source(source, fps)
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+
+        super().__init__(window_name=str(source))
+
+        height, width = self.source.shape
+        self._set_window(width, height)
+
+        self._next_index = 0
+        self._started_at = None
+        self._current = None
+
+        logger.info(f"Rejeu de {len(self.source)} images depuis '{source}' ({width}x{height}, vitesse {speed or 'max'})")
+
+    @staticmethod
+    def _open_source(source, fps):
+        if os.path.isdir(source) and os.path.exists(os.path.join(source, MANIFEST_NAME)):
+            return SessionSource(source)
+        if os.path.isdir(source):
+            return ImageDirectorySource(source, fps)
+        if source.lower().endswith(".npy"):
+            return ArraySource(source, fps)
+        return VideoSource(source)
+
+    def _get_screen_information(self) -> ScreenInformation:
+        # Pas d'écran réel : l'« écran » est la taille des images rejouées
+        height, width = self.source.shape
+        return ScreenInformation.from_client_area(top=0, left=0, width=width, height=height)
+
+    def get_window_information(self) -> ScreenInformation:
+        return self.window
+
+    def _set_window(self, width, height):
+        self.window = ScreenInformation.from_client_area(top=0, left=0, width=width, height=height)
+        self.grab_coordinates = {
+            "top": self.window.top,
+            "left": self.window.left,
+            "width": self.window.width,
+            "height": self.window.height
+        }
+
+    def _next_frame_index(self):
+        """Choisit l'image à servir selon la vitesse de rejeu"""
+        if self.speed <= 0:
+            index = self._next_index
+        else:
+            now = perf_counter()
+            if self._started_at is None:
+                self._started_at = now
+            elapsed = (now - self._started_at) * self.speed + self.source.timestamps[0]
+            if elapsed >= self.source.timestamps[-1] + 1.0 / self.source.fps:
+                # La dernière image a été affichée pendant une période : fin du flux
+                index = len(self.source)
+            else:
+                # Jamais de retour en arrière : l'image courante est resservie si le
+                # consommateur est plus rapide que la source
+                index = max(int(np.searchsorted(self.source.timestamps, elapsed, side="right")) - 1,
+                            self._next_index - 1)
+
+        if index >= len(self.source):
+            if not self.loop:
+                return None
+            # Le flux reprend au début, et son horloge avec lui
+            index = 0
+            self._started_at = perf_counter() if self.speed > 0 else None
+
+        self._next_index = index + 1
+        return index
+
+    def latest_frame(self) -> Frame:
+        """
+        Renvoie l'image suivante du flux (ou l'image courante en mode temps réel).
+
+        L'horodatage est celui de l'image dans le flux, en secondes depuis son début.
+        À la fin du flux sans boucle, l'image vaut None et `finished` passe à True.
+        """
+        index = self._next_frame_index()
+        if index is None:
+            self.finished = True
+            self._current = None
+            return Frame(None, float(self.source.timestamps[-1]), len(self.source) - 1)
+
+        image = self.source.read(index)
+        if image is None:
+            self.finished = True
+            self._current = None
+            return Frame(None, float(self.source.timestamps[-1]), index)
+
+        height, width = image.shape[:2]
+        if (width, height) != (self.window.width, self.window.height):
+            # La fenêtre enregistrée a changé de taille
+            self._set_window(width, height)
+
+        out = self.session.pool.acquire((height, width, 4))
+        if image.ndim == 2:
+            cv.cvtColor(image, cv.COLOR_GRAY2BGRA, dst=out)
+        elif image.shape[2] == 3:
+            cv.cvtColor(image, cv.COLOR_BGR2BGRA, dst=out)
+        else:
+            np.copyto(out, image)
+
+        self._current = out
+        return Frame(out, float(self.source.timestamps[index]), index)
+
+    def grab_region(self, name):
+        """Découpe une région enregistrée dans l'image courante du rejeu"""
+        if self._current is None:
+            return None
+
+        region = self.regions[name]
+        x0, y0, x1, y1 = region.bounds(self.window.width, self.window.height)
+        # Copie appartenant à l'appelant, comme Capture.grab_region()
+        return self._current[y0:y1, x0:x1].copy()
+
+    def start_background_capture(self, fps=None):
+        # Le rejeu n'a pas de latence de capture à masquer
+        logger.info("Capture en arrière-plan ignorée pour le rejeu")
+
+    def __get_window_id(self):
+        return 0
@@ -0,0 +1,98 @@
+"""
+Session de capture persistante.
+
+Une session garde un grabber mss ouvert et écrit chaque image dans un pool de
+tampons NumPy préalloués, au lieu d'ouvrir un contexte mss et d'allouer un
+nouveau tableau à chaque capture.
+"""
+
+import threading
+
+import numpy as np
+from mss import mss
+
+
+class FramePool:
+    """Pool circulaire de tampons d'image réutilisables, un anneau par forme d'image"""
+
+    def __init__(self, size=3):
+        """
+        :param size: Nombre de tampons par forme. Une image rendue par acquire()
+                     reste valide pendant les size - 1 appels suivants de même forme.
+        """
+        self.size = max(1, size)
+        self._rings = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Renvoie le prochain tampon de la forme demandée, alloué seulement au premier usage"""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = [[np.empty(key[0], dtype=dtype) for _ in range(self.size)], 0]
+                self._rings[key] = ring
+                self.allocations += self.size
+
+            buffers, index = ring
+            ring[1] = (index + 1) % self.size
+            return buffers[index]
+
+    def clear(self):
+        """Libère tous les tampons (par exemple après un redimensionnement de la fenêtre)"""
+        with self._lock:
+            self._rings = {}
+
+
+class CaptureSession:
+    """Grabber mss longue durée écrivant dans un pool de tampons préalloués"""
+
+    POOL_SIZE = 3
+
+    def __init__(self, pool_size=POOL_SIZE):
+        self.pool = FramePool(pool_size)
+        # mss conserve des handles liés au thread qui l'a créé (GDI sous Windows,
+        # connexion X sous Linux) : un grabber est donc ouvert par thread.
+        self._local = threading.local()
+        self._grabbers = []
+        self._lock = threading.Lock()
+
+    def _grabber(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss()
+            self._local.sct = sct
+            with self._lock:
+                self._grabbers.append(sct)
+        return sct
+
+    def grab(self, region, out=None):
+        """
+        Capture une région de l'écran au format BGRA.
+
+        :param region: Dictionnaire mss (top, left, width, height).
+        :param out: Tampon de destination optionnel, sinon un tampon du pool est utilisé.
+        :return: Tableau (height, width, 4) en uint8.
+        """
+        shot = self._grabber().grab(region)
+        raw = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+        if out is None or out.shape != raw.shape:
+            out = self.pool.acquire(raw.shape)
+
+        np.copyto(out, raw)
+        return out
+
+    def close(self):
+        """Ferme tous les grabbers ouverts par la session"""
+        with self._lock:
+            grabbers, self._grabbers = self._grabbers, []
+
+        for sct in grabbers:
+            try:
+                sct.close()
+            except Exception:
+                pass
+
+        self._local = threading.local()
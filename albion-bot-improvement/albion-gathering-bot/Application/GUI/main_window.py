@@ -15,9 +15,11 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QTextCursor
 
-from Application.Albion.detection import AlbionDetection
-from Application.Interaction.interaction import Interaction
-from Application.AntiDetection import get_anti_detection_manager
+# Modules légers seulement : la détection (torch, OpenCV) et l'interaction sont
+# importées au démarrage de la récolte ou du test, la fenêtre s'ouvre donc immédiatement
+from Application.Albion.metrics import PipelineMetrics
+from Application.Albion.backends import BACKENDS
+from Application.Albion.attention import AttentionWindows
 
 # Configuration du logging pour l'interface graphique
 logger = logging.getLogger("GUI")
@@ -54,10 +56,17 @@ class GatheringThread(QThread):
         self.anti_detection = None
         self.model = None
         self.interaction = None
+        self.runtime = None
+        self.game_active = True
 
     def run(self):
         """Méthode principale du thread de récolte"""
         try:
+            from Application.AntiDetection import get_anti_detection_manager
+            from Application.Albion.detection import AlbionDetection
+            from Application.Interaction.interaction import Interaction
+            from Application.Interaction.runtime import GatheringRuntime
+
             # Initialiser le système anti-détection
             self.anti_detection = get_anti_detection_manager()
             self.configure_anti_detection()
@@ -68,7 +77,17 @@ class GatheringThread(QThread):
                 model_name=self.config.get("model_path", "best.pt"),
                 debug=self.config.get("debug_mode", False),
                 confidence=self.config.get("confidence", 0.7),
-                window_name=self.config.get("window_name", "Albion Online Client")
+                window_name=self.config.get("window_name", "Albion Online Client"),
+                background_capture=self.config.get("background_capture", False),
+                cache_max_age=self.config.get("cache_max_age", 0.0),
+                backend=self.config.get("backend", "torch"),
+                track_interval=self.config.get("track_interval", 1),
+                attention=self.config.get("attention") or None,
+                attention_tiles=self.config.get("attention_tiles", False),
+                calibration=self.config.get("calibration_path") or None,
+                latency_budget=self.config.get("latency_budget") or None,
+                variants=self.config.get("variants") or None,
+                accuracy_floor=self.config.get("accuracy_floor", 0.8)
             )
 
             self.update_signal.emit("Initialisation du système d'interaction...")
@@ -76,47 +95,24 @@ class GatheringThread(QThread):
 
             self.update_signal.emit("Démarrage de la récolte...")
 
-            max_resources = self.config.get("max_resources", 100)
-            max_time_minutes = self.config.get("max_time", 60)
-            start_time = time.time()
-            max_time_seconds = max_time_minutes * 60
-
-            # Petite pause avant de commencer
-            time.sleep(3)
-
-            # Boucle principale de récolte
-            while (self.running and
-                   self.resources_gathered < max_resources and
-                   time.time() - start_time < max_time_seconds):
-
-                # Vérifier si la fenêtre du jeu est active
-                if not self.anti_detection.is_game_window_active():
-                    self.update_signal.emit("Fenêtre du jeu non active. Pause...")
-                    time.sleep(2.0)
-                    continue
-
-                # Rechercher et récolter une ressource
-                result = self.interaction.find_and_gather_nearest_resource()
-
-                if result:
-                    self.resources_gathered = self.interaction.resources_gathered
-                    progress = int((self.resources_gathered / max_resources) * 100)
-                    self.progress_signal.emit(progress)
-
-                    elapsed_minutes = (time.time() - start_time) / 60
-                    self.update_signal.emit(
-                        f"Ressources récoltées: {self.resources_gathered}/{max_resources} "
-                        f"({elapsed_minutes:.1f}/{max_time_minutes} minutes)"
-                    )
-
-                # Pause entre les actions
-                time.sleep(self.anti_detection.randomize_delay(1.0))
+            # Session asyncio : actions, surveillance et état en tâches
+            # coopératives, que le bouton Arrêter annule immédiatement (voir stop())
+            self.runtime = GatheringRuntime(
+                self.interaction,
+                max_resources=self.config.get("max_resources", 100),
+                max_time_minutes=self.config.get("max_time", 60),
+                on_status=self.report_status,
+                detection=self.config.get("async_inference", False),
+                start_delay=3.0  # Petite pause avant de commencer
+            )
+            if not self.running:
+                self.runtime.stop()
+            status = self.runtime.run()
 
-            # Fin de la boucle
-            elapsed_minutes = (time.time() - start_time) / 60
+            # Fin de la session
             self.update_signal.emit(
-                f"Session terminée! {self.resources_gathered} ressources récoltées "
-                f"en {elapsed_minutes:.1f} minutes"
+                f"Session terminée! {status['resources']} ressources récoltées "
+                f"en {status['elapsed_minutes']:.1f} minutes"
             )
             self.finished_signal.emit()
 
@@ -127,6 +123,8 @@ class GatheringThread(QThread):
             # Nettoyer les ressources
             if self.anti_detection:
                 self.anti_detection.stop_monitoring()
+            if self.model:
+                self.model.close()
 
     def configure_anti_detection(self):
         """Configure le système anti-détection selon les paramètres"""
@@ -144,11 +142,30 @@ class GatheringThread(QThread):
         self.anti_detection.start_monitoring()
         self.update_signal.emit("Système anti-détection configuré et actif")
 
+    def report_status(self, status):
+        """Publie l'état de la session (appelé par la tâche de télémétrie du runtime)"""
+        if status["active"] != self.game_active:
+            self.game_active = status["active"]
+            self.update_signal.emit("Reprise de la récolte" if self.game_active else "Fenêtre du jeu non active. Pause...")
+
+        if status["resources"] == self.resources_gathered:
+            return
+        self.resources_gathered = status["resources"]
+        self.progress_signal.emit(int((self.resources_gathered / status["max_resources"]) * 100))
+        self.update_signal.emit(
+            f"Ressources récoltées: {self.resources_gathered}/{status['max_resources']} "
+            f"({status['elapsed_minutes']:.1f}/{status['max_time_minutes']} minutes)"
+        )
+
     def stop(self):
         """Arrête le thread proprement"""
         self.running = False
         self.update_signal.emit("Arrêt en cours... Veuillez patienter.")
 
+        # Annule l'attente en cours de la session au lieu d'attendre la fin du cycle
+        if self.runtime:
+            self.runtime.stop()
+
         # Attendre que le thread se termine correctement
         self.wait(5000)  # Attendre max 5 secondes
 
@@ -177,7 +194,18 @@ class AlbionBotGUI(QMainWindow):
             "model_path": "best.pt",
             "safe_mode": True,
             "disable_anti_detection": False,
-            "debug_mode": False
+            "debug_mode": False,
+            "background_capture": False,
+            "cache_max_age": 0.0,
+            "async_inference": False,
+            "backend": "torch",
+            "track_interval": 1,
+            "attention": [],
+            "attention_tiles": False,
+            "calibration_path": "",
+            "latency_budget": 0,
+            "variants": [],
+            "accuracy_floor": 0.8
         }
 
         # Configurer l'interface utilisateur
@@ -275,6 +303,21 @@ class AlbionBotGUI(QMainWindow):
 
         layout.addWidget(status_group)
 
+        # Latences par étape du pipeline de détection (p50/p95/p99)
+        performance_group = QGroupBox("Performance (ms, p50 / p95 / p99)")
+        performance_layout = QFormLayout(performance_group)
+
+        self.latency_labels = {}
+        for stage in PipelineMetrics.STAGES:
+            label = QLabel("-")
+            self.latency_labels[stage] = label
+            performance_layout.addRow(f"{stage}:", label)
+
+        self.input_size_label = QLabel("-")
+        performance_layout.addRow("Taille d'entrée:", self.input_size_label)
+
+        layout.addWidget(performance_group)
+
         # Barre de progression
         progress_group = QGroupBox("Progression")
         progress_layout = QVBoxLayout(progress_group)
@@ -346,6 +389,65 @@ class AlbionBotGUI(QMainWindow):
         self.window_name_edit.setText(self.config["window_name"])
         detection_layout.addRow("Nom de la fenêtre:", self.window_name_edit)
 
+        self.background_capture_checkbox = QCheckBox()
+        self.background_capture_checkbox.setChecked(self.config["background_capture"])
+        detection_layout.addRow("Capture en arrière-plan:", self.background_capture_checkbox)
+
+        self.cache_max_age_spinbox = QDoubleSpinBox()
+        self.cache_max_age_spinbox.setRange(0.0, 5.0)
+        self.cache_max_age_spinbox.setSingleStep(0.1)
+        self.cache_max_age_spinbox.setValue(self.config["cache_max_age"])
+        detection_layout.addRow("Cache des détections (s):", self.cache_max_age_spinbox)
+
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(BACKENDS)
+        self.backend_combo.setCurrentText(self.config["backend"])
+        detection_layout.addRow("Moteur d'inférence:", self.backend_combo)
+
+        self.calibration_path_edit = QTextEdit()
+        self.calibration_path_edit.setFixedHeight(30)
+        self.calibration_path_edit.setPlaceholderText("Session enregistrée (calibration du modèle INT8)")
+        self.calibration_path_edit.setText(self.config["calibration_path"])
+        detection_layout.addRow("Calibration INT8:", self.calibration_path_edit)
+
+        self.variants_edit = QTextEdit()
+        self.variants_edit.setFixedHeight(30)
+        self.variants_edit.setPlaceholderText("Poids candidats, le plus rapide est retenu (ex: yolov5n.pt yolov5s.pt)")
+        self.variants_edit.setText(" ".join(self.config["variants"]))
+        detection_layout.addRow("Variantes du modèle:", self.variants_edit)
+
+        self.accuracy_floor_spinbox = QDoubleSpinBox()
+        self.accuracy_floor_spinbox.setRange(0.0, 1.0)
+        self.accuracy_floor_spinbox.setSingleStep(0.05)
+        self.accuracy_floor_spinbox.setValue(self.config["accuracy_floor"])
+        detection_layout.addRow("F1 minimal des variantes:", self.accuracy_floor_spinbox)
+
+        self.async_inference_checkbox = QCheckBox()
+        self.async_inference_checkbox.setChecked(self.config["async_inference"])
+        detection_layout.addRow("Inférence asynchrone:", self.async_inference_checkbox)
+
+        self.track_interval_spinbox = QSpinBox()
+        self.track_interval_spinbox.setRange(1, 30)
+        self.track_interval_spinbox.setValue(self.config["track_interval"])
+        detection_layout.addRow("Inférence toutes les N images:", self.track_interval_spinbox)
+
+        self.latency_budget_spinbox = QSpinBox()
+        self.latency_budget_spinbox.setRange(0, 1000)
+        self.latency_budget_spinbox.setSpecialValueText("Désactivé")
+        self.latency_budget_spinbox.setSuffix(" ms")
+        self.latency_budget_spinbox.setValue(self.config["latency_budget"])
+        detection_layout.addRow("Budget de latence:", self.latency_budget_spinbox)
+
+        self.attention_edit = QTextEdit()
+        self.attention_edit.setFixedHeight(30)
+        self.attention_edit.setPlaceholderText("Fenêtre entière (ex: 1280x720 640x640)")
+        self.attention_edit.setText(" ".join(self.config["attention"]))
+        detection_layout.addRow("Fenêtres d'attention:", self.attention_edit)
+
+        self.attention_tiles_checkbox = QCheckBox()
+        self.attention_tiles_checkbox.setChecked(self.config["attention_tiles"])
+        detection_layout.addRow("Tuiles à résolution native:", self.attention_tiles_checkbox)
+
         layout.addWidget(detection_group)
 
         # Groupe des paramètres de récolte
@@ -466,6 +568,20 @@ class AlbionBotGUI(QMainWindow):
             self.config["safe_mode"] = self.safe_mode_checkbox.isChecked()
             self.config["disable_anti_detection"] = self.disable_anti_detection_checkbox.isChecked()
             self.config["debug_mode"] = self.debug_mode_checkbox.isChecked()
+            self.config["background_capture"] = self.background_capture_checkbox.isChecked()
+            self.config["cache_max_age"] = self.cache_max_age_spinbox.value()
+            self.config["async_inference"] = self.async_inference_checkbox.isChecked()
+            self.config["backend"] = self.backend_combo.currentText()
+            self.config["calibration_path"] = self.calibration_path_edit.toPlainText().strip()
+            self.config["variants"] = self.variants_edit.toPlainText().split()
+            self.config["accuracy_floor"] = self.accuracy_floor_spinbox.value()
+            self.config["track_interval"] = self.track_interval_spinbox.value()
+            self.config["latency_budget"] = self.latency_budget_spinbox.value()
+            # Validation du format LARGEURxHAUTEUR avant enregistrement
+            attention = self.attention_edit.toPlainText().split()
+            AttentionWindows.parse(attention)
+            self.config["attention"] = attention
+            self.config["attention_tiles"] = self.attention_tiles_checkbox.isChecked()
 
             QMessageBox.information(self, "Succès", "Configuration sauvegardée avec succès!")
             logger.info("Configuration sauvegardée: %s", str(self.config))
@@ -479,6 +595,7 @@ class AlbionBotGUI(QMainWindow):
             return
 
         # Vérifier si le jeu est ouvert
+        from Application.AntiDetection import get_anti_detection_manager
         anti_detection = get_anti_detection_manager()
         if not anti_detection.is_game_window_active():
             QMessageBox.warning(
@@ -570,6 +687,9 @@ class AlbionBotGUI(QMainWindow):
             # Sauvegarder la configuration
             self.save_config()
 
+            from Application.AntiDetection import get_anti_detection_manager
+            from Application.Albion.detection import AlbionDetection
+
             # Vérifier si le jeu est ouvert
             anti_detection = get_anti_detection_manager()
             if not anti_detection.is_game_window_active():
@@ -587,7 +707,9 @@ class AlbionBotGUI(QMainWindow):
                 model_name=self.config["model_path"],
                 debug=True,
                 confidence=self.config["confidence"],
-                window_name=self.config["window_name"]
+                window_name=self.config["window_name"],
+                backend=self.config["backend"],
+                calibration=self.config["calibration_path"] or None
             )
 
             x, y, resource, _ = model.predict()
@@ -666,6 +788,22 @@ class AlbionBotGUI(QMainWindow):
             # Mettre à jour le nombre de ressources
             if self.gathering_thread:
                 self.resource_count_label.setText(str(self.gathering_thread.resources_gathered))
+                self.update_latencies()
+
+    def update_latencies(self):
+        """Affiche les latences par étape du modèle en cours d'utilisation"""
+        model = self.gathering_thread.model if self.gathering_thread else None
+        if model is None:
+            return
+
+        for stage, stats in model.latency_stats().items():
+            label = self.latency_labels.get(stage)
+            if label is not None and stats is not None:
+                label.setText(f"{stats['p50']:.1f} / {stats['p95']:.1f} / {stats['p99']:.1f}")
+
+        sizes = model.metrics.gauge_stats("input_size")
+        if sizes is not None:
+            self.input_size_label.setText(str(sizes["current"]))
 
     def clear_logs(self):
         """Efface le contenu de la zone de logs"""
@@ -0,0 +1,22 @@
+from time import perf_counter, sleep
+
+
+class SystemClock:
+    """
+    Horloge réelle de la boucle de récolte.
+
+    Interaction ne lit le temps et n'attend qu'à travers une horloge : la
+    simulation (voir Application.Simulation) la remplace par une horloge qui
+    avance instantanément pour exécuter la logique plus vite que le temps réel.
+    """
+
+    @staticmethod
+    def now():
+        """Secondes écoulées, dans la même base que les horodatages de capture (perf_counter)"""
+        return perf_counter()
+
+    @staticmethod
+    def sleep(seconds):
+        """Attend `seconds` secondes"""
+        if seconds > 0:
+            sleep(seconds)
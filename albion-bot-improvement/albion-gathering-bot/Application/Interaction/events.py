@@ -0,0 +1,147 @@
+from collections import namedtuple
+
+import numpy as np
+
+from Application.Albion.tracker import ViewMotion
+
+# Événement visuel : type et instant (horloge de la boucle) de l'image où il a été vu
+VisionEvent = namedtuple("VisionEvent", ["kind", "timestamp"])
+
+
+class VisionEventSource:
+    """
+    Événements visuels de la boucle de récolte, observés image par image.
+
+    Deux petites régions sont capturées à haute fréquence : la barre de
+    progression de récolte (apparition / disparition, via la fonction de
+    correspondance d'Interaction) et une zone autour du personnage, dont le
+    défilement global (corrélation de phase, voir tracker.ViewMotion) indique si
+    le personnage marche : la caméra le suit, la vue ne bouge plus quand il s'arrête.
+    La boucle réagit ainsi à l'image près au lieu d'interroger la barre toutes les 0,5 s.
+
+    Avec la capture en arrière-plan, chaque observation suit la publication d'une
+    nouvelle image dans l'anneau (FrameRing.wait) ; sans elle, les observations
+    sont espacées d'un intervalle passé par la fonction `delay` (délai aléatoire).
+    """
+
+    CHARACTER_STOPPED = "character_stopped"
+    BAR_APPEARED = "bar_appeared"
+    BAR_DISAPPEARED = "bar_disappeared"
+
+    INTERVAL = 1 / 30
+    STILL_FRAMES = 3
+    MOTION_THRESHOLD = 1.0  # pixels du modèle par image
+    MIN_RESPONSE = 0.1
+    FRAME_TIMEOUT = 0.25
+
+    def __init__(self, capture, motion_region, motion_size, bar_visible, clock, interval=INTERVAL,
+                 still_frames=STILL_FRAMES, motion_threshold=MOTION_THRESHOLD, min_response=MIN_RESPONSE,
+                 delay=None):
+        """
+        :param capture: Capture de la fenêtre (grab_region()).
+        :param motion_region: Nom de la région enregistrée autour du personnage.
+        :param motion_size: Côté de cette région dans l'espace du modèle.
+        :param bar_visible: Fonction sans argument, vraie si la barre de récolte est visible.
+        :param clock: Horloge de la boucle (now() et sleep()).
+        :param interval: Intervalle entre deux observations sans capture en arrière-plan, en secondes.
+        :param still_frames: Nombre d'images immobiles consécutives pour considérer le personnage arrêté.
+        :param motion_threshold: Défilement minimal d'une image en mouvement, en pixels du modèle.
+        :param min_response: Pic de corrélation minimal d'une mesure de défilement fiable.
+        :param delay: Fonction délai de base -> délai appliqué entre deux observations sans
+                      capture en arrière-plan (par exemple AntiDetection.randomize_delay).
+        """
+        self.capture = capture
+        self.motion_region = motion_region
+        self.bar_visible = bar_visible
+        self.clock = clock
+        self.interval = interval
+        self.still_frames = still_frames
+        self.motion_threshold = motion_threshold
+        self.min_response = min_response
+        self.delay = delay or (lambda base_delay: base_delay)
+        self.motion = ViewMotion(motion_size)
+        self.frames = 0
+        self.reset()
+
+    def reset(self, moving=False):
+        """
+        Oublie l'état observé : la barre est supposée absente.
+
+        :param moving: Le personnage est supposé en marche (juste après un clic de déplacement) :
+                       s'il ne bouge pas, CHARACTER_STOPPED est émis après still_frames images.
+        """
+        self.motion.reset()
+        self.bar = False
+        self.moving = moving
+        self._still = 0
+
+    def poll(self, motion=True):
+        """
+        Observe une image des deux régions.
+
+        :param motion: Mesure aussi le défilement autour du personnage (inutile pendant la récolte).
+        :return: Liste des événements apparus sur cette image.
+        """
+        now = self.clock.now()
+        events = []
+        self.frames += 1
+
+        visible = bool(self.bar_visible())
+        if visible != self.bar:
+            events.append(VisionEvent(self.BAR_APPEARED if visible else self.BAR_DISAPPEARED, now))
+            self.bar = visible
+
+        if not motion:
+            return events
+
+        patch = self.capture.grab_region(self.motion_region)
+        if patch is not None:
+            dx, dy, response = self.motion(patch)
+            if response < self.min_response:
+                # Mesure peu fiable (scène uniforme, changement brusque) : état inchangé
+                return events
+
+            if np.hypot(dx, dy) >= self.motion_threshold:
+                self.moving = True
+                self._still = 0
+            elif self.moving:
+                self._still += 1
+                if self._still >= self.still_frames:
+                    self.moving = False
+                    events.append(VisionEvent(self.CHARACTER_STOPPED, now))
+        return events
+
+    def wait(self, kinds, timeout, motion=None):
+        """
+        Observe les régions à chaque nouvelle image jusqu'à un événement attendu.
+
+        :param kinds: Types d'événements attendus.
+        :param timeout: Attente maximale, en secondes.
+        :param motion: Mesure le défilement (None = seulement si CHARACTER_STOPPED est attendu).
+        :return: Premier VisionEvent attendu, ou None si le délai est écoulé.
+        """
+        deadline = self.clock.now() + timeout
+        if motion is None:
+            motion = self.CHARACTER_STOPPED in kinds
+        while True:
+            ring = self._ring()
+            seen = ring.count if ring is not None else None
+
+            for event in self.poll(motion):
+                if event.kind in kinds:
+                    return event
+            remaining = deadline - self.clock.now()
+            if remaining <= 0:
+                return None
+
+            if ring is None:
+                self.clock.sleep(self.delay(self.interval))
+            else:
+                ring.wait(seen, min(remaining, self.FRAME_TIMEOUT))
+                # Point d'annulation : l'attente de l'anneau ne passe pas par l'horloge (voir LoopClock)
+                self.clock.sleep(0)
+
+    def _ring(self):
+        """Anneau de la capture en arrière-plan si elle tourne, sinon None"""
+        background = getattr(self.capture, "background", None)
+        return background.ring if background is not None and background.is_alive() else None
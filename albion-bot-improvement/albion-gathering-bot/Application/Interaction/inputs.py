@@ -0,0 +1,39 @@
+class PyAutoGuiInput:
+    """
+    Clavier et souris du système via pyautogui.
+
+    Interaction n'envoie ses entrées qu'à travers cet objet : la simulation le
+    remplace par un récepteur qui agit sur une scène synthétique.
+    """
+
+    def __init__(self):
+        # Importé à la création : la simulation n'a besoin ni de pyautogui ni d'un écran
+        import pyautogui
+
+        # Configuration pour un comportement plus humain
+        pyautogui.MINIMUM_DURATION = 0.1
+        pyautogui.MINIMUM_SLEEP = 0.05
+        pyautogui.PAUSE = 0.1
+
+        self.gui = pyautogui
+
+    def hotkey(self, *keys):
+        self.gui.hotkey(*keys)
+
+    def press(self, key):
+        self.gui.press(key)
+
+    def move_to(self, x, y, duration=0.0):
+        self.gui.moveTo(x, y, duration=duration)
+
+    def move_rel(self, dx, dy, duration=0.0):
+        self.gui.moveRel(dx, dy, duration=duration)
+
+    def mouse_down(self, button="left"):
+        self.gui.mouseDown(button=button)
+
+    def mouse_up(self, button="left"):
+        self.gui.mouseUp(button=button)
+
+    def click(self, button="left"):
+        self.gui.click(button=button)
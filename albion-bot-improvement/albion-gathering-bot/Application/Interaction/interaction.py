@@ -1,16 +1,12 @@
 from Application.Albion.detection import AlbionDetection
-from time import sleep
+from Application.Interaction.clock import SystemClock
+from Application.Interaction.events import VisionEventSource
+from Application.Interaction.inputs import PyAutoGuiInput
+from Application.Interaction.runtime import GatheringStopped
 import cv2 as cv
-import pyautogui
 import random
 import logging
 import numpy as np
-from Application.AntiDetection import get_anti_detection_manager
-
-# Configuration pour un comportement plus humain
-pyautogui.MINIMUM_DURATION = 0.1
-pyautogui.MINIMUM_SLEEP = 0.05
-pyautogui.PAUSE = 0.1
 
 # Configuration du logging
 logger = logging.getLogger("Interaction")
@@ -43,30 +39,97 @@ class Interaction:
     # Limite approximative d'inventaire - à ajuster selon le jeu
     INVENTORY_LIMIT = 15
 
-    def __init__(self, model):
+    # Région de la barre de progression de récolte, dans l'espace 640x640 du modèle
+    MINING_BAR_REGION = "mining_bar"
+    MINING_BAR_BOUNDS = (265, 365, 28, 45)  # (x, y, largeur, hauteur)
+
+    # Attente maximale d'un résultat du pipeline asynchrone postérieur à la dernière action,
+    # par tranches pour qu'un arrêt de la session l'interrompe
+    PREDICTION_TIMEOUT = 1.0
+    PREDICTION_SLICE = 0.05
+
+    # Modèle de la barre de progression de récolte (niveaux de gris, espace 640x640)
+    MINING_BAR_TEMPLATE = "images/cropped_bar_resource.png"
+
+    # États de la boucle de récolte (voir self.state)
+    STATES = ("searching", "moving", "mining", "waiting")
+
+    # Région autour du personnage dont le défilement indique s'il marche (espace 640x640)
+    MOTION_REGION = "motion"
+    MOTION_BOUNDS = (160, 100, 320, 320)  # (x, y, largeur, hauteur), centrée sur le personnage
+
+    # Déplacement : attente maximale, délai d'apparition de la barre après l'arrêt et relances du clic
+    MAX_MOVING_TIME = 15
+    ARRIVAL_GRACE = 0.6
+    MAX_RELAUNCHES = 2
+
+    def __init__(self, model, clock=None, inputs=None, anti_detection=None, mining_bar_template=MINING_BAR_TEMPLATE):
+        """
+        :param model: Détection (AlbionDetection ou objet de même interface).
+        :param clock: Horloge de la boucle, SystemClock par défaut (voir clock.py).
+        :param inputs: Clavier et souris, PyAutoGuiInput par défaut (voir inputs.py).
+        :param anti_detection: Gestionnaire anti-détection, l'instance globale par défaut.
+        :param mining_bar_template: Chemin ou image en niveaux de gris du modèle de la barre de récolte.
+        """
         self.model: AlbionDetection = model
         self.current_gathering: Gathering | None = None
         self.debug = self.model.debug
+        self.clock = clock or SystemClock()
+        self.inputs = inputs or PyAutoGuiInput()
 
         # Initialiser le gestionnaire anti-détection
-        self.anti_detection = get_anti_detection_manager()
+        if anti_detection is None:
+            from Application.AntiDetection import get_anti_detection_manager
+            anti_detection = get_anti_detection_manager()
+        self.anti_detection = anti_detection
 
         # Démarrer le monitoring anti-détection en arrière-plan
         self.anti_detection.start_monitoring()
 
         try:
-            self.img_border_resource = cv.imread("images/cropped_bar_resource.png", cv.IMREAD_UNCHANGED)
+            if isinstance(mining_bar_template, str):
+                self.img_border_resource = cv.imread(mining_bar_template, cv.IMREAD_UNCHANGED)
+            else:
+                self.img_border_resource = mining_bar_template
             if self.img_border_resource is None:
                 logger.warning("Image de barre de ressource non trouvée. Certaines fonctionnalités seront limitées.")
         except Exception as e:
             logger.error(f"Erreur lors du chargement de l'image de référence: {e}")
             self.img_border_resource = None
 
+        # Capture native de la seule zone de la barre de progression
+        self.model.window_capture.register_region(
+            self.MINING_BAR_REGION,
+            *self.MINING_BAR_BOUNDS,
+            reference=(self.model.IMG_SIZE, self.model.IMG_SIZE)
+        )
+        self.model.window_capture.register_region(
+            self.MOTION_REGION,
+            *self.MOTION_BOUNDS,
+            reference=(self.model.IMG_SIZE, self.model.IMG_SIZE)
+        )
+
+        # Arrêt du personnage et apparition / disparition de la barre, observés image par image
+        self.events = VisionEventSource(
+            self.model.window_capture,
+            self.MOTION_REGION,
+            self.MOTION_BOUNDS[2],
+            self.__is_mining,
+            self.clock,
+            delay=self.anti_detection.randomize_delay
+        )
+
         # État du bot
         self.resources_gathered = 0
         self.last_move_time = 0
         self.mining_attempts = 0
 
+        # Fin de la dernière action modifiant la scène (les détections antérieures sont périmées)
+        self.last_action_time = 0.0
+
+        # Étape en cours de la boucle, parmi STATES
+        self.state = "waiting"
+
         logger.info("Interaction initialisée avec protection anti-détection")
 
     def __del__(self):
@@ -81,8 +144,8 @@ class Interaction:
         """Toggle l'ATH du jeu pour masquer les actions du bot"""
         def _toggle():
             # Ajout d'un délai aléatoire pour simuler un comportement humain
-            sleep(self.anti_detection.randomize_delay(0.2))
-            pyautogui.hotkey('alt', 'h')
+            self.clock.sleep(self.anti_detection.randomize_delay(0.2))
+            self.inputs.hotkey('alt', 'h')
             logger.debug("ATH basculé")
 
         # Utiliser l'exécution sécurisée
@@ -92,8 +155,8 @@ class Interaction:
         """Monte sur la monture"""
         def _mount():
             # Simulation d'un comportement humain avec un délai aléatoire
-            sleep(self.anti_detection.randomize_delay(0.3))
-            pyautogui.press('a')
+            self.clock.sleep(self.anti_detection.randomize_delay(0.3))
+            self.inputs.press('a')
             logger.debug("Montée sur la monture")
 
         # Utiliser l'exécution sécurisée
@@ -102,15 +165,18 @@ class Interaction:
     def __crop_image_resource(self):
         """Extraire la zone de l'image contenant la barre de progression de récolte"""
         try:
-            # Coordonnées de la barre de progression (peut nécessiter un ajustement)
-            top_x, top_y = 265, 365
-            bottom_x, bottom_y = 293, 410
-
-            img = self.model._process_image(self.model.window_capture.screenshot())
-            if img is None:
+            # Seule la petite région de la barre est capturée, à la résolution native
+            patch = self.model.window_capture.grab_region(self.MINING_BAR_REGION)
+            if patch is None:
                 return None
 
-            return cv.cvtColor(img, cv.COLOR_BGR2GRAY)[top_y:bottom_y, top_x:bottom_x]
+            # RGBA2GRAY sur des données BGRA reproduit la pondération de l'ancien
+            # pipeline (RGB2BGR puis BGR2GRAY) avec lequel le modèle de barre a été découpé
+            gray = cv.cvtColor(patch, cv.COLOR_RGBA2GRAY)
+
+            # Ramener le patch à la taille qu'il aurait dans l'espace 640x640
+            _, _, width, height = self.MINING_BAR_BOUNDS
+            return cv.resize(gray, (width, height), interpolation=cv.INTER_AREA)
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction de la zone d'image: {e}")
             return None
@@ -137,7 +203,7 @@ class Interaction:
             logger.error(f"Erreur lors de la vérification de l'état de récolte: {e}")
             return False
 
-    def __is_inventory_full(self):
+    def is_inventory_full(self):
         """
         Vérifier si l'inventaire est plein
         Cette méthode est une approximation simple basée sur le nombre de ressources récoltées
@@ -149,8 +215,8 @@ class Interaction:
         """Gérer le processus de récolte"""
         if self.debug:
             logger.info("Début de la récolte...")
+        self.state = "mining"
 
-        start_time = 0
         mining_time = 0
         success = False
 
@@ -165,25 +231,17 @@ class Interaction:
         if self.debug:
             logger.debug(f"Temps estimé de récolte: {mining_time:.1f} secondes")
 
-        # Attendre que la récolte soit terminée
+        # Attendre que la barre disparaisse (récolte terminée), observée image par image
         max_wait_time = mining_time * 1.5  # 50% de temps supplémentaire au cas où
-        elapsed_time = 0
-        check_interval = 0.5
+        event = self.events.wait((VisionEventSource.BAR_DISAPPEARED,), max_wait_time)
 
-        while elapsed_time < max_wait_time:
-            # Mettre à jour le temps de dernière action pour le système anti-détection
-            self.anti_detection.update_last_action_time()
+        # Mettre à jour le temps de dernière action pour le système anti-détection
+        self.anti_detection.update_last_action_time()
 
-            if not self.__is_mining():
-                # Si la récolte est terminée
-                success = True
-                self.resources_gathered += 1
-                logger.debug(f"Récolte réussie! Ressources récoltées: {self.resources_gathered}")
-                break
-
-            # Attendre un court intervalle avant de vérifier à nouveau
-            sleep(self.anti_detection.randomize_delay(check_interval))
-            elapsed_time += check_interval
+        if event is not None:
+            success = True
+            self.resources_gathered += 1
+            logger.debug(f"Récolte réussie! Ressources récoltées: {self.resources_gathered}")
 
         if not success:
             logger.warning("La récolte a échoué ou a pris trop de temps")
@@ -195,39 +253,49 @@ class Interaction:
             logger.info("Récolte terminée")
 
         # Ajout d'un petit délai après la récolte pour un comportement plus naturel
-        sleep(self.anti_detection.randomize_delay(0.7))
+        self.state = "waiting"
+        self.clock.sleep(self.anti_detection.randomize_delay(0.7))
 
     def __moving(self):
         """Gérer le processus de déplacement vers une ressource"""
         if self.debug:
             logger.info("Déplacement vers la ressource...")
+        self.state = "moving"
 
-        # Temps maximal d'attente pour arriver à la ressource
-        max_wait_time = 15
-        elapsed_time = 0
-        check_interval = 0.5
+        # Le personnage vient d'être envoyé vers la ressource : il est supposé en marche
+        self.events.reset(moving=True)
+        deadline = self.clock.now() + self.MAX_MOVING_TIME
+        arrival = (VisionEventSource.BAR_APPEARED,)
+        relaunches = 0
+
+        while True:
+            event = self.events.wait(arrival + (VisionEventSource.CHARACTER_STOPPED,), deadline - self.clock.now())
 
-        while elapsed_time < max_wait_time:
             # Mettre à jour le temps de dernière action pour le système anti-détection
             self.anti_detection.update_last_action_time()
 
-            if self.__is_mining():
+            if event is None:
+                break
+
+            # La barre apparaît peu après l'arrêt du personnage sur la ressource
+            if event.kind == VisionEventSource.BAR_APPEARED or self.events.wait(arrival, self.ARRIVAL_GRACE, motion=True):
                 logger.debug("Arrivé à la ressource, début de la récolte")
                 return True
 
-            # Vérifier si nous sommes bloqués
-            if elapsed_time > 5 and not self.__is_mining():
-                # Essayer de relancer le mouvement
-                if self.current_gathering:
-                    logger.debug("Potentiellement bloqué, tentative de relance du mouvement")
-                    self.anti_detection.human_like_click(
-                        self.current_gathering.x,
-                        self.current_gathering.y
-                    )
+            if self.events.moving:
+                # Simple pause du déplacement : continuer d'attendre
+                continue
 
-            # Attendre un court intervalle avant de vérifier à nouveau
-            sleep(self.anti_detection.randomize_delay(check_interval))
-            elapsed_time += check_interval
+            # Arrêté sans récolter : clic manqué ou chemin bloqué
+            if not self.current_gathering or relaunches >= self.MAX_RELAUNCHES:
+                break
+            relaunches += 1
+            logger.debug("Arrêté avant la ressource, tentative de relance du mouvement")
+            self.anti_detection.human_like_click(
+                self.current_gathering.x,
+                self.current_gathering.y
+            )
+            self.events.reset(moving=True)
 
         logger.warning("N'a pas pu atteindre la ressource dans le temps imparti")
         return False
@@ -237,16 +305,49 @@ class Interaction:
         Trouve la ressource la plus proche et la récolte
         """
         # Prédire la position de la ressource la plus proche
-        x, y, resource, _ = self.model.predict()
+        self.state = "searching"
+        x, y, resource = self.__nearest_resource()
 
         if x is None or y is None or resource is None:
             logger.info("Aucune ressource détectée, recherche en cours...")
             # Faire pivoter légèrement la caméra pour chercher des ressources
             self.__rotate_camera()
+            self.last_action_time = self.clock.now()
             return False
 
         # Commencer le processus de récolte
-        return self.gathering(x, y, resource)
+        try:
+            return self.gathering(x, y, resource)
+        finally:
+            self.last_action_time = self.clock.now()
+
+    def __nearest_resource(self):
+        """
+        Position à l'écran et type de la ressource la plus proche.
+
+        Avec le pipeline asynchrone, le résultat le plus récent est utilisé sans
+        attendre une capture et une inférence complètes ; il doit seulement porter
+        sur une image capturée après la dernière action.
+        """
+        if self.model.pipeline is None:
+            x, y, resource, _ = self.model.predict()
+            return x, y, resource
+
+        deadline = self.clock.now() + self.PREDICTION_TIMEOUT
+        while True:
+            remaining = deadline - self.clock.now()
+            result = self.model.latest_prediction(after=self.last_action_time,
+                                                  timeout=max(0.0, min(remaining, self.PREDICTION_SLICE)))
+            if result is not None or remaining <= self.PREDICTION_SLICE:
+                break
+            # Point d'annulation : l'attente du pipeline ne passe pas par l'horloge (voir LoopClock)
+            self.clock.sleep(0)
+
+        if result is None:
+            logger.debug("Aucun résultat récent du pipeline d'inférence")
+            return None, None, None
+
+        return result.x, result.y, result.resource
 
     def __rotate_camera(self):
         """
@@ -258,14 +359,14 @@ class Interaction:
             duration = self.anti_detection.get_human_mouse_duration()
 
             # Maintenir le bouton droit de la souris enfoncé et déplacer
-            pyautogui.mouseDown(button='right')
-            pyautogui.moveRel(angle, 0, duration=duration)
-            pyautogui.mouseUp(button='right')
+            self.inputs.mouse_down(button='right')
+            self.inputs.move_rel(angle, 0, duration=duration)
+            self.inputs.mouse_up(button='right')
 
             logger.debug(f"Rotation de caméra de {angle:.1f} degrés")
 
             # Petit délai après la rotation
-            sleep(self.anti_detection.randomize_delay(0.3))
+            self.clock.sleep(self.anti_detection.randomize_delay(0.3))
 
         # Utiliser l'exécution sécurisée
         self.anti_detection.safe_execute_action(_rotate)
@@ -276,7 +377,7 @@ class Interaction:
         """
         try:
             # Vérifier si l'inventaire est plein
-            if self.__is_inventory_full():
+            if self.is_inventory_full():
                 logger.info("Inventaire plein! Retour au menu principal...")
                 # Ici, vous pourriez implémenter une logique pour retourner à la ville
                 return False
@@ -290,43 +391,50 @@ class Interaction:
             # Basculer l'ATH pour minimiser les éléments visuels
             self.toggle_ath()
 
-            # Stocker les informations sur la ressource en cours de récolte
-            self.current_gathering = Gathering(x, y, resource)
-
-            # Clic sur la ressource avec comportement humain
-            self.anti_detection.human_like_click(
-                self.current_gathering.x,
-                self.current_gathering.y
-            )
-
-            # Déplacer la souris ailleurs pour éviter de bloquer la vue
-            safe_x, safe_y = self.anti_detection.get_safe_coordinates(
-                random.randint(5, 20),
-                random.randint(5, 20)
-            )
-
-            pyautogui.moveTo(safe_x, safe_y,
-                             duration=self.anti_detection.get_human_mouse_duration())
-
-            # Attendre d'arriver à la ressource
-            if self.__moving():
-                # Commencer la récolte
-                self.__mining()
-
-            # Basculer l'ATH pour revenir à l'état normal
-            self.toggle_ath()
+            try:
+                # Stocker les informations sur la ressource en cours de récolte
+                self.current_gathering = Gathering(x, y, resource)
+
+                # Clic sur la ressource avec comportement humain
+                self.anti_detection.human_like_click(
+                    self.current_gathering.x,
+                    self.current_gathering.y
+                )
+
+                # Déplacer la souris ailleurs pour éviter de bloquer la vue
+                safe_x, safe_y = self.anti_detection.get_safe_coordinates(
+                    random.randint(5, 20),
+                    random.randint(5, 20)
+                )
+
+                self.inputs.move_to(safe_x, safe_y,
+                                    duration=self.anti_detection.get_human_mouse_duration())
+
+                # Attendre d'arriver à la ressource
+                if self.__moving():
+                    # Commencer la récolte
+                    self.__mining()
+            finally:
+                # Revenir à l'état normal de l'ATH, y compris après une erreur ou un arrêt de la session
+                self.__restore_ath()
 
             return True
 
         except Exception as e:
             logger.error(f"Erreur lors du processus de récolte: {e}")
-            # En cas d'erreur, essayer de rétablir l'ATH
-            try:
-                self.toggle_ath()
-            except:
-                pass
             return False
 
+    def __restore_ath(self):
+        """Rebascule l'ATH ; si la session est arrêtée, sans le délai annulable de toggle_ath()"""
+        try:
+            self.toggle_ath()
+        except GatheringStopped:
+            self.inputs.hotkey('alt', 'h')
+            logger.debug("ATH rétabli à l'arrêt de la session")
+            raise
+        except Exception as e:
+            logger.error(f"Impossible de rétablir l'ATH: {e}")
+
     def run_gathering_loop(self, max_resources=100, max_time_minutes=60):
         """
         Exécute une boucle de récolte continue avec des limites de sécurité
@@ -334,64 +442,86 @@ class Interaction:
         :param max_resources: Nombre maximal de ressources à récolter
         :param max_time_minutes: Durée maximale en minutes
         """
-        import time
-
-        start_time = time.time()
+        start_time = self.clock.now()
         max_time_seconds = max_time_minutes * 60
 
         logger.info(f"Démarrage de la boucle de récolte (limite: {max_resources} ressources ou {max_time_minutes} minutes)")
 
         try:
             while (self.resources_gathered < max_resources and
-                   time.time() - start_time < max_time_seconds):
+                   self.clock.now() - start_time < max_time_seconds):
 
                 # Vérifier si la fenêtre du jeu est active
                 if not self.anti_detection.is_game_window_active():
                     logger.warning("Fenêtre du jeu non active. Pause...")
-                    sleep(2.0)
+                    self.state = "waiting"
+                    self.clock.sleep(2.0)
                     continue
 
                 # Vérifier si l'inventaire est plein
-                if self.__is_inventory_full():
+                if self.is_inventory_full():
                     logger.info("Inventaire plein! Fin de la session de récolte.")
                     break
 
-                # Trouver et récolter la ressource la plus proche
-                self.find_and_gather_nearest_resource()
-
-                # Ajouter un délai variable entre les actions pour simuler un comportement humain
-                sleep_time = self.anti_detection.randomize_delay(1.0)
-                sleep(sleep_time)
-
-                # Ajouter du "bruit" à la mémoire pour compliquer les scans
-                if random.random() < 0.1:  # 10% de chance
-                    self.anti_detection.add_memory_noise()
-
-                # Afficher l'état actuel
-                elapsed_minutes = (time.time() - start_time) / 60
-                logger.info(f"Progression: {self.resources_gathered}/{max_resources} ressources, "
-                           f"{elapsed_minutes:.1f}/{max_time_minutes} minutes")
-
-                # Petite pause aléatoire occasionnelle pour simuler un comportement humain
-                if random.random() < 0.05:  # 5% de chance
-                    pause_time = self.anti_detection.randomize_delay(5.0)
-                    logger.debug(f"Pause aléatoire de {pause_time:.1f} secondes")
-                    sleep(pause_time)
+                # Trouver et récolter la ressource la plus proche, puis marquer une pause
+                self.gathering_cycle()
+                self.log_progress(start_time, max_resources, max_time_minutes)
 
             logger.info(f"Session de récolte terminée! {self.resources_gathered} ressources récoltées en "
-                       f"{(time.time() - start_time)/60:.1f} minutes")
+                       f"{(self.clock.now() - start_time)/60:.1f} minutes")
 
         except KeyboardInterrupt:
             logger.info("Arrêt manuel de la boucle de récolte")
         except Exception as e:
             logger.error(f"Erreur dans la boucle de récolte: {e}")
         finally:
-            # Arrêter le monitoring anti-détection
-            self.anti_detection.stop_monitoring()
+            self.finish_session()
 
-            # S'assurer que l'ATH est remis à l'état normal
-            try:
-                if random.random() < 0.5:  # Ne pas toujours faire la même chose
-                    self.toggle_ath()
-            except:
-                pass
+    def gathering_cycle(self):
+        """
+        Une itération de la boucle de récolte : recherche et récolte de la ressource
+        la plus proche, puis délais variables pour simuler un comportement humain
+        """
+        self.find_and_gather_nearest_resource()
+
+        # Ajouter un délai variable entre les actions pour simuler un comportement humain
+        self.state = "waiting"
+        sleep_time = self.anti_detection.randomize_delay(1.0)
+        self.clock.sleep(sleep_time)
+
+        # Ajouter du "bruit" à la mémoire pour compliquer les scans
+        if random.random() < 0.1:  # 10% de chance
+            self.anti_detection.add_memory_noise()
+
+        # Petite pause aléatoire occasionnelle pour simuler un comportement humain
+        if random.random() < 0.05:  # 5% de chance
+            pause_time = self.anti_detection.randomize_delay(5.0)
+            logger.debug(f"Pause aléatoire de {pause_time:.1f} secondes")
+            self.clock.sleep(pause_time)
+
+    def log_progress(self, start_time, max_resources, max_time_minutes):
+        """Affiche l'état actuel de la session et les statistiques de la détection"""
+        elapsed_minutes = (self.clock.now() - start_time) / 60
+        logger.info(f"Progression: {self.resources_gathered}/{max_resources} ressources, "
+                   f"{elapsed_minutes:.1f}/{max_time_minutes} minutes")
+
+        cache_stats = self.model.cache_stats()
+        if cache_stats:
+            logger.debug(f"Cache de détection: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                         f"({cache_stats['hit_rate']:.0%})")
+
+        tracking_stats = self.model.tracking_stats()
+        if tracking_stats:
+            logger.debug(f"Suivi: {tracking_stats['detections']} inférences, {tracking_stats['tracked']} images "
+                         f"suivies ({tracking_stats['tracked_rate']:.0%}), {tracking_stats['degraded']} dégradations")
+
+    def finish_session(self):
+        """Arrête le monitoring anti-détection et remet l'ATH à l'état normal en fin de session"""
+        self.anti_detection.stop_monitoring()
+
+        # S'assurer que l'ATH est remis à l'état normal
+        try:
+            if random.random() < 0.5:  # Ne pas toujours faire la même chose
+                self.toggle_ath()
+        except:
+            pass
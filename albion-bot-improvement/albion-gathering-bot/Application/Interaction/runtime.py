@@ -0,0 +1,306 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+logger = logging.getLogger("Interaction")
+
+
+class GatheringStopped(BaseException):
+    """
+    Levée dans le fil des actions quand la session est arrêtée.
+
+    Dérive de BaseException, comme KeyboardInterrupt : les `except Exception`
+    d'Interaction et du gestionnaire anti-détection ne l'interceptent pas et
+    l'action en cours est abandonnée immédiatement.
+    """
+
+
+class LoopClock:
+    """
+    Horloge d'Interaction pendant une session asyncio.
+
+    Chaque attente est un asyncio.sleep() planifié sur la boucle de la session
+    et attendu depuis le fil des actions : cancel() interrompt l'attente en
+    cours au lieu de laisser finir toute la chaîne de délais.
+    """
+
+    def __init__(self, loop, base):
+        """
+        :param loop: Boucle asyncio de la session.
+        :param base: Horloge remplacée, qui fournit now() (même base de temps que la capture).
+        """
+        self.loop = loop
+        self.base = base
+        self.cancelled = False
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self.base.now()
+
+    def sleep(self, seconds):
+        """Attend `seconds` secondes, ou lève GatheringStopped dès que la session est arrêtée"""
+        with self._lock:
+            if self.cancelled:
+                raise GatheringStopped()
+            if seconds <= 0:
+                return
+            future = asyncio.run_coroutine_threadsafe(asyncio.sleep(seconds), self.loop)
+            self._pending.add(future)
+
+        try:
+            future.result()
+        except concurrent.futures.CancelledError:
+            raise GatheringStopped() from None
+        finally:
+            with self._lock:
+                self._pending.discard(future)
+
+    def cancel(self):
+        """Interrompt l'attente en cours et toutes les suivantes (appelable depuis n'importe quel fil)"""
+        with self._lock:
+            self.cancelled = True
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+
+class GatheringRuntime:
+    """
+    Session de récolte sur une boucle asyncio.
+
+    La boucle bloquante d'Interaction.run_gathering_loop() est découpée en tâches
+    coopératives :
+
+        actions     cycles de récolte (Interaction.gathering_cycle()) dans un fil dédié,
+                    dont les attentes passent par la boucle (LoopClock)
+        monitoring  fenêtre du jeu active, inventaire, limites de ressources et de durée
+        telemetry   état de la session publié à intervalle régulier
+
+    Avec `detection`, le pipeline d'inférence continu (voir AlbionDetection.start_pipeline)
+    tourne pendant la session et les cycles lisent son dernier résultat au lieu
+    d'attendre une inférence complète.
+
+    La surveillance et la télémétrie avancent pendant qu'une action attend, et
+    stop() prend effet à la prochaine attente : les délais d'Interaction et du
+    gestionnaire anti-détection (son attribut `sleep`) passent par LoopClock, et
+    l'attente d'un résultat du pipeline est découpée en tranches courtes. Seul un
+    déplacement de souris en cours (moins d'une seconde) n'est pas interrompu.
+    """
+
+    WATCH_INTERVAL = 0.25
+    STATUS_INTERVAL = 1.0
+
+    def __init__(self, interaction, max_resources=100, max_time_minutes=60, on_status=None, detection=True,
+                 start_delay=0.0, watch_interval=WATCH_INTERVAL, status_interval=STATUS_INTERVAL):
+        """
+        :param interaction: Interaction à exécuter (horloge réelle).
+        :param max_resources: Nombre maximal de ressources à récolter.
+        :param max_time_minutes: Durée maximale en minutes.
+        :param on_status: Fonction appelée avec le dictionnaire status() à chaque publication.
+        :param detection: Lance le pipeline d'inférence continu s'il ne tourne pas, arrêté en fin de session.
+        :param start_delay: Attente avant la première action, en secondes (annulable).
+        :param watch_interval: Intervalle de la surveillance, en secondes.
+        :param status_interval: Intervalle de publication de l'état, en secondes.
+        """
+        self.interaction = interaction
+        self.max_resources = max_resources
+        self.max_time_minutes = max_time_minutes
+        self.on_status = on_status
+        self.detection = detection
+        self.start_delay = start_delay
+        self.watch_interval = watch_interval
+        self.status_interval = status_interval
+
+        self.clock = None
+        self.start_time = None
+        self.reason = None
+
+        self._loop = None
+        self._done = None
+        self._active = None
+        self._error = None
+        self._stop_requested = False
+
+    def run(self):
+        """
+        Exécute la session jusqu'à une limite, stop() ou une erreur (bloquant).
+
+        :return: Dernier dictionnaire status() de la session.
+        """
+        return asyncio.run(self._main())
+
+    def stop(self):
+        """Arrête la session au plus vite (appelable depuis n'importe quel fil, par exemple l'interface)"""
+        self._stop_requested = True
+        if self.clock is not None:
+            self.clock.cancel()
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._finish, "arrêt demandé")
+            except RuntimeError:
+                # Boucle fermée entre-temps : la session est déjà terminée
+                pass
+
+    def status(self):
+        """
+        :return: Dictionnaire de l'état de la session (ressources, durée, étape, fenêtre active, détections).
+        """
+        elapsed = self.interaction.clock.now() - self.start_time if self.start_time is not None else 0.0
+        return {
+            "resources": self.interaction.resources_gathered,
+            "max_resources": self.max_resources,
+            "elapsed_minutes": elapsed / 60,
+            "max_time_minutes": self.max_time_minutes,
+            "state": self.interaction.state,
+            "active": self._active.is_set() if self._active is not None else True,
+            "finished": self.reason,
+        }
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._done = asyncio.Event()
+        self._active = asyncio.Event()
+        self._active.set()
+
+        # Les attentes d'Interaction, de sa source d'événements visuels et du
+        # gestionnaire anti-détection deviennent annulables
+        base = self.interaction.clock
+        self.clock = LoopClock(self._loop, base)
+        self.interaction.clock = self.clock
+        self.interaction.events.clock = self.clock
+        anti_detection = self.interaction.anti_detection
+        base_sleep = getattr(anti_detection, "sleep", None)
+        if base_sleep is not None:
+            anti_detection.sleep = self.clock.sleep
+        self.start_time = base.now()
+
+        model = self.interaction.model
+        started_pipeline = self.detection and model.pipeline is None
+        if started_pipeline:
+            model.start_pipeline(fps=model.PIPELINE_FPS)
+
+        logger.info(f"Démarrage de la session de récolte (limite: {self.max_resources} ressources "
+                    f"ou {self.max_time_minutes} minutes)")
+
+        tasks = [
+            asyncio.create_task(self._guard(self._act()), name="actions"),
+            asyncio.create_task(self._guard(self._watch()), name="monitoring"),
+            asyncio.create_task(self._guard(self._report()), name="telemetry"),
+        ]
+
+        if self._stop_requested:
+            self._finish("arrêt demandé")
+
+        try:
+            await self._done.wait()
+        finally:
+            # Interrompre l'attente en cours du fil des actions, puis les autres tâches
+            self.clock.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            self.interaction.clock = base
+            self.interaction.events.clock = base
+            if base_sleep is not None:
+                anti_detection.sleep = base_sleep
+            if started_pipeline:
+                model.stop_pipeline()
+            await asyncio.to_thread(self.interaction.finish_session)
+
+        status = self.status()
+        self._publish(status)
+        logger.info(f"Session de récolte terminée ({self.reason})! {status['resources']} ressources récoltées "
+                    f"en {status['elapsed_minutes']:.1f} minutes")
+
+        if self._error is not None:
+            raise self._error
+        return status
+
+    def _finish(self, reason):
+        if self.reason is None:
+            self.reason = reason
+        self._done.set()
+
+    async def _guard(self, coroutine):
+        """Termine la session quand une tâche se termine ou échoue"""
+        try:
+            await coroutine
+            self._finish("tâche terminée")
+        except (asyncio.CancelledError, GatheringStopped):
+            raise
+        except Exception as e:
+            logger.error(f"Erreur dans la session de récolte: {e}", exc_info=True)
+            self._error = e
+            self._finish("erreur")
+
+    async def _act(self):
+        """Cycles de récolte, exécutés dans un fil pendant que la boucle reste libre"""
+        if self.start_delay > 0:
+            await asyncio.sleep(self.start_delay)
+
+        while True:
+            await self._active.wait()
+            cycle = asyncio.ensure_future(asyncio.to_thread(self.interaction.gathering_cycle))
+            try:
+                await asyncio.shield(cycle)
+            except GatheringStopped:
+                # Seul stop() annule l'horloge avant la fin de la session
+                self._finish("arrêt demandé")
+                return
+            except asyncio.CancelledError:
+                # L'horloge est annulée : le fil s'arrête à sa prochaine attente, l'attendre
+                # pour ne pas laisser d'action en cours pendant la fin de session
+                await asyncio.gather(cycle, return_exceptions=True)
+                raise
+
+    async def _watch(self):
+        """Fenêtre du jeu, inventaire et limites de la session"""
+        max_time_seconds = self.max_time_minutes * 60
+        anti_detection = self.interaction.anti_detection
+
+        while True:
+            active = anti_detection.is_game_window_active()
+            if active != self._active.is_set():
+                if active:
+                    logger.info("Fenêtre du jeu de nouveau active, reprise")
+                    self._active.set()
+                else:
+                    logger.warning("Fenêtre du jeu non active. Pause...")
+                    self._active.clear()
+
+            if self.interaction.is_inventory_full():
+                logger.info("Inventaire plein! Fin de la session de récolte.")
+                self._finish("inventaire plein")
+                return
+            if self.interaction.resources_gathered >= self.max_resources:
+                self._finish("limite de ressources")
+                return
+            if self.interaction.clock.now() - self.start_time >= max_time_seconds:
+                self._finish("durée maximale")
+                return
+
+            await asyncio.sleep(self.watch_interval)
+
+    async def _report(self):
+        """Publie l'état de la session et journalise la progression à chaque nouvelle ressource"""
+        reported = self.interaction.resources_gathered
+        while True:
+            await asyncio.sleep(self.status_interval)
+            self._publish(self.status())
+
+            if self.interaction.resources_gathered != reported:
+                reported = self.interaction.resources_gathered
+                self.interaction.log_progress(self.start_time, self.max_resources, self.max_time_minutes)
+
+    def _publish(self, status):
+        if self.on_status is None:
+            return
+        try:
+            self.on_status(status)
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication de l'état: {e}")
@@ -0,0 +1,215 @@
+"""
+Périphériques simulés de la boucle de récolte.
+
+Chaque classe remplace une dépendance d'Interaction liée au jeu réel : horloge,
+clavier et souris, capture de fenêtre, détection et gestionnaire anti-détection.
+Toutes agissent sur une GatheringScene et sur la même horloge simulée, qui
+n'avance que lorsque le code attend : la logique d'Interaction s'exécute donc
+sans écran et bien plus vite que le temps réel.
+"""
+
+import math
+import random
+
+from Application.Capture.background import Frame
+from Application.Capture.regions import ScreenRegion
+
+
+class SimulatedClock:
+    """Horloge qui avance instantanément à chaque attente"""
+
+    def __init__(self, start=0.0):
+        self.time = start
+        # Fonctions appelées avec la durée de chaque attente (comptabilité par état)
+        self.observers = []
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        seconds = max(float(seconds), 0.0)
+        for observer in self.observers:
+            observer(seconds)
+        self.time += seconds
+
+
+class SimulatedInput:
+    """Clavier et souris qui agissent sur la scène ; les déplacements de souris prennent leur durée"""
+
+    def __init__(self, scene, clock):
+        self.scene = scene
+        self.clock = clock
+        self.position = (0.0, 0.0)
+        self.buttons = set()
+        self.events = {}
+
+    def _count(self, kind):
+        self.events[kind] = self.events.get(kind, 0) + 1
+
+    def hotkey(self, *keys):
+        self._count("hotkey")
+
+    def press(self, key):
+        self._count("press")
+
+    def move_to(self, x, y, duration=0.0):
+        self._count("move")
+        self.clock.sleep(duration)
+        self.position = (x, y)
+
+    def move_rel(self, dx, dy, duration=0.0):
+        self._count("move")
+        self.clock.sleep(duration)
+        self.position = (self.position[0] + dx, self.position[1] + dy)
+        if "right" in self.buttons:
+            # Glisser avec le bouton droit fait tourner la vue (un degré par pixel)
+            self.scene.rotate(dx)
+
+    def mouse_down(self, button="left"):
+        self.buttons.add(button)
+
+    def mouse_up(self, button="left"):
+        self.buttons.discard(button)
+
+    def click(self, button="left"):
+        self._count("click")
+        if button == "left":
+            self.scene.click(*self.position)
+
+
+class SimulatedCapture:
+    """Capture de la fenêtre rendue par la scène (même interface que Capture pour Interaction)"""
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.regions = {}
+        self.frames = 0
+
+    def register_region(self, name, left, top, width, height, reference=(640, 640)):
+        self.regions[name] = ScreenRegion(left, top, width, height, reference=reference)
+        return self.regions[name]
+
+    def latest_frame(self) -> Frame:
+        self.frames += 1
+        return Frame(self.scene.render(), self.scene.clock.now(), self.frames)
+
+    def grab_region(self, name):
+        return self.scene.render(self.regions[name].bounds(self.scene.width, self.scene.height))
+
+    def to_screen(self, x, y, model_size=640):
+        return x * self.scene.width / model_size, y * self.scene.height / model_size
+
+    def close(self):
+        pass
+
+
+class SimulatedDetection:
+    """
+    Détection simulée : même interface qu'AlbionDetection pour Interaction.
+
+    Les ressources détectées sont celles que la scène a dessinées, avec un taux
+    d'oubli et un bruit de position, et chaque prédiction coûte `inference_time`
+    sur l'horloge : la logique de décision est mesurée sans le modèle.
+    """
+
+    IMG_SIZE = 640
+
+    def __init__(self, scene, capture, clock, inference_time=0.05, miss_rate=0.05, jitter=4.0, seed=0):
+        """
+        :param scene: Scène observée.
+        :param capture: Capture simulée de la scène.
+        :param clock: Horloge simulée.
+        :param inference_time: Durée simulée d'une prédiction (capture et inférence), en secondes.
+        :param miss_rate: Probabilité qu'une ressource visible ne soit pas détectée.
+        :param jitter: Écart type du bruit de position des détections, en pixels de fenêtre.
+        :param seed: Graine du bruit de détection.
+        """
+        self.scene = scene
+        self.window_capture = capture
+        self.clock = clock
+        self.inference_time = inference_time
+        self.miss_rate = miss_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+        self.debug = False
+        self.pipeline = None
+        self.predictions = 0
+        self.last_frame = None
+
+    def predict(self):
+        """
+        :return: Tuple (x, y, type, img) de la ressource détectée la plus proche du personnage,
+                 ou (None, None, None, img).
+        """
+        self.clock.sleep(self.inference_time)
+        self.predictions += 1
+        self.last_frame = self.window_capture.latest_frame()
+
+        character_x, character_y = self.scene.character_screen
+        nearest = None
+        for x, y, resource in self.scene.visible():
+            if self.random.random() < self.miss_rate:
+                continue
+            x += self.random.gauss(0, self.jitter)
+            y += self.random.gauss(0, self.jitter)
+            distance = math.hypot(x - character_x, y - character_y)
+            if nearest is None or distance < nearest[0]:
+                nearest = (distance, x, y, resource)
+
+        if nearest is None:
+            return None, None, None, self.last_frame.image
+        _, x, y, resource = nearest
+        return x, y, resource, self.last_frame.image
+
+    def cache_stats(self):
+        return None
+
+    def tracking_stats(self):
+        return None
+
+
+class SimulatedAntiDetection:
+    """
+    Gestionnaire anti-détection neutre : délais non aléatoires et clics directs
+    via l'entrée simulée, pour que deux exécutions ne diffèrent que par la logique.
+    """
+
+    MOUSE_DURATION = 0.3
+    REACTION_TIME = 0.1
+
+    def __init__(self, inputs, clock):
+        self.inputs = inputs
+        self.clock = clock
+
+    def start_monitoring(self):
+        pass
+
+    def stop_monitoring(self):
+        pass
+
+    def update_last_action_time(self):
+        pass
+
+    def get_human_mouse_duration(self):
+        return self.MOUSE_DURATION
+
+    def randomize_delay(self, base_delay):
+        return base_delay
+
+    def get_safe_coordinates(self, x, y, screen_width=None, screen_height=None):
+        return x, y
+
+    def human_like_click(self, x, y, right_click=False):
+        self.inputs.move_to(x, y, duration=self.MOUSE_DURATION)
+        self.clock.sleep(self.REACTION_TIME)
+        self.inputs.click(button='right' if right_click else 'left')
+
+    def is_game_window_active(self):
+        return True
+
+    def add_memory_noise(self):
+        pass
+
+    def safe_execute_action(self, action_func, max_retries=3):
+        return action_func()
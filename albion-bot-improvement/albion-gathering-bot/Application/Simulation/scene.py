@@ -0,0 +1,294 @@
+"""
+Scène de récolte synthétique.
+
+Le monde est un plan vu de dessus, centré sur le personnage : des ressources de
+plusieurs types y apparaissent, le personnage marche vers le point cliqué, et
+récolte automatiquement la ressource cliquée une fois arrivé. Pendant la
+récolte, la barre de progression est dessinée dans la région que surveille
+Interaction. Le temps est celui de l'horloge simulée : la scène avance de façon
+paresseuse, au moment où elle est observée ou modifiée.
+"""
+
+import math
+
+import numpy as np
+
+from Application.lazy import lazy_import
+from Application.Capture.regions import ScreenRegion
+
+cv = lazy_import("cv2")
+
+
+class ResourceNode:
+    """Ressource posée dans le monde"""
+
+    def __init__(self, x, y, resource):
+        self.x = x
+        self.y = y
+        self.resource = resource
+
+
+class GatheringScene:
+    """Monde simulé (personnage, ressources, déplacements, récolte) et son rendu BGRA"""
+
+    # Durées réelles de récolte par type de ressource (s), à ±10 %
+    MINING_TIME = {0: 12, 1: 10, 2: 8, 3: 15, 4: 9}
+
+    # Couleurs BGRA des sprites par type de ressource
+    COLORS = {
+        0: (150, 150, 150, 255),  # Pierre
+        1: (40, 90, 140, 255),    # Bois
+        2: (90, 200, 120, 255),   # Fibre
+        3: (60, 60, 200, 255),    # Minerai
+        4: (80, 140, 200, 255),   # Cuir
+    }
+
+    WALK_SPEED = 250.0      # pixels de fenêtre par seconde
+    REACH = 30.0            # distance à laquelle la récolte commence
+    CLICK_RADIUS = 30.0     # tolérance d'un clic sur une ressource
+    SPRITE_RADIUS = 18
+    RESPAWN_TIME = 30.0     # délai de réapparition d'une ressource récoltée
+    SPAWN_RADIUS = (150.0, 1200.0)
+
+    # Position du personnage dans l'espace 640x640 du modèle (voir AlbionDetection)
+    CHARACTER_POSITION = (320, 260)
+
+    def __init__(self, clock, rng, bar_bounds, window=(1280, 720), resources=12, reference=640):
+        """
+        :param clock: Horloge simulée (temps de la scène).
+        :param rng: numpy.random.Generator de la scène.
+        :param bar_bounds: Région (x, y, largeur, hauteur) de la barre de récolte dans l'espace de référence.
+        :param window: Taille (largeur, hauteur) de la fenêtre rendue.
+        :param resources: Nombre de ressources présentes dans le monde.
+        :param reference: Côté de l'espace de référence (espace du modèle).
+        """
+        self.clock = clock
+        self.rng = rng
+        self.width, self.height = window
+        self.bar = ScreenRegion(*bar_bounds, reference=(reference, reference))
+
+        self.character_screen = (self.CHARACTER_POSITION[0] * self.width / reference,
+                                 self.CHARACTER_POSITION[1] * self.height / reference)
+        self.character = np.zeros(2)
+        self.angle = 0.0
+
+        self.nodes = []
+        for _ in range(resources):
+            self._spawn()
+        self._respawns = []
+
+        # Déplacement et récolte en cours
+        self.state = "idle"
+        self.target = None
+        self.target_node = None
+        self.mining_node = None
+        self.mining_started = 0.0
+        self.mining_ends = 0.0
+
+        self.updated_at = clock.now()
+        self.time_in_state = {"idle": 0.0, "moving": 0.0, "mining": 0.0}
+        self.mined = 0
+        self.interrupted = 0
+        self.clicks = 0
+
+        self._background = self._render_background()
+        # Texture répétée 2x2 : toute zone décalée de la fenêtre en est une simple tranche
+        self._ground = np.tile(self._background, (2, 2, 1))
+        # Tampons et instant du dernier rendu, par zone rendue
+        self._frames = {}
+        self._rendered_at = {}
+
+    def _spawn(self):
+        # Autour de la position courante du personnage, hors de portée immédiate
+        center = self.character
+        distance = self.rng.uniform(*self.SPAWN_RADIUS)
+        direction = self.rng.uniform(0, 2 * math.pi)
+        resource = int(self.rng.integers(len(self.MINING_TIME)))
+        self.nodes.append(ResourceNode(center[0] + distance * math.cos(direction),
+                                       center[1] + distance * math.sin(direction), resource))
+
+    def to_screen(self, x, y):
+        """Coordonnées du monde -> pixels de la fenêtre (vue tournée autour du personnage)"""
+        dx, dy = x - self.character[0], y - self.character[1]
+        cos, sin = math.cos(self.angle), math.sin(self.angle)
+        return (self.character_screen[0] + cos * dx - sin * dy,
+                self.character_screen[1] + sin * dx + cos * dy)
+
+    def to_world(self, x, y):
+        """Pixels de la fenêtre -> coordonnées du monde"""
+        dx, dy = x - self.character_screen[0], y - self.character_screen[1]
+        cos, sin = math.cos(self.angle), math.sin(self.angle)
+        return np.array((self.character[0] + cos * dx + sin * dy,
+                         self.character[1] - sin * dx + cos * dy))
+
+    def advance(self, now=None):
+        """Fait évoluer la scène jusqu'à `now` (temps de l'horloge par défaut)"""
+        now = self.clock.now() if now is None else now
+
+        while self.updated_at < now:
+            t = self.updated_at
+            if self.state == "moving":
+                offset = self.target - self.character
+                distance = float(np.hypot(*offset))
+                remaining = max(distance - (self.REACH if self.target_node else 0.0), 0.0)
+                arrival = t + remaining / self.WALK_SPEED
+                end = min(now, arrival)
+                if distance:
+                    self.character = self.character + offset / distance * self.WALK_SPEED * (end - t)
+                self._spend("moving", end)
+                if arrival > now:
+                    break
+                self._arrive(arrival)
+            elif self.state == "mining":
+                end = min(now, self.mining_ends)
+                self._spend("mining", end)
+                if end < self.mining_ends:
+                    break
+                self._finish_mining(end)
+            else:
+                self._spend("idle", now)
+
+        # Réapparition des ressources récoltées
+        while self._respawns and self._respawns[0] <= now:
+            self._respawns.pop(0)
+            self._spawn()
+
+    def _spend(self, state, until):
+        self.time_in_state[state] += until - self.updated_at
+        self.updated_at = until
+
+    def _arrive(self, now):
+        node = self.target_node
+        self.target = self.target_node = None
+        if node is not None and node in self.nodes:
+            self.state = "mining"
+            self.mining_node = node
+            self.mining_started = now
+            self.mining_ends = now + self.MINING_TIME[node.resource] * self.rng.uniform(0.9, 1.1)
+        else:
+            self.state = "idle"
+
+    def _finish_mining(self, now):
+        self.nodes.remove(self.mining_node)
+        self.mining_node = None
+        self.state = "idle"
+        self.mined += 1
+        self._respawns.append(now + self.RESPAWN_TIME)
+
+    def click(self, x, y):
+        """Clic gauche à la position (x, y) de la fenêtre : marche vers le point ou la ressource cliquée"""
+        self.advance()
+        self.clicks += 1
+        if self.state == "mining":
+            # Cliquer ailleurs interrompt la récolte
+            self.interrupted += 1
+            self.mining_node = None
+
+        point = self.to_world(x, y)
+        node = min(self.nodes, key=lambda n: math.hypot(n.x - point[0], n.y - point[1]), default=None)
+        if node is not None and math.hypot(node.x - point[0], node.y - point[1]) <= self.CLICK_RADIUS:
+            self.target = np.array((node.x, node.y))
+            self.target_node = node
+        else:
+            self.target = point
+            self.target_node = None
+        self.state = "moving"
+
+    def rotate(self, degrees):
+        """Fait tourner la vue autour du personnage"""
+        self.advance()
+        self.angle += math.radians(degrees)
+
+    def visible(self):
+        """
+        :return: Liste (x, y, type) des ressources visibles, en pixels de la fenêtre.
+        """
+        self.advance()
+        margin = self.SPRITE_RADIUS
+        visible = []
+        for node in self.nodes:
+            if node is self.mining_node:
+                continue
+            x, y = self.to_screen(node.x, node.y)
+            if margin <= x < self.width - margin and margin <= y < self.height - margin:
+                visible.append((x, y, node.resource))
+        return visible
+
+    def render(self, bounds=None):
+        """
+        :param bounds: Zone (x0, y0, x1, y1) à rendre, en pixels de la fenêtre (None = fenêtre entière).
+        :return: Image BGRA de la zone à l'instant courant (tampon réutilisé par zone).
+        """
+        bounds = tuple(bounds) if bounds is not None else (0, 0, self.width, self.height)
+        now = self.clock.now()
+        if self._rendered_at.get(bounds) == now:
+            return self._frames[bounds]
+
+        visible = self.visible()
+        x0, y0, x1, y1 = bounds
+        frame = self._frames.get(bounds)
+        if frame is None:
+            frame = self._frames[bounds] = np.empty((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+
+        # Le sol défile avec le personnage (translation seule, la rotation de la vue n'est pas rendue)
+        shift_x, shift_y = self.to_screen(0.0, 0.0)
+        top = (y0 - int(round(shift_y))) % self.height
+        left = (x0 - int(round(shift_x))) % self.width
+        np.copyto(frame, self._ground[top:top + y1 - y0, left:left + x1 - x0])
+
+        for x, y, resource in visible:
+            center = (int(round(x)) - x0, int(round(y)) - y0)
+            cv.circle(frame, center, self.SPRITE_RADIUS, self.COLORS[resource], -1)
+            cv.circle(frame, center, self.SPRITE_RADIUS, (20, 20, 20, 255), 2)
+
+        character = (int(round(self.character_screen[0])) - x0, int(round(self.character_screen[1])) - y0)
+        cv.circle(frame, character, 12, (200, 80, 30, 255), -1)
+
+        if self.state == "mining":
+            progress = (now - self.mining_started) / max(self.mining_ends - self.mining_started, 1e-6)
+            self._draw_bar(frame, min(max(progress, 0.0), 1.0), origin=(x0, y0))
+
+        self._rendered_at[bounds] = now
+        return frame
+
+    def _render_background(self):
+        # Texture du sol : le bruit évite que la barre corresponde à une zone unie
+        noise = self.rng.integers(0, 40, size=(self.height, self.width), dtype=np.uint8)
+        background = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        background[..., 0] = 40 + noise
+        background[..., 1] = 90 + noise
+        background[..., 2] = 70 + noise
+        background[..., 3] = 255
+        return cv.GaussianBlur(background, (5, 5), 0)
+
+    def _draw_bar(self, frame, progress, origin=(0, 0)):
+        x0, y0, x1, y1 = self.bar.bounds(self.width, self.height)
+        x0, x1 = x0 - origin[0], x1 - origin[0]
+        y0, y1 = y0 - origin[1], y1 - origin[1]
+        height = y1 - y0
+
+        # Cadre fixe à rayures (haut de la région), puis remplissage selon l'avancement (bas)
+        cv.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), (25, 25, 25, 255), -1)
+        cv.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), (210, 210, 210, 255), 1)
+        stripe = max(1, height // 12)
+        for row in range(y0 + stripe, y0 + height // 2, 2 * stripe):
+            cv.rectangle(frame, (x0 + 2, row), (x1 - 3, row + stripe - 1), (170, 170, 170, 255), -1)
+
+        fill = int((x1 - x0 - 4) * progress)
+        if fill > 0:
+            cv.rectangle(frame, (x0 + 2, y0 + 2 * height // 3), (x0 + 1 + fill, y1 - 3), (0, 140, 255, 255), -1)
+
+    def mining_bar_template(self, size):
+        """
+        Modèle de la barre en niveaux de gris, tel qu'Interaction le compare.
+
+        :param size: Taille (largeur, hauteur) de la région de la barre dans l'espace de référence.
+        :return: Partie fixe de la barre (cadre à rayures), indépendante de l'avancement.
+        """
+        frame = self._background.copy()
+        self._draw_bar(frame, 0.0)
+        x0, y0, x1, y1 = self.bar.bounds(self.width, self.height)
+        gray = cv.cvtColor(frame[y0:y1, x0:x1], cv.COLOR_RGBA2GRAY)
+        gray = cv.resize(gray, size, interpolation=cv.INTER_AREA)
+        width, height = size
+        return gray[1:height // 2, 1:width - 1].copy()
@@ -0,0 +1,98 @@
+"""
+Simulateur de la boucle de récolte.
+
+Assemble une GatheringScene et les périphériques simulés autour de la vraie
+classe Interaction, exécute run_gathering_loop() sur une durée simulée et
+mesure le rendement : ressources par heure simulée, temps d'inactivité du
+personnage et temps passé dans chaque état, côté bot et côté scène.
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from Application.Interaction.interaction import Interaction
+from Application.Simulation.devices import SimulatedAntiDetection, SimulatedCapture, SimulatedClock, \
+    SimulatedDetection, SimulatedInput
+from Application.Simulation.scene import GatheringScene
+
+
+class GatheringSimulator:
+    """Interaction exécutée sans écran contre une scène synthétique"""
+
+    def __init__(self, seed=0, window=(1280, 720), resources=12, inference_time=0.05, miss_rate=0.05,
+                 jitter=4.0, inventory_limit=None):
+        """
+        :param seed: Graine de la scène, de la détection et des tirages d'Interaction.
+        :param window: Taille (largeur, hauteur) de la fenêtre simulée.
+        :param resources: Nombre de ressources présentes dans le monde.
+        :param inference_time: Durée simulée d'une prédiction, en secondes.
+        :param miss_rate: Probabilité qu'une ressource visible ne soit pas détectée.
+        :param jitter: Bruit de position des détections, en pixels de fenêtre.
+        :param inventory_limit: Limite d'inventaire d'Interaction (None = illimitée : pas de retour en ville simulé).
+        """
+        # Interaction tire ses délais et pauses dans le module random
+        random.seed(seed)
+
+        self.clock = SimulatedClock()
+        self.scene = GatheringScene(self.clock, np.random.default_rng(seed), Interaction.MINING_BAR_BOUNDS,
+                                    window=window, resources=resources, reference=SimulatedDetection.IMG_SIZE)
+        self.capture = SimulatedCapture(self.scene)
+        self.inputs = SimulatedInput(self.scene, self.clock)
+        self.model = SimulatedDetection(self.scene, self.capture, self.clock, inference_time=inference_time,
+                                        miss_rate=miss_rate, jitter=jitter, seed=seed)
+
+        _, _, width, height = Interaction.MINING_BAR_BOUNDS
+        self.interaction = Interaction(
+            self.model,
+            clock=self.clock,
+            inputs=self.inputs,
+            anti_detection=SimulatedAntiDetection(self.inputs, self.clock),
+            mining_bar_template=self.scene.mining_bar_template((width, height))
+        )
+        self.interaction.INVENTORY_LIMIT = sys.maxsize if inventory_limit is None else inventory_limit
+
+        # Temps simulé attribué à l'état du bot pendant lequel il s'écoule
+        self.time_in_state = dict.fromkeys(Interaction.STATES, 0.0)
+        self.clock.observers.append(self._account)
+
+    def _account(self, seconds):
+        self.time_in_state[self.interaction.state] += seconds
+
+    def run(self, hours=1.0):
+        """
+        Exécute la boucle de récolte pendant `hours` heures simulées (ou jusqu'à l'inventaire plein).
+
+        :return: Rapport (voir report()).
+        """
+        started_at = time.perf_counter()
+        self.interaction.run_gathering_loop(max_resources=sys.maxsize, max_time_minutes=hours * 60)
+        return self.report(time.perf_counter() - started_at)
+
+    def report(self, wall_time):
+        """
+        :param wall_time: Durée réelle de la simulation, en secondes.
+        :return: Dictionnaire sérialisable en JSON.
+        """
+        self.scene.advance()
+        simulated = self.clock.now()
+        hours = simulated / 3600
+
+        return {
+            "simulated_s": simulated,
+            "wall_s": wall_time,
+            "speedup": simulated / wall_time if wall_time else 0.0,
+            "resources": self.interaction.resources_gathered,
+            "resources_per_hour": self.interaction.resources_gathered / hours if hours else 0.0,
+            "mined": self.scene.mined,
+            "idle_s": self.scene.time_in_state["idle"],
+            "idle_share": self.scene.time_in_state["idle"] / simulated if simulated else 0.0,
+            "bot_states": self.time_in_state,
+            "character_states": self.scene.time_in_state,
+            "predictions": self.model.predictions,
+            "clicks": self.scene.clicks,
+            "interrupted": self.scene.interrupted,
+            "inputs": self.inputs.events,
+        }
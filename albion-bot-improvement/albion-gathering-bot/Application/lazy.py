@@ -0,0 +1,57 @@
+"""
+Imports différés des dépendances lourdes (torch, torchvision, OpenCV).
+
+    torch = lazy_import("torch")
+
+Le module n'est réellement importé qu'au premier accès à l'un de ses attributs,
+ce qui garde rapides `--help`, les erreurs d'arguments et l'ouverture de
+l'interface graphique. Après ce premier accès, les attributs sont copiés sur le
+proxy : les appels suivants ne coûtent pas plus qu'avec un import classique.
+"""
+
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Proxy de module qui importe le vrai module au premier accès"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    # Attributs copiés sur le proxy : __getattr__ n'est plus appelé ensuite
+                    self.__dict__.update(
+                        (key, value) for key, value in module.__dict__.items() if key not in ("__name__", "__spec__")
+                    )
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self):
+        """Vrai si le module a déjà été importé"""
+        return self.__dict__["_lazy_module"] is not None
+
+
+def lazy_import(name):
+    """
+    Renvoie un proxy du module `name`, importé au premier accès.
+
+    :param name: Nom complet du module (par exemple "torch" ou "cv2").
+    """
+    return LazyModule(name)
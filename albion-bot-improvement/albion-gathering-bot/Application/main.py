@@ -2,21 +2,22 @@ import os
 import sys
 import logging
 import argparse
-import cv2 as cv
+import importlib.util
 import time
 import random
 from time import sleep
 
-from Albion.detection import AlbionDetection
-from Application.Interaction.interaction import Interaction
-from Application.AntiDetection import get_anti_detection_manager
+from Application.lazy import lazy_import
+from Albion.backends import BACKENDS
+from Albion.resolution import ResolutionController
+from Albion.variants import VariantSelector
 
-# Vérifier si PyQt5 est disponible pour l'interface graphique
-try:
-    from Application.GUI.main_window import run_gui
-    GUI_AVAILABLE = True
-except ImportError:
-    GUI_AVAILABLE = False
+# OpenCV, torch et le code de détection ne sont importés qu'une fois le mode choisi :
+# --help et les erreurs d'arguments restent instantanés
+cv = lazy_import("cv2")
+
+# Vérifier si PyQt5 est disponible pour l'interface graphique (sans l'importer)
+GUI_AVAILABLE = importlib.util.find_spec("PyQt5") is not None
 
 # Configuration du logging
 logging.basicConfig(
@@ -54,6 +55,62 @@ def parse_arguments():
     parser.add_argument('--model', type=str, default="best.pt",
                         help='Chemin vers le fichier modèle YOLOv5')
 
+    parser.add_argument('--background-capture', action='store_true',
+                        help='Capture la fenêtre en continu dans un thread séparé pour masquer la latence de capture')
+
+    parser.add_argument('--cache-max-age', type=float, default=0.0,
+                        help='Âge maximal (s) des détections réutilisées quand l\'image ne change pas '
+                             '(désactivé par défaut, 0.5 est une valeur raisonnable)')
+
+    parser.add_argument('--cache-threshold', type=float, default=6.0,
+                        help='Écart maximal par bloc (0-255) pour considérer deux images identiques')
+
+    parser.add_argument('--replay', type=str, default=None,
+                        help='Rejoue un dossier d\'images, une vidéo ou une session enregistrée au lieu de capturer le jeu')
+
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help='Vitesse de rejeu (1.0 = temps réel, 0 = aussi vite que possible)')
+
+    parser.add_argument('--record', type=str, default=None,
+                        help='Enregistre chaque image capturée dans ce dossier pour un rejeu hors ligne '
+                             '(JPEG pleine résolution, avec perte, voir Capture/recorder.py)')
+
+    parser.add_argument('--backend', type=str, choices=BACKENDS, default='torch',
+                        help="Moteur d'inférence (les modèles exportés sont mis en cache au premier lancement)")
+
+    parser.add_argument('--track-interval', type=int, default=1,
+                        help="Inférence complète au plus toutes les N images, les ressources étant suivies entre deux (1 = désactivé)")
+
+    parser.add_argument('--attention', type=str, nargs='+', default=None, metavar='LxH',
+                        help="Inférence sur des fenêtres autour du personnage (ex: 1280x720) au lieu de la fenêtre entière réduite")
+
+    parser.add_argument('--attention-tiles', action='store_true',
+                        help="Découpe les fenêtres d'attention en tuiles à la résolution native du modèle")
+
+    parser.add_argument('--calibration', type=str, default=None,
+                        help="Session enregistrée servant à calibrer le modèle INT8 au premier lancement (backend onnxruntime-int8)")
+
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help="Temps d'inférence visé par image en ms : la taille d'entrée du modèle s'adapte (désactivé par défaut)")
+
+    parser.add_argument('--input-sizes', type=int, nargs='+', default=list(ResolutionController.SIZES),
+                        help="Tailles d'entrée possibles avec --latency-budget (multiples de 32)")
+
+    parser.add_argument('--variants', type=str, nargs='+', default=None,
+                        help="Fichiers de poids candidats : le plus rapide atteignant --accuracy-floor est retenu au premier lancement sur la machine")
+
+    parser.add_argument('--validation', type=str, default=VariantSelector.VALIDATION,
+                        help="Jeu de validation annoté (format YOLO) servant à évaluer les variantes, obligatoire avec plusieurs --variants")
+
+    parser.add_argument('--accuracy-floor', type=float, default=VariantSelector.ACCURACY_FLOOR,
+                        help="Score F1 minimal d'une variante sur le jeu de validation")
+
+    parser.add_argument('--async-workers', type=int, default=0,
+                        help="Nombre de workers d'inférence asynchrone (0 = prédiction synchrone)")
+
+    parser.add_argument('--metrics-interval', type=float, default=30.0,
+                        help='Intervalle en secondes entre deux résumés des latences par étape (0 = désactivé)')
+
     # Options anti-détection
     parser.add_argument('--safe-mode', action='store_true',
                         help='Active un mode encore plus sécurisé pour éviter la détection (mouvements plus lents, plus humains)')
@@ -68,6 +125,8 @@ def parse_arguments():
 
 def setup_anti_detection(args):
     """Configure des mesures anti-détection pour l'anti-cheat"""
+    from Application.AntiDetection import get_anti_detection_manager
+
     # Obtenir l'instance du gestionnaire anti-détection
     anti_detection = get_anti_detection_manager()
 
@@ -108,6 +167,8 @@ def shutdown_anti_detection(anti_detection):
 
 def run_debug_mode(args):
     """Exécuter le mode de débogage pour visualiser la détection"""
+    from Albion.detection import AlbionDetection
+
     logger.info("Démarrage du mode débogage")
 
     # Configurer le système anti-détection
@@ -125,7 +186,24 @@ def run_debug_mode(args):
         model_name=args.model,
         debug=True,
         confidence=args.confidence,
-        window_name=args.window_name
+        window_name=args.window_name,
+        background_capture=args.background_capture,
+        cache_max_age=args.cache_max_age,
+        cache_threshold=args.cache_threshold,
+        capture_source=args.replay,
+        replay_speed=args.replay_speed,
+        record_path=args.record,
+        metrics_interval=args.metrics_interval,
+        backend=args.backend,
+        track_interval=args.track_interval,
+        attention=args.attention,
+        attention_tiles=args.attention_tiles,
+        calibration=args.calibration,
+        latency_budget=args.latency_budget,
+        input_sizes=args.input_sizes,
+        variants=args.variants,
+        validation=args.validation,
+        accuracy_floor=args.accuracy_floor
     )
 
     logger.info(f"Modèle chargé avec un seuil de confiance de {args.confidence}")
@@ -161,10 +239,15 @@ def run_debug_mode(args):
         logger.error(f"Erreur en mode débogage: {e}")
     finally:
         cv.destroyAllWindows()
+        model.close()
         shutdown_anti_detection(anti_detection)
 
 def run_gathering_mode(args):
     """Exécuter le mode de récolte automatique"""
+    from Albion.detection import AlbionDetection
+    from Application.Interaction.interaction import Interaction
+    from Application.Interaction.runtime import GatheringRuntime
+
     logger.info("Démarrage du mode récolte")
 
     # Configurer le système anti-détection
@@ -177,23 +260,48 @@ def run_gathering_mode(args):
     # Démarrer avec un délai pour laisser le temps de revenir au jeu
     sleep(2)
 
+    model = None
+
     try:
         # Initialiser le modèle et l'interaction
         model = AlbionDetection(
             model_name=args.model,
             debug=args.debug,
             confidence=args.confidence,
-            window_name=args.window_name
+            window_name=args.window_name,
+            background_capture=args.background_capture,
+            cache_max_age=args.cache_max_age,
+            cache_threshold=args.cache_threshold,
+            capture_source=args.replay,
+            replay_speed=args.replay_speed,
+            record_path=args.record,
+            metrics_interval=args.metrics_interval,
+            backend=args.backend,
+            track_interval=args.track_interval,
+            attention=args.attention,
+            attention_tiles=args.attention_tiles,
+            calibration=args.calibration,
+            latency_budget=args.latency_budget,
+            input_sizes=args.input_sizes,
+            variants=args.variants,
+            validation=args.validation,
+            accuracy_floor=args.accuracy_floor
         )
 
+        if args.async_workers > 0:
+            # Capture et inférence en continu : l'interaction lit le résultat le plus récent
+            model.start_pipeline(workers=args.async_workers, fps=AlbionDetection.PIPELINE_FPS)
+
         interaction = Interaction(model)
 
-        # Exécuter la boucle de récolte
+        # Exécuter la session de récolte (asyncio : Ctrl+C interrompt l'attente en cours)
         logger.info(f"Début de la récolte (max: {args.max_resources} ressources, {args.max_time} minutes)")
-        interaction.run_gathering_loop(
+        GatheringRuntime(
+            interaction,
             max_resources=args.max_resources,
-            max_time_minutes=args.max_time
-        )
+            max_time_minutes=args.max_time,
+            detection=args.async_workers > 0
+        ).run()
 
     except KeyboardInterrupt:
         logger.info("Récolte arrêtée par l'utilisateur")
@@ -203,6 +311,11 @@ def run_gathering_mode(args):
         # Nettoyer les fenêtres OpenCV si elles sont ouvertes
         cv.destroyAllWindows()
 
+        # Arrêter la capture (et finaliser un éventuel enregistrement)
+        if model:
+            logger.info(f"Latences par étape: {model.metrics.summary()}")
+            model.close()
+
         # Arrêter le système anti-détection
         shutdown_anti_detection(anti_detection)
 
@@ -210,6 +323,8 @@ def run_gathering_mode(args):
 
 def run_test_mode(args):
     """Mode de test pour vérifier la configuration et les fonctionnalités de base"""
+    from Albion.detection import AlbionDetection
+
     logger.info("Démarrage du mode test")
 
     # Configurer le système anti-détection
@@ -227,7 +342,14 @@ def run_test_mode(args):
             model_name=args.model,
             debug=True,
             confidence=args.confidence,
-            window_name=args.window_name
+            window_name=args.window_name,
+            backend=args.backend,
+            calibration=args.calibration,
+            latency_budget=args.latency_budget,
+            input_sizes=args.input_sizes,
+            variants=args.variants,
+            validation=args.validation,
+            accuracy_floor=args.accuracy_floor
         )
 
         print("Test du système anti-détection...")
@@ -278,6 +400,7 @@ def run_gui_mode():
 
     try:
         logger.info("Démarrage de l'interface graphique")
+        from Application.GUI.main_window import run_gui
         run_gui()
     except Exception as e:
         logger.error(f"Erreur lors du démarrage de l'interface graphique: {e}")
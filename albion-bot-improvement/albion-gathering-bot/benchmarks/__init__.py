@@ -0,0 +1,6 @@
+"""
+Benchmarks de performance du bot de récolte Albion.
+
+Chaque module s'exécute depuis la racine du projet, par exemple :
+    python -m benchmarks.capture_benchmark
+"""
@@ -0,0 +1,103 @@
+"""
+Compare l'inférence sur la fenêtre entière réduite et sur des fenêtres
+d'attention autour du personnage, sur une session enregistrée.
+
+Pour chaque configuration, le benchmark relève la latence de détection par
+image, le nombre de passes du modèle, et le nombre moyen de détections, dont
+les petites (moins de 32x32 pixels de la fenêtre) que la réduction de l'image
+entière fait le plus souvent disparaître.
+
+Utilisation:
+    python -m benchmarks.attention_benchmark --source chemin/vers/une/session --model best.pt
+    python -m benchmarks.attention_benchmark --source session --configs 1280x720 960x540 tiles:1280x720
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Application.Albion.detection import AlbionDetection
+from Application.Albion.attention import AttentionWindows
+
+SMALL_OBJECT = 32 * 32  # pixels de la fenêtre
+
+
+def measure(detection, frames, context):
+    """
+    :return: Tuple (latences en ms, détections par image, petites détections par image).
+    """
+    latencies = np.empty(len(frames))
+    counts = np.empty(len(frames))
+    small = np.empty(len(frames))
+    for i, image in enumerate(frames):
+        start = time.perf_counter()
+        _, _, _, _, detections = detection.detect(image, context)
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+        # Aire des boîtes en pixels de la fenêtre
+        height, width = image.shape[:2]
+        box = detections["box"]
+        area = (box[:, 2] - box[:, 0]) * (box[:, 3] - box[:, 1]) * (width * height) / detection.IMG_SIZE ** 2
+        counts[i] = len(detections)
+        small[i] = np.count_nonzero(area < SMALL_OBJECT)
+    return latencies, counts, small
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark des fenêtres d'attention")
+    parser.add_argument('--source', type=str, required=True, help="Session enregistrée, dossier d'images ou vidéo")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--backend', type=str, default="torch", help="Moteur d'inférence")
+    parser.add_argument('--confidence', type=float, default=0.5, help="Seuil de confiance")
+    parser.add_argument('--configs', nargs='+', default=["960x540", "1280x720", "tiles:1280x720"],
+                        help="Fenêtres d'attention mesurées, LxH ou tiles:LxH (plusieurs séparées par des virgules)")
+    parser.add_argument('--frames', type=int, default=200, help="Nombre maximal d'images lues")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    detection = AlbionDetection(
+        model_name=args.model,
+        confidence=args.confidence,
+        capture_source=args.source,
+        cache_max_age=0,
+        metrics_interval=0,
+        backend=args.backend,
+        warmup=False
+    )
+
+    rows = []
+    try:
+        source = detection.window_capture.source
+        count = min(args.frames, len(source))
+        frames = [frame for frame in (source.read(i) for i in range(count)) if frame is not None]
+
+        configs = [("image entière", None, False)]
+        for config in args.configs:
+            tiles = config.startswith("tiles:")
+            configs.append((config, config.split(":", 1)[-1].split(","), tiles))
+
+        for name, crops, tiles in configs:
+            detection.attention = AttentionWindows(crops, detection.IMG_SIZE, tiles=tiles) if crops else None
+            context = detection.new_context()
+            for image in frames[:3]:
+                detection.detect(image, context)
+
+            height, width = frames[0].shape[:2]
+            passes = len(detection.attention.regions(width, height, width / 2, height / 2)) if crops else 1
+            rows.append((name, passes) + measure(detection, frames, context))
+    finally:
+        detection.close()
+
+    print(f"{len(frames)} images de '{args.source}' ({frames[0].shape[1]}x{frames[0].shape[0]})")
+    print(f"{'configuration':<22}{'passes':>8}{'p50 ms':>10}{'p95 ms':>10}{'détections':>12}{'petites':>10}")
+    for name, passes, latencies, counts, small in rows:
+        print(f"{name:<22}{passes:>8}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+              f"{counts.mean():>12.2f}{small.mean():>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
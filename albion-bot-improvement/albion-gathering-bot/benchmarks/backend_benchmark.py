@@ -0,0 +1,82 @@
+"""
+Compare la latence d'inférence des moteurs disponibles (PyTorch, TorchScript,
+ONNX Runtime, OpenVINO) sur la même entrée, NMS comprise.
+
+Les modèles exportés sont créés au premier lancement puis lus depuis le cache.
+
+Utilisation:
+    python -m benchmarks.backend_benchmark --model best.pt --frames 100
+    python -m benchmarks.backend_benchmark --backends torch onnxruntime
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from Application.Albion.backends import BACKENDS, load_backend
+from Application.Albion.postprocess import non_max_suppression
+
+IMG_SIZE = 640
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs d'inférence")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--frames', type=int, default=100, help="Nombre d'inférences mesurées par moteur")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--threads', type=int, default=None, help="Threads PyTorch (par défaut: automatique)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    torch_model = None
+
+    def load_torch_model():
+        nonlocal torch_model
+        if torch_model is None:
+            torch_model = torch.hub.load('yolov5', 'custom', path=args.model, source="local", verbose=False)
+            torch_model.eval()
+        return torch_model
+
+    rng = np.random.default_rng(0)
+    tensor = torch.from_numpy(rng.random((1, 3, IMG_SIZE, IMG_SIZE), dtype=np.float32))
+
+    results = {}
+    reference = None
+    for name in args.backends:
+        try:
+            backend = load_backend(name, args.model, IMG_SIZE, load_torch_model)
+        except Exception as e:
+            print(f"{name:<12} indisponible: {e}")
+            continue
+
+        for _ in range(5):
+            backend(tensor)
+
+        latencies = np.empty(args.frames)
+        for i in range(args.frames):
+            start = time.perf_counter()
+            detections = non_max_suppression(backend(tensor), 0.25, 0.45)
+            latencies[i] = (time.perf_counter() - start) * 1000
+
+        # Même contrat de sortie : les boîtes doivent concorder avec le premier moteur mesuré
+        raw = backend(tensor)
+        raw = raw[0] if isinstance(raw, (list, tuple)) else raw
+        difference = 0.0 if reference is None else float((raw.float() - reference).abs().max())
+        reference = raw.float() if reference is None else reference
+
+        results[name] = (np.percentile(latencies, 50), np.percentile(latencies, 95), len(detections), difference)
+
+    print(f"{'moteur':<12}{'p50 ms':>10}{'p95 ms':>10}{'fps':>10}{'détections':>12}{'écart max':>12}")
+    for name, (p50, p95, count, difference) in results.items():
+        print(f"{name:<12}{p50:>10.2f}{p95:>10.2f}{1000 / p50:>10.1f}{count:>12}{difference:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
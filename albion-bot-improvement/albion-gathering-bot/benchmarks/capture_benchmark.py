@@ -0,0 +1,112 @@
+"""
+Compare la latence et le taux d'allocation par image entre l'ancienne capture
+(un contexte mss et un tableau NumPy neufs à chaque appel) et la session de
+capture persistante.
+
+Utilisation:
+    python -m benchmarks.capture_benchmark --frames 200 --width 1280 --height 720
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from mss import mss
+
+from Application.Capture.session import CaptureSession
+
+
+def legacy_grab(region):
+    """Chemin historique de Capture.screenshot()"""
+    with mss() as sct:
+        return np.array(sct.grab(region))
+
+
+def measure(grab, region, frames, warmup=5):
+    """
+    Mesure une fonction de capture.
+
+    La latence est mesurée sans traçage, puis une seconde passe sous tracemalloc
+    relève la mémoire allouée transitoirement par image (pic au-dessus de la
+    mémoire vivante avant l'appel).
+
+    :return: Dictionnaire avec les percentiles de latence (ms) et les allocations par image.
+    """
+    for _ in range(warmup):
+        grab(region)
+
+    latencies = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        grab(region)
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    allocated = np.empty(frames)
+    retained = None
+    tracemalloc.start()
+    try:
+        for i in range(frames):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            grab(region)
+            current, peak = tracemalloc.get_traced_memory()
+            allocated[i] = peak - before
+            retained = current
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "fps": float(1000 / latencies.mean()),
+        "alloc_kib_per_frame": float(allocated.mean() / 1024),
+        "retained_kib": (retained or 0) / 1024,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark de capture d'écran")
+    parser.add_argument('--frames', type=int, default=200, help="Nombre d'images mesurées par chemin")
+    parser.add_argument('--left', type=int, default=0)
+    parser.add_argument('--top', type=int, default=0)
+    parser.add_argument('--width', type=int, default=None, help="Largeur (par défaut: écran principal)")
+    parser.add_argument('--height', type=int, default=None, help="Hauteur (par défaut: écran principal)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    with mss() as sct:
+        monitor = sct.monitors[1]
+
+    region = {
+        "top": args.top or monitor["top"],
+        "left": args.left or monitor["left"],
+        "width": args.width or monitor["width"],
+        "height": args.height or monitor["height"],
+    }
+
+    session = CaptureSession()
+    try:
+        results = {
+            "legacy": measure(legacy_grab, region, args.frames),
+            "session": measure(session.grab, region, args.frames),
+        }
+    finally:
+        session.close()
+
+    print(f"Région: {region['width']}x{region['height']} - {args.frames} images")
+    print(f"{'chemin':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'fps':>10}{'KiB alloués/img':>18}")
+    for name, res in results.items():
+        print(f"{name:<10}{res['p50_ms']:>10.2f}{res['p95_ms']:>10.2f}{res['p99_ms']:>10.2f}"
+              f"{res['fps']:>10.1f}{res['alloc_kib_per_frame']:>18.1f}")
+
+    gain = results["legacy"]["p50_ms"] - results["session"]["p50_ms"]
+    print(f"\nGain médian par image: {gain:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark hors ligne de la détection sur un jeu d'images annotées.
+
+AlbionDetection est exécuté par le chemin de rejeu (capture, prétraitement,
+suivi, inférence, post-traitement) sur chaque image d'un dossier annoté au
+format YOLO (voir Application.Albion.dataset.LabelledFrames). Le rapport donne
+le débit, les percentiles de latence par étape, le temps de démarrage, le pic de
+mémoire résidente, les allocations de tampons de capture et la précision /
+le rappel par classe par rapport aux annotations. Le rapport JSON permet de
+comparer deux exécutions.
+
+Utilisation:
+    python -m benchmarks.detection_benchmark --dataset ressources/validation --model best.pt
+    python -m benchmarks.detection_benchmark --dataset validation --backend onnxruntime --json detection.json
+    python -m benchmarks.detection_benchmark --dataset validation --trace-allocations
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from Application.Albion.backends import BACKENDS
+from Application.Albion.dataset import LabelledFrames
+from Application.Albion.detection import AlbionDetection
+from Application.Albion.evaluation import ClassCounts
+from Application.Albion.metrics import PipelineMetrics
+from Application.Albion.variants import machine_profile
+from benchmarks.evaluation import print_report
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus, en Mo"""
+    try:
+        import resource
+    except ImportError:
+        # Windows : pic de l'ensemble de travail
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, Ko ailleurs
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def detection_rows(detections):
+    """Détections structurées -> tableau (n, 6) [x1, y1, x2, y2, confiance, classe] de l'espace du modèle"""
+    rows = np.empty((len(detections), 6), dtype=np.float32)
+    rows[:, :4] = detections["box"]
+    rows[:, 4] = detections["conf"]
+    rows[:, 5] = detections["cls"]
+    return rows
+
+
+def run(args):
+    """
+    :return: Rapport du benchmark (dictionnaire sérialisable en JSON).
+    """
+    frames = LabelledFrames(args.dataset)
+    if not len(frames):
+        raise ValueError(f"Aucune image dans '{args.dataset}'")
+
+    # Démarrage : chargement du modèle (depuis le cache) et préchauffage
+    started_at = time.perf_counter()
+    detection = AlbionDetection(
+        model_name=args.model,
+        confidence=args.confidence,
+        capture_source=frames.directory,
+        replay_speed=0.0,
+        cache_max_age=args.cache_max_age,
+        metrics_interval=0,
+        backend=args.backend,
+        track_interval=args.track_interval,
+        attention=args.attention,
+        attention_tiles=args.attention_tiles,
+        calibration=args.calibration,
+        latency_budget=args.latency_budget
+    )
+    detection.wait_until_ready()
+    startup = time.perf_counter() - started_at
+
+    # Une fenêtre couvrant toute la passe : percentiles sur chaque image
+    detection.metrics = PipelineMetrics(window=len(frames), log_interval=0)
+    pool = detection.window_capture.session.pool
+    allocations_before = pool.allocations
+
+    if args.trace_allocations:
+        tracemalloc.start()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        # Mémoire allouée au pic de chaque image, au-delà de celle déjà occupée avant l'image
+        per_frame = []
+
+    counts = ClassCounts()
+    size = AlbionDetection.IMG_SIZE
+    processed = 0
+    try:
+        started_at = time.perf_counter()
+        while True:
+            if args.trace_allocations:
+                frame_before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            _, _, _, img = detection.predict()
+            frame = detection.last_frame
+            if img is None or frame is None or frame.image is None:
+                break
+            if args.trace_allocations:
+                per_frame.append(tracemalloc.get_traced_memory()[1] - frame_before)
+            counts.add(detection_rows(detection.last_detections), frames.labels(frame.index, size))
+            processed += 1
+        elapsed = time.perf_counter() - started_at
+    finally:
+        if args.trace_allocations:
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        detection.close()
+
+    report = {
+        "dataset": args.dataset,
+        "model": detection.model_name,
+        "backend": args.backend,
+        "machine": machine_profile(),
+        "frames": processed,
+        "startup_s": startup,
+        "throughput_fps": processed / elapsed if elapsed else 0.0,
+        "stages": {name: stats for name, stats in detection.metrics.stats().items() if stats is not None},
+        "peak_rss_mb": peak_rss_mb(),
+        "allocations": {"frame_buffers": pool.allocations - allocations_before},
+        "classes": counts.report(detection.backend.names),
+    }
+    if args.trace_allocations:
+        report["allocations"]["peak_kb"] = (traced_peak - traced_before) / 1024
+        report["allocations"]["retained_kb"] = (traced_after - traced_before) / 1024
+        if per_frame:
+            report["allocations"]["per_frame_kb"] = float(np.median(per_frame)) / 1024
+            report["allocations"]["per_frame_max_kb"] = max(per_frame) / 1024
+    if detection.resolution:
+        report["input_size"] = detection.metrics.gauge_stats("input_size")
+    return report
+
+
+def print_summary(report):
+    print(f"{report['frames']} images de '{report['dataset']}' - modèle {report['model']} (backend {report['backend']})")
+    print(f"Démarrage {report['startup_s']:.2f} s | débit {report['throughput_fps']:.1f} images/s | "
+          f"pic RSS {report['peak_rss_mb']:.0f} Mo")
+
+    allocations = report["allocations"]
+    line = f"Tampons de capture alloués pendant la passe: {allocations['frame_buffers']}"
+    if "peak_kb" in allocations:
+        line += f" | tracemalloc pic {allocations['peak_kb']:.0f} Ko, conservé {allocations['retained_kb']:.0f} Ko"
+    if "per_frame_kb" in allocations:
+        line += f", par image {allocations['per_frame_kb']:.1f} Ko (max {allocations['per_frame_max_kb']:.1f})"
+    print(line)
+
+    print(f"\n{'étape':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'moy ms':>10}{'images':>9}")
+    for name, stats in report["stages"].items():
+        print(f"{name:<14}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+              f"{stats['mean']:>10.2f}{stats['count']:>9}")
+
+    print("\nPrécision / rappel par rapport aux annotations:")
+    print_report(report["classes"])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de la détection sur des images annotées")
+    parser.add_argument('--dataset', type=str, required=True,
+                        help="Dossier d'images annotées au format YOLO (à plat ou images/ + labels/)")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--backend', type=str, choices=BACKENDS, default="torch", help="Moteur d'inférence")
+    parser.add_argument('--confidence', type=float, default=0.5, help="Seuil de confiance")
+    parser.add_argument('--cache-max-age', type=float, default=0.0,
+                        help="Âge maximal des détections réutilisées (0 = inférence sur chaque image)")
+    parser.add_argument('--track-interval', type=int, default=1, help="Inférence complète au plus toutes les N images")
+    parser.add_argument('--attention', type=str, nargs='+', default=None, metavar='LxH',
+                        help="Fenêtres d'attention autour du personnage")
+    parser.add_argument('--attention-tiles', action='store_true', help="Tuiles à la résolution native du modèle")
+    parser.add_argument('--calibration', type=str, default=None, help="Session de calibration INT8")
+    parser.add_argument('--latency-budget', type=float, default=None, help="Budget de latence d'inférence en ms")
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help="Mesure les allocations Python/NumPy avec tracemalloc (ralentit les latences)")
+    parser.add_argument('--json', type=str, default=None, help="Écrit le rapport dans ce fichier JSON")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    report = run(args)
+    print_summary(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRapport écrit dans '{args.json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Affichage des rapports de précision / rappel par classe des benchmarks.
+
+Le comptage lui-même est fait par Application.Albion.evaluation.ClassCounts,
+partagé avec la sélection automatique des variantes du modèle.
+"""
+
+def print_report(report):
+    """Affiche un rapport de ClassCounts.report() sous forme de tableau"""
+    print(f"{'classe':<24}{'précision':>11}{'rappel':>9}{'F1':>7}{'prédites':>10}{'attendues':>11}")
+    for label, scores in report.items():
+        print(f"{label:<24}{scores['precision']:>11.3f}{scores['recall']:>9.3f}{scores['f1']:>7.3f}"
+              f"{scores['predicted']:>10}{scores['expected']:>11}")
@@ -0,0 +1,99 @@
+"""
+Mesure le temps d'import des points d'entrée (CLI, interface graphique,
+détection) dans des interpréteurs neufs, avec le rapport `-X importtime` de
+Python, et vérifie que torch, torchvision et OpenCV ne sont pas chargés avant
+d'en avoir besoin.
+
+Utilisation:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules Application.main --top 15 --runs 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ("Application.main", "Application.GUI.main_window", "Application.Albion.detection")
+HEAVY_MODULES = ("torch", "torchvision", "cv2", "PyQt5.QtWidgets", "pyautogui")
+
+
+def run_import(module):
+    """
+    Importe un module dans un interpréteur neuf avec -X importtime.
+
+    :return: Liste de tuples (module, self µs, cumulé µs) dans l'ordre du rapport.
+    """
+    # main.py importe à la fois « Application.* » et « Albion.* »
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "Application")]))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "erreur inconnue"
+        raise RuntimeError(f"Import de {module} impossible: {error}")
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def analyse(module, runs):
+    """
+    :return: Dictionnaire avec le temps d'import médian (ms), les modules les plus
+             coûteux du dernier passage et les modules lourds importés.
+    """
+    totals = []
+    entries = []
+    for _ in range(runs):
+        entries = run_import(module)
+        # Le module demandé est la dernière entrée, son temps cumulé couvre tout l'import
+        totals.append(next(cumulative for name, _, cumulative in reversed(entries) if name == module))
+
+    imported = {name for name, _, _ in entries}
+    return {
+        "median_ms": float(np.median(totals)) / 1000,
+        "entries": entries,
+        "heavy": [name for name in HEAVY_MODULES if name in imported],
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark des temps d'import")
+    parser.add_argument('--modules', nargs='+', default=list(ENTRY_POINTS), help="Modules à importer")
+    parser.add_argument('--runs', type=int, default=3, help="Nombre d'interpréteurs neufs par module")
+    parser.add_argument('--top', type=int, default=10, help="Nombre de modules les plus coûteux affichés")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    for module in args.modules:
+        try:
+            result = analyse(module, args.runs)
+        except RuntimeError as e:
+            print(f"{module}: {e}\n")
+            continue
+
+        heavy = ", ".join(result["heavy"]) or "aucun"
+        print(f"{module}: {result['median_ms']:.1f} ms (médiane sur {args.runs}) - modules lourds chargés: {heavy}")
+
+        top = sorted(result["entries"], key=lambda entry: entry[2], reverse=True)[:args.top]
+        print(f"  {'cumulé ms':>10}{'propre ms':>11}  module")
+        for name, self_us, cumulative_us in top:
+            print(f"  {cumulative_us / 1000:>10.1f}{self_us / 1000:>11.1f}  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Contrôle des régressions de performance par rapport à une référence par machine.
+
+La référence d'une machine est un fichier JSON de benchmarks/baselines/, nommé
+d'après l'identifiant de son profil matériel (système, CPU, cœurs, GPU) et
+versionné avec le code : deux hôtes identiques partagent la même référence, le
+nom d'hôte n'y figure que pour l'affichage. Elle contient les métriques
+suivantes :
+
+    inference_p95_ms      p95 de l'étape d'inférence (benchmarks.detection_benchmark)
+    total_p95_ms          p95 du traitement complet d'une image
+    alloc_per_frame_kb    mémoire allouée au pic de chaque image (tracemalloc, médiane)
+    frame_buffers         tampons de capture alloués pendant la passe
+    startup_s             chargement du modèle et préchauffage
+    resources_per_hour    rendement de la boucle simulée (benchmarks.gathering_simulation)
+
+`record` mesure et écrit la référence, `compare` mesure à nouveau avec les mêmes
+paramètres, affiche le tableau des écarts et sort avec le code 1 si une métrique
+se dégrade au-delà de sa tolérance ou si une métrique de la référence n'a pas été
+mesurée. Les métriques de détection demandent un jeu d'images annotées
+(--dataset) ou un rapport existant (--detection) ; sans eux, seule la simulation
+est mesurée, et une référence qui contient des métriques de détection échoue.
+
+Une référence ne se versionne que depuis une machine de référence (matériel
+stable, pas une VM jetable) et avec les métriques de détection (--dataset) :
+une référence limitée à la simulation ne protège pas la latence du pipeline.
+
+Utilisation:
+    python -m benchmarks.perf_gate record --dataset validation --model best.pt
+    python -m benchmarks.perf_gate compare --dataset validation --model best.pt
+    python -m benchmarks.perf_gate compare --detection detection.json --simulation simulation.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from Application.Albion.backends import BACKENDS
+from Application.Albion.variants import machine_profile, profile_id
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Métrique -> (sens, tolérance relative, tolérance absolue) ; une métrique régresse
+# si elle se dégrade de plus que max(relative * |référence|, absolue)
+TOLERANCES = {
+    "inference_p95_ms": ("lower", 0.10, 1.0),
+    "total_p95_ms": ("lower", 0.10, 1.0),
+    "alloc_per_frame_kb": ("lower", 0.10, 4.0),
+    "frame_buffers": ("lower", 0.0, 0),
+    "startup_s": ("lower", 0.20, 0.25),
+    "resources_per_hour": ("higher", 0.05, 0.5),
+}
+
+SIMULATION_DEFAULTS = ["--hours", "1", "--seeds", "0", "1", "2"]
+
+
+def hardware_profile(profile):
+    """Profil de la machine sans le nom d'hôte, qui ne change pas les performances"""
+    return {key: value for key, value in profile.items() if key != "node"}
+
+
+def baseline_path(profile):
+    return os.path.join(BASELINE_DIR, f"{profile_id(hardware_profile(profile))}.json")
+
+
+def detection_metrics(report):
+    """Métriques d'un rapport de benchmarks.detection_benchmark"""
+    metrics = {"startup_s": report["startup_s"]}
+    stages = report.get("stages", {})
+    if "inference" in stages:
+        metrics["inference_p95_ms"] = stages["inference"]["p95"]
+    if "total" in stages:
+        metrics["total_p95_ms"] = stages["total"]["p95"]
+
+    allocations = report.get("allocations", {})
+    if "frame_buffers" in allocations:
+        metrics["frame_buffers"] = allocations["frame_buffers"]
+    if "per_frame_kb" in allocations:
+        metrics["alloc_per_frame_kb"] = allocations["per_frame_kb"]
+    return metrics
+
+
+def measure_detection(args):
+    """
+    :return: Tuple (métriques, paramètres) de la détection, ou ({}, None) sans jeu d'images.
+    """
+    if args.detection:
+        with open(args.detection, "r") as f:
+            return detection_metrics(json.load(f)), None
+    if not args.dataset:
+        return {}, None
+
+    from benchmarks import detection_benchmark
+
+    parameters = ["--dataset", args.dataset, "--model", args.model, "--backend", args.backend]
+    parser = detection_benchmark.build_parser()
+
+    # Latences et démarrage sans tracemalloc, puis une seconde passe pour les allocations
+    metrics = detection_metrics(detection_benchmark.run(parser.parse_args(parameters)))
+    traced = detection_metrics(detection_benchmark.run(parser.parse_args(parameters + ["--trace-allocations"])))
+    metrics["alloc_per_frame_kb"] = traced["alloc_per_frame_kb"]
+    return metrics, parameters
+
+
+def measure_simulation(args, parameters):
+    """
+    :return: Tuple (métriques, paramètres) de la boucle simulée, ou ({}, None) si désactivée.
+    """
+    if args.simulation:
+        with open(args.simulation, "r") as f:
+            report = json.load(f)
+        return {"resources_per_hour": report["summary"]["resources_per_hour"]}, None
+    if args.no_simulation:
+        return {}, None
+
+    from benchmarks import gathering_simulation
+
+    report = gathering_simulation.run(gathering_simulation.build_parser().parse_args(parameters))
+    return {"resources_per_hour": report["summary"]["resources_per_hour"]}, parameters
+
+
+def compare(baseline, current):
+    """
+    :return: Liste de tuples (métrique, référence, actuel, écart relatif, tolérance, statut).
+    """
+    rows = []
+    for name, (direction, relative, absolute) in TOLERANCES.items():
+        if name not in baseline and name not in current:
+            continue
+        reference, value = baseline.get(name), current.get(name)
+        if value is None:
+            # Une métrique de la référence qui n'est plus mesurée ne doit pas passer inaperçue
+            rows.append((name, reference, value, None, relative, "MANQUANTE"))
+            continue
+        if reference is None:
+            rows.append((name, reference, value, None, relative, "nouvelle"))
+            continue
+
+        # Dégradation positive : hausse pour "lower", baisse pour "higher"
+        worse = value - reference if direction == "lower" else reference - value
+        allowed = max(relative * abs(reference), absolute)
+        change = (value - reference) / abs(reference) if reference else 0.0
+        if worse > allowed:
+            status = "RÉGRESSION"
+        elif worse < -allowed:
+            status = "amélioration"
+        else:
+            status = "ok"
+        rows.append((name, reference, value, change, relative, status))
+    return rows
+
+
+def print_table(rows):
+    print(f"{'métrique':<22}{'référence':>12}{'actuel':>12}{'écart':>10}{'tolérance':>11}  statut")
+    for name, reference, value, change, relative, status in rows:
+        reference = "-" if reference is None else f"{reference:.2f}"
+        value = "-" if value is None else f"{value:.2f}"
+        change = "-" if change is None else f"{change:+.1%}"
+        print(f"{name:<22}{reference:>12}{value:>12}{change:>10}{f'±{relative:.0%}':>11}  {status}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Contrôle des régressions de performance")
+    parser.add_argument('command', choices=("record", "compare"),
+                        help="record: écrit la référence de cette machine, compare: compare à la référence")
+    parser.add_argument('--dataset', type=str, default=None, help="Images annotées pour les métriques de détection")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--backend', type=str, choices=BACKENDS, default="torch", help="Moteur d'inférence")
+    parser.add_argument('--detection', type=str, default=None,
+                        help="Rapport JSON de benchmarks.detection_benchmark à utiliser au lieu de mesurer")
+    parser.add_argument('--simulation', type=str, default=None,
+                        help="Rapport JSON de benchmarks.gathering_simulation à utiliser au lieu de simuler")
+    parser.add_argument('--no-simulation', action='store_true', help="Ne compare pas la boucle simulée")
+    parser.add_argument('--baseline', type=str, default=None,
+                        help="Fichier de référence (par défaut celui du profil de cette machine)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    profile = machine_profile()
+    path = args.baseline or baseline_path(profile)
+
+    baseline = None
+    if args.command == "compare":
+        if not os.path.exists(path):
+            print(f"Aucune référence pour cette machine ('{path}'), lancez d'abord: python -m benchmarks.perf_gate record")
+            sys.exit(2)
+        with open(path, "r") as f:
+            baseline = json.load(f)
+        if hardware_profile(baseline["profile"]) != hardware_profile(profile):
+            print(f"Attention: la référence a été mesurée sur une autre machine ({baseline['profile']})")
+
+    # La comparaison reprend les paramètres de simulation de la référence
+    simulation_parameters = (baseline or {}).get("simulation_parameters") or SIMULATION_DEFAULTS
+
+    current, detection_parameters = measure_detection(args)
+    simulation, simulation_parameters = measure_simulation(args, simulation_parameters)
+    current.update(simulation)
+
+    if args.command == "record":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "profile": profile,
+                "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "detection_parameters": detection_parameters,
+                "simulation_parameters": simulation_parameters,
+                "metrics": current,
+            }, f, indent=2, ensure_ascii=False)
+        for name, value in current.items():
+            print(f"{name:<22}{value:>12.2f}")
+        print(f"\nRéférence écrite dans '{path}', à versionner avec le code")
+        return
+
+    rows = compare(baseline["metrics"], current)
+    print(f"Référence du {baseline['recorded_at']} mesurée sur '{baseline['profile'].get('node')}' ('{path}')\n")
+    print_table(rows)
+
+    regressions = [row[0] for row in rows if row[5] == "RÉGRESSION"]
+    missing = [row[0] for row in rows if row[5] == "MANQUANTE"]
+    if regressions:
+        print(f"\n{len(regressions)} régression(s): {', '.join(regressions)}")
+    if missing:
+        print(f"\n{len(missing)} métrique(s) de la référence non mesurée(s): {', '.join(missing)} "
+              f"(--dataset ou --detection pour les métriques de détection)")
+    if regressions or missing:
+        sys.exit(1)
+    print("\nAucune régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare le coût par image de la sélection de la ressource la plus proche entre
+l'ancienne boucle Python (filtrage ligne par ligne puis closest_point()) et le
+tableau structuré vectorisé de postprocess (centres, distances, classement et
+coordonnées d'écran de toutes les détections).
+
+Les détections sont synthétiques, déjà passées par la NMS. L'ancien chemin
+opérait sur des lignes de tenseurs torch (.item() et .int() par ligne), plus
+lentes encore que les lignes NumPy utilisées ici.
+
+Utilisation:
+    python -m benchmarks.postprocess_benchmark --detections 20 --frames 2000
+"""
+
+import argparse
+from math import sqrt
+
+import numpy as np
+
+from Application.Albion.postprocess import to_detection_array, rank
+from benchmarks.capture_benchmark import measure
+
+IMG_SIZE = 640
+CONFIDENCE = 0.5
+ORIGIN = (IMG_SIZE / 2, IMG_SIZE / 2 - 60)
+WINDOW = (0, 0, 1920, 1080)  # left, top, width, height
+
+
+def to_screen(x, y):
+    left, top, width, height = WINDOW
+    return x * width / IMG_SIZE + left, y * height / IMG_SIZE + top
+
+
+def legacy_closest(rows):
+    """Chemin historique : _postprocess() puis closest_point() et conversion du seul point retenu"""
+    coordinates = [coord for coord in rows if coord[4].item() > CONFIDENCE]
+    if not coordinates:
+        return None
+
+    min_dist = float('inf')
+    position = 0
+    centers = []
+    for index, coord in enumerate(coordinates):
+        x1, y1, x2, y2 = coord[:4].astype(int)
+        center_x, center_y = ((x2 - x1) / 2) + x1, ((y2 - y1) / 2) + y1
+        computed = sqrt(abs(ORIGIN[0] - center_x) ** 2 + abs(ORIGIN[1] - center_y) ** 2)
+        if computed < min_dist:
+            min_dist = computed
+            position = index
+        centers.append((center_x, center_y, int(coord[5])))
+
+    center_x, center_y, resource_id = centers[position]
+    return to_screen(center_x, center_y) + (resource_id,)
+
+
+def vectorized_closest(rows):
+    """Tableau structuré classé par distance, coordonnées d'écran de tous les candidats"""
+    detections = rank(to_detection_array(rows, ORIGIN))
+    if not len(detections):
+        return None
+
+    screen_x, screen_y = to_screen(detections["center"][:, 0], detections["center"][:, 1])
+    detections["screen"][:, 0] = screen_x
+    detections["screen"][:, 1] = screen_y
+    return detections
+
+
+def synthetic_rows(count, classes, seed=0):
+    """Détections (count, 6) [x1, y1, x2, y2, confiance, classe] au-dessus du seuil"""
+    rng = np.random.default_rng(seed)
+    corner = rng.uniform(0, IMG_SIZE - 60, (count, 2))
+    size = rng.uniform(10, 60, (count, 2))
+    conf = rng.uniform(CONFIDENCE + 0.01, 1.0, (count, 1))
+    cls = rng.integers(0, classes, (count, 1))
+    return np.hstack((corner, corner + size, conf, cls)).astype(np.float32)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark du post-traitement des détections")
+    parser.add_argument('--detections', type=int, default=20, help="Nombre de détections par image")
+    parser.add_argument('--classes', type=int, default=8, help="Nombre de classes")
+    parser.add_argument('--frames', type=int, default=2000, help="Nombre d'images mesurées par chemin")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    rows = synthetic_rows(args.detections, args.classes)
+
+    results = {
+        "legacy": measure(legacy_closest, rows, args.frames),
+        "vectorized": measure(vectorized_closest, rows, args.frames),
+    }
+
+    print(f"{args.detections} détections par image - {args.frames} images")
+    print(f"{'chemin':<12}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}{'KiB alloués/img':>18}")
+    for name, res in results.items():
+        print(f"{name:<12}{res['p50_ms'] * 1000:>10.1f}{res['p95_ms'] * 1000:>10.1f}{res['p99_ms'] * 1000:>10.1f}"
+              f"{res['alloc_kib_per_frame']:>18.1f}")
+
+    # Même ressource retenue (à l'arrondi entier des boîtes près dans l'ancien chemin)
+    legacy = legacy_closest(rows)
+    nearest = vectorized_closest(rows)[0]
+    print(f"\nRessource la plus proche: ancienne classe {legacy[2]}, vectorisée classe {int(nearest['cls'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare la latence et le taux d'allocation par image entre l'ancien prétraitement
+(copie de la capture, cvtColor, resize puis conversion interne d'AutoShape) et le
+prétraitement fusionné de FramePreprocessor.
+
+Les deux chemins partent du même tampon BGRA brut, tel que rendu par mss ; le
+modèle n'est pas exécuté, seul le coût avant inférence est mesuré.
+
+Utilisation:
+    python -m benchmarks.preprocess_benchmark --frames 200 --width 1920 --height 1050
+    python -m benchmarks.preprocess_benchmark --source chemin/vers/une/session
+"""
+
+import argparse
+
+import cv2 as cv
+import numpy as np
+
+from Application.Albion.preprocess import FramePreprocessor
+from benchmarks.capture_benchmark import measure
+
+IMG_SIZE = 640
+
+
+def legacy_preprocess(raw):
+    """Chemin historique : Capture.screenshot(), _process_image() puis AutoShape"""
+    img = np.array(raw)
+    img = cv.cvtColor(img, cv.COLOR_RGB2BGR)
+    img = cv.resize(img, (IMG_SIZE, IMG_SIZE))
+
+    # AutoShape : letterbox (sans effet à 640), empilement, HWC -> CHW puis / 255
+    img = np.ascontiguousarray(img)
+    x = np.ascontiguousarray(np.array([img]).transpose((0, 3, 1, 2)))
+    x = x.astype(np.float32)
+    x /= 255
+    return x
+
+
+def load_frame(args):
+    """Première image de la source rejouée, ou une image synthétique"""
+    if args.source:
+        from Application.Capture.replay import ReplayCapture
+        capture = ReplayCapture(args.source)
+        try:
+            return capture.latest_frame().image.copy()
+        finally:
+            capture.close()
+
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (args.height, args.width, 4), dtype=np.uint8)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark du prétraitement image -> tenseur")
+    parser.add_argument('--frames', type=int, default=200, help="Nombre d'images mesurées par chemin")
+    parser.add_argument('--width', type=int, default=1920, help="Largeur de l'image synthétique")
+    parser.add_argument('--height', type=int, default=1050, help="Hauteur de l'image synthétique")
+    parser.add_argument('--source', type=str, default=None, help="Source de rejeu dont la première image est utilisée")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    frame = load_frame(args)
+    preprocessor = FramePreprocessor(IMG_SIZE)
+
+    # Même entrée pour les deux chemins (aux arrondis d'interpolation près)
+    expected = legacy_preprocess(frame)
+    _, fused = preprocessor(frame)
+    difference = float(np.abs(expected - fused).max())
+
+    results = {
+        "legacy": measure(legacy_preprocess, frame, args.frames),
+        "fused": measure(lambda image: preprocessor(image), frame, args.frames),
+    }
+
+    print(f"Image: {frame.shape[1]}x{frame.shape[0]} -> {IMG_SIZE}x{IMG_SIZE} - {args.frames} images")
+    print(f"Écart maximal entre les entrées du modèle: {difference:.5f}")
+    print(f"{'chemin':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KiB alloués/img':>18}")
+    for name, res in results.items():
+        print(f"{name:<10}{res['p50_ms']:>10.2f}{res['p95_ms']:>10.2f}{res['p99_ms']:>10.2f}"
+              f"{res['alloc_kib_per_frame']:>18.1f}")
+
+    gain = results["legacy"]["p50_ms"] - results["fused"]["p50_ms"]
+    saved = results["legacy"]["alloc_kib_per_frame"] - results["fused"]["alloc_kib_per_frame"]
+    print(f"\nGain médian par image: {gain:.2f} ms, {saved:.1f} KiB d'allocations en moins")
+
+
+if __name__ == "__main__":
+    main()
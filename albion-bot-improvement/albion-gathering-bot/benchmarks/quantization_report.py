@@ -0,0 +1,137 @@
+"""
+Rapport de comparaison entre le modèle INT8 quantifié et le modèle FP32.
+
+Le modèle INT8 est produit au premier lancement (calibration sur --calibration)
+puis lu depuis le cache. Les deux modèles sont exécutés sur les mêmes images
+d'évaluation, de préférence une autre session que celle de calibration : les
+détections FP32 servent de référence pour la précision et le rappel par classe
+du modèle INT8, et les latences d'inférence (NMS comprise) donnent le gain.
+
+Utilisation:
+    python -m benchmarks.quantization_report --model best.pt --calibration session_a --source session_b
+    python -m benchmarks.quantization_report --source session_b --reference torch --json rapport_int8.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+
+from Application.Albion.backends import load_backend
+from Application.Albion.evaluation import ClassCounts
+from Application.Albion.postprocess import non_max_suppression
+from Application.Albion.preprocess import FramePreprocessor
+from Application.Capture.replay import ReplayCapture
+from benchmarks.evaluation import print_report
+
+IMG_SIZE = 640
+
+
+def evaluate(backend, inputs, confidence, iou):
+    """
+    :return: Tuple (détections (n, 6) par image, latences en ms).
+    """
+    for model_input in inputs[:3]:
+        backend(torch.from_numpy(model_input))
+
+    detections = []
+    latencies = np.empty(len(inputs))
+    for i, model_input in enumerate(inputs):
+        start = time.perf_counter()
+        rows = non_max_suppression(backend(torch.from_numpy(model_input)), confidence, iou).cpu().numpy()
+        latencies[i] = (time.perf_counter() - start) * 1000
+        detections.append(rows)
+    return detections, latencies
+
+
+def load_inputs(source, frames):
+    """Entrées du modèle d'images réparties uniformément dans la source"""
+    capture = ReplayCapture(source)
+    try:
+        count = len(capture.source)
+        preprocessor = FramePreprocessor(IMG_SIZE)
+        inputs = []
+        for index in np.unique(np.linspace(0, count - 1, min(frames, count)).astype(int)):
+            image = capture.source.read(index)
+            if image is not None:
+                _, model_input = preprocessor(image)
+                inputs.append(model_input.copy())
+        return inputs
+    finally:
+        capture.close()
+
+
+def latency(values):
+    return {"p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95)),
+            "mean_ms": float(values.mean())}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Comparaison INT8 / FP32 du modèle de détection")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--source', type=str, required=True, help="Session d'évaluation (images rejouées)")
+    parser.add_argument('--calibration', type=str, default=None,
+                        help="Session de calibration, nécessaire si le modèle INT8 n'est pas encore en cache")
+    parser.add_argument('--reference', type=str, default="onnxruntime", choices=("torch", "onnxruntime"),
+                        help="Moteur FP32 de référence")
+    parser.add_argument('--frames', type=int, default=200, help="Nombre d'images d'évaluation")
+    parser.add_argument('--confidence', type=float, default=0.5, help="Seuil de confiance")
+    parser.add_argument('--iou', type=float, default=0.45, help="Seuil IoU de la NMS")
+    parser.add_argument('--json', type=str, default=None, help="Écrit le rapport dans ce fichier JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    torch_model = None
+
+    def load_torch_model():
+        nonlocal torch_model
+        if torch_model is None:
+            torch_model = torch.hub.load('yolov5', 'custom', path=args.model, source="local", verbose=False)
+            torch_model.eval()
+        return torch_model
+
+    reference = load_backend(args.reference, args.model, IMG_SIZE, load_torch_model)
+    quantized = load_backend("onnxruntime-int8", args.model, IMG_SIZE, load_torch_model, calibration=args.calibration)
+    inputs = load_inputs(args.source, args.frames)
+
+    expected, reference_latencies = evaluate(reference, inputs, args.confidence, args.iou)
+    predicted, quantized_latencies = evaluate(quantized, inputs, args.confidence, args.iou)
+
+    counts = ClassCounts()
+    for rows, reference_rows in zip(predicted, expected):
+        counts.add(rows, reference_rows)
+
+    report = {
+        "frames": len(inputs),
+        "reference": args.reference,
+        "classes": counts.report(reference.names),
+        "latency": {
+            "fp32": latency(reference_latencies),
+            "int8": latency(quantized_latencies),
+        },
+    }
+    report["latency"]["speedup"] = report["latency"]["fp32"]["p50_ms"] / report["latency"]["int8"]["p50_ms"]
+
+    print(f"{len(inputs)} images de '{args.source}' - référence FP32: {args.reference}\n")
+    print("Précision / rappel INT8 par rapport au FP32:")
+    print_report(report["classes"])
+
+    print(f"\n{'modèle':<8}{'p50 ms':>10}{'p95 ms':>10}{'moy ms':>10}")
+    for name in ("fp32", "int8"):
+        stats = report["latency"][name]
+        print(f"{name:<8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['mean_ms']:>10.2f}")
+    print(f"\nGain médian INT8: x{report['latency']['speedup']:.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Rapport écrit dans '{args.json}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare l'inférence à chaque image et le suivi des ressources entre deux
+inférences (ResourceTracker) sur une session enregistrée.
+
+La référence est la détection complète de chaque image. Pour chaque intervalle
+de suivi, le benchmark relève le temps CPU par image (tous threads du processus,
+donc inférence multithread comprise), la part d'images réellement inférées, et
+l'accord avec la référence : précision, rappel et IoU moyenne des boîtes
+appariées (IoU >= 0.5, même classe), et part des images où la ressource la plus
+proche est la même.
+
+Utilisation:
+    python -m benchmarks.tracking_benchmark --source chemin/vers/une/session --model best.pt
+    python -m benchmarks.tracking_benchmark --source session --intervals 2 5 10 --frames 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from Application.Albion.detection import AlbionDetection
+from Application.Albion.postprocess import box_iou
+
+MATCH_IOU = 0.5
+CLOSEST_TOLERANCE = 10.0  # pixels du modèle
+
+
+def run(detection, frames, context=None):
+    """
+    Détecte sur chaque image avec le contexte donné.
+
+    :return: Tuple (détections par image, temps CPU par image en ms).
+    """
+    results = []
+    cpu = np.empty(len(frames))
+    for i, image in enumerate(frames):
+        start = time.process_time()
+        _, _, _, _, detections = detection.detect(image, context)
+        cpu[i] = (time.process_time() - start) * 1000
+        results.append(detections)
+    return results, cpu
+
+
+def agreement(reference, candidate):
+    """
+    :return: Dictionnaire précision, rappel, IoU moyenne et accord sur la ressource la plus proche.
+    """
+    true_positives = predicted = expected = closest = 0
+    ious = []
+
+    for ref, det in zip(reference, candidate):
+        predicted += len(det)
+        expected += len(ref)
+
+        if len(ref) and len(det):
+            iou = box_iou(det["box"], ref["box"])
+            iou[det["cls"][:, None] != ref["cls"][None, :]] = 0
+            # Appariement glouton, chaque boîte de référence au plus une fois
+            used = set()
+            for row in iou:
+                for index in np.argsort(row)[::-1]:
+                    if row[index] < MATCH_IOU:
+                        break
+                    if index not in used:
+                        used.add(index)
+                        ious.append(row[index])
+                        break
+            true_positives += len(used)
+
+        # Les détections sont classées par distance : la plus proche est la première
+        if not len(ref) and not len(det):
+            closest += 1
+        elif len(ref) and len(det) and ref[0]["cls"] == det[0]["cls"] and \
+                np.hypot(*(ref[0]["center"] - det[0]["center"])) <= CLOSEST_TOLERANCE:
+            closest += 1
+
+    return {
+        "precision": true_positives / predicted if predicted else 1.0,
+        "recall": true_positives / expected if expected else 1.0,
+        "iou": float(np.mean(ious)) if ious else 0.0,
+        "closest": closest / len(reference) if reference else 0.0,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark du suivi des ressources contre l'inférence à chaque image")
+    parser.add_argument('--source', type=str, required=True, help="Session enregistrée, dossier d'images ou vidéo")
+    parser.add_argument('--model', type=str, default="best.pt", help="Fichier de poids YOLOv5")
+    parser.add_argument('--backend', type=str, default="torch", help="Moteur d'inférence")
+    parser.add_argument('--confidence', type=float, default=0.5, help="Seuil de confiance")
+    parser.add_argument('--intervals', type=int, nargs='+', default=[2, 3, 5, 10], help="Intervalles de suivi mesurés")
+    parser.add_argument('--frames', type=int, default=None, help="Nombre maximal d'images lues")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    detection = AlbionDetection(
+        model_name=args.model,
+        confidence=args.confidence,
+        capture_source=args.source,
+        cache_max_age=0,
+        metrics_interval=0,
+        backend=args.backend,
+        warmup=False
+    )
+
+    try:
+        source = detection.window_capture.source
+        count = len(source) if args.frames is None else min(args.frames, len(source))
+        frames = [frame for frame in (source.read(i) for i in range(count)) if frame is not None]
+
+        # Préchauffage hors mesure
+        for image in frames[:3]:
+            detection.detect(image)
+
+        reference, reference_cpu = run(detection, frames)
+        rows = [("chaque image", reference_cpu, 1.0, agreement(reference, reference))]
+
+        for interval in args.intervals:
+            detection.track_interval = interval
+            context = detection.new_context()
+            candidate, cpu = run(detection, frames, context)
+            inferred = 1.0 - context.tracker.stats()["tracked_rate"]
+            rows.append((f"suivi 1/{interval}", cpu, inferred, agreement(reference, candidate)))
+    finally:
+        detection.close()
+
+    print(f"{len(frames)} images de '{args.source}'")
+    print(f"{'mode':<14}{'CPU ms p50':>12}{'CPU ms moy':>12}{'inférées':>10}{'précision':>11}{'rappel':>8}"
+          f"{'IoU':>7}{'plus proche':>13}")
+    for name, cpu, inferred, scores in rows:
+        print(f"{name:<14}{np.percentile(cpu, 50):>12.2f}{cpu.mean():>12.2f}{inferred:>10.0%}"
+              f"{scores['precision']:>11.3f}{scores['recall']:>8.3f}{scores['iou']:>7.3f}{scores['closest']:>13.0%}")
+
+
+if __name__ == "__main__":
+    main()
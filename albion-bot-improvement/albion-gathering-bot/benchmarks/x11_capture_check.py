@@ -0,0 +1,237 @@
+"""
+Vérifie la capture X11 de bout en bout sur un vrai serveur X (Xvfb en CI).
+
+Le script crée et affiche une fenêtre nommée comme le jeu, remplie de deux
+couleurs connues, puis la retrouve avec X11Capture par PID, par nom, et par nom
+quand le PID ne correspond à aucune fenêtre (PID périmé d'albion_process.json).
+La fenêtre est capturée par MIT-SHM (XShmGetImage) puis par le repli XGetImage :
+les deux images doivent contenir les couleurs attendues aux bons endroits et
+être identiques. Une région qui déborde de l'écran doit être capturée sans
+erreur (partie hors champ en noir), et une fenêtre fermée doit lever une
+exception au lieu de terminer le processus (gestionnaire d'erreurs Xlib).
+Enfin CaptureFactory._load_linux_pid doit refuser un PID vivant qui n'est pas
+un processus Albion.
+
+Le code de sortie vaut 1 si une vérification échoue.
+
+Utilisation:
+    xvfb-run -a -s "-screen 0 1280x720x24" python -m benchmarks.x11_capture_check
+    DISPLAY=:99 python -m benchmarks.x11_capture_check --frames 200
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from Application.Capture.Factory import CaptureFactory
+from Application.Capture.X11 import IsViewable, X11Capture, XWindowAttributes, _load_libraries
+
+WINDOW_NAME = "Albion Online Client"
+WINDOW_BOUNDS = (40, 60, 320, 200)  # (x, y, largeur, hauteur)
+BACKGROUND = 0x3366CC
+PATCH = (10, 20, 50, 30)  # (x, y, largeur, hauteur) dans la fenêtre
+PATCH_COLOR = 0xF0A010
+
+PropModeReplace = 0
+XA_CARDINAL = 6
+
+
+def bgra(color):
+    """Pixel BGRA attendu pour une couleur 0xRRGGBB d'un visuel TrueColor 24 bits"""
+    return np.array([color & 0xFF, (color >> 8) & 0xFF, (color >> 16) & 0xFF], dtype=np.uint8)
+
+
+class TestWindow:
+    """Fenêtre X11 minimale, nommée et portant _NET_WM_PID, dessinée en deux couleurs"""
+
+    def __init__(self, name, pid):
+        self.x11, _, _ = _load_libraries()
+        display_p, window = ctypes.c_void_p, ctypes.c_ulong
+        signatures = {
+            "XCreateSimpleWindow": ([display_p, window, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+                                     ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulong], window),
+            "XStoreName": ([display_p, window, ctypes.c_char_p], ctypes.c_int),
+            "XChangeProperty": ([display_p, window, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+                                 ctypes.c_void_p, ctypes.c_int], ctypes.c_int),
+            "XMapWindow": ([display_p, window], ctypes.c_int),
+            "XDestroyWindow": ([display_p, window], ctypes.c_int),
+            "XCreateGC": ([display_p, window, ctypes.c_ulong, ctypes.c_void_p], ctypes.c_void_p),
+            "XFreeGC": ([display_p, ctypes.c_void_p], ctypes.c_int),
+            "XSetForeground": ([display_p, ctypes.c_void_p, ctypes.c_ulong], ctypes.c_int),
+            "XFillRectangle": ([display_p, window, ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                ctypes.c_uint, ctypes.c_uint], ctypes.c_int),
+        }
+        for function, (argtypes, restype) in signatures.items():
+            getattr(self.x11, function).argtypes = argtypes
+            getattr(self.x11, function).restype = restype
+
+        self.display = self.x11.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError(f"Impossible d'ouvrir l'affichage X '{os.environ.get('DISPLAY')}'")
+        root = self.x11.XDefaultRootWindow(self.display)
+
+        x, y, width, height = WINDOW_BOUNDS
+        self.window = self.x11.XCreateSimpleWindow(self.display, root, x, y, width, height, 0, 0, BACKGROUND)
+        self.x11.XStoreName(self.display, self.window, name.encode())
+        pid_value = ctypes.c_long(pid)
+        self.x11.XChangeProperty(self.display, self.window, self.x11.XInternAtom(self.display, b"_NET_WM_PID", 0),
+                                 XA_CARDINAL, 32, PropModeReplace, ctypes.byref(pid_value), 1)
+        self.x11.XMapWindow(self.display, self.window)
+        self._wait_viewable()
+
+        gc = self.x11.XCreateGC(self.display, self.window, 0, None)
+        self.x11.XSetForeground(self.display, gc, PATCH_COLOR)
+        self.x11.XFillRectangle(self.display, self.window, gc, *PATCH)
+        self.x11.XFreeGC(self.display, gc)
+        self.x11.XSync(self.display, 0)
+
+    def _wait_viewable(self, timeout=2.0):
+        deadline = time.perf_counter() + timeout
+        attributes = XWindowAttributes()
+        while time.perf_counter() < deadline:
+            self.x11.XSync(self.display, 0)
+            self.x11.XGetWindowAttributes(self.display, self.window, ctypes.byref(attributes))
+            if attributes.map_state == IsViewable:
+                return
+            time.sleep(0.01)
+        raise RuntimeError("La fenêtre de test n'a pas été affichée")
+
+    def close(self):
+        if self.display:
+            self.x11.XDestroyWindow(self.display, self.window)
+            self.x11.XCloseDisplay(self.display)
+            self.display = None
+
+
+def check_image(image):
+    """
+    :return: Liste des écarts entre l'image capturée et le dessin de la fenêtre.
+    """
+    _, _, width, height = WINDOW_BOUNDS
+    errors = []
+    if image.shape[:2] != (height, width):
+        return [f"taille {image.shape[1]}x{image.shape[0]} au lieu de {width}x{height}"]
+
+    x, y, patch_width, patch_height = PATCH
+    expectations = (
+        ("fond", image[height - 5, width - 5, :3], bgra(BACKGROUND)),
+        ("rectangle", image[y + patch_height // 2, x + patch_width // 2, :3], bgra(PATCH_COLOR)),
+        ("bord du rectangle", image[y + patch_height, x + patch_width, :3], bgra(BACKGROUND)),
+    )
+    for name, pixel, expected in expectations:
+        if not np.array_equal(pixel, expected):
+            errors.append(f"{name}: {pixel.tolist()} au lieu de {expected.tolist()}")
+    return errors
+
+
+def grab_path(capture, frames, use_shm):
+    """
+    Capture la fenêtre `frames` fois par le chemin demandé.
+
+    :return: Tuple (image copiée, latence moyenne en ms, chemin effectivement utilisé).
+    """
+    capture.session.use_shm = use_shm
+    image = capture.screenshot()
+    started = time.perf_counter()
+    for _ in range(frames):
+        capture.screenshot()
+    latency = (time.perf_counter() - started) / frames * 1000
+    return image, latency, "XShmGetImage" if capture.session.use_shm else "XGetImage"
+
+
+def check_offscreen(capture):
+    """Une région à cheval sur le bord droit de l'écran garde sa taille, la partie hors champ est noire"""
+    session = capture.session
+    region = {"left": session.width - 10, "top": 0, "width": 40, "height": 20}
+    try:
+        image = session.grab(region)
+    except OSError as e:
+        return [f"capture refusée: {e}"]
+    if image.shape != (20, 40, 4):
+        return [f"forme {image.shape}"]
+    return [] if not image[:, 10:].any() else ["partie hors de l'écran non noire"]
+
+
+def check_linux_pid(pid):
+    """_load_linux_pid doit refuser un PID vivant qui n'est pas Albion"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            with open("albion_process.json", "w") as f:
+                json.dump({"process": {"pid": pid, "name": "Albion-Online.exe"}}, f)
+            return CaptureFactory._load_linux_pid()
+        finally:
+            os.chdir(previous)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification de la capture X11 (sous Xvfb)")
+    parser.add_argument('--frames', type=int, default=50, help="Captures mesurées par chemin")
+    args = parser.parse_args()
+
+    pid = os.getpid()
+    window = TestWindow(f"{WINDOW_NAME} (test)", pid)
+    failures = []
+
+    def report(name, errors):
+        print(f"{'ok ' if not errors else 'ÉCHEC'}  {name}" + (f": {'; '.join(errors)}" if errors else ""))
+        failures.extend(f"{name}: {error}" for error in errors)
+
+    try:
+        # Recherche de la fenêtre par PID, par nom, et par nom quand le PID ne correspond à rien
+        for label, kwargs in (("par PID", {"pid": pid}), ("par nom", {}),
+                              ("PID sans fenêtre, repli sur le nom", {"pid": 2 ** 22 + 1})):
+            capture = X11Capture(window_name=WINDOW_NAME, **kwargs)
+            try:
+                found = capture.hwnd == window.window
+                report(f"fenêtre trouvée {label}", [] if found else [f"fenêtre {capture.hwnd:#x}"])
+            finally:
+                capture.close()
+
+        capture = X11Capture(window_name=WINDOW_NAME, pid=pid)
+        try:
+            images = {}
+            shm_available = capture.session.use_shm
+            for use_shm in (True, False):
+                if use_shm and not shm_available:
+                    report("capture XShmGetImage", ["extension MIT-SHM indisponible sur ce serveur"])
+                    continue
+                image, latency, path = grab_path(capture, args.frames, use_shm)
+                images[path] = image
+                report(f"capture {path} ({latency:.2f} ms/image)", check_image(image))
+                report(f"région hors de l'écran ({path})", check_offscreen(capture))
+
+            if len(images) == 2:
+                same = np.array_equal(images["XShmGetImage"], images["XGetImage"])
+                report("images XShmGetImage et XGetImage identiques", [] if same else ["images différentes"])
+
+            # Fenêtre fermée : BadWindow doit devenir une exception, pas un arrêt du processus
+            window.close()
+            try:
+                capture.get_window_information()
+                report("fenêtre fermée signalée", ["aucune erreur"])
+            except Exception:
+                report("fenêtre fermée signalée", [])
+        finally:
+            capture.close()
+
+        resolved = check_linux_pid(pid)
+        report("PID d'un processus non Albion ignoré", [] if resolved is None else [f"PID {resolved} accepté"])
+    finally:
+        window.close()
+
+    if failures:
+        print(f"\n{len(failures)} vérification(s) en échec")
+        sys.exit(1)
+    print("\nCapture X11 vérifiée")
+
+
+if __name__ == "__main__":
+    main()
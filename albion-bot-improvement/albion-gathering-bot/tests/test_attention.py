@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from Application.Albion.attention import AttentionWindows
+
+
+def test_parse_accepts_strings_and_tuples():
+    assert AttentionWindows.parse(["1280x720", "640X640", (320, 200)]) == [(1280, 720), (640, 640), (320, 200)]
+    for spec in ("1280", "axb", "0x640"):
+        with pytest.raises(ValueError):
+            AttentionWindows.parse([spec])
+    with pytest.raises(ValueError):
+        AttentionWindows([], 640)
+
+
+def test_crops_are_centred_and_clamped_inside_the_frame():
+    windows = AttentionWindows([(800, 600), (4000, 4000)], 640)
+    assert windows.regions(1920, 1080, 960, 540) == [(560, 240, 800, 600), (0, 0, 1920, 1080)]
+    # Personnage près du bord : le recadrage reste dans l'image
+    assert windows.regions(1920, 1080, 100, 1000)[0] == (0, 480, 800, 600)
+
+
+def test_tiles_cover_the_crop_with_overlap():
+    windows = AttentionWindows([(1600, 900)], 640, tiles=True, overlap=32)
+    tiles = windows.regions(1920, 1080, 960, 540)
+
+    assert all((width, height) == (640, 640) for _, _, width, height in tiles)
+    xs = sorted({left for left, _, _, _ in tiles})
+    ys = sorted({top for _, top, _, _ in tiles})
+    assert (xs[0], ys[0]) == (160, 90)
+    assert (xs[-1] + 640, ys[-1] + 640) == (160 + 1600, 90 + 900)
+    assert all(b - a <= 640 - 32 for a, b in zip(xs, xs[1:]))
+    assert all(b - a <= 640 - 32 for a, b in zip(ys, ys[1:]))
+    assert len(tiles) == len(xs) * len(ys)
+
+
+def test_small_crop_is_a_single_tile():
+    windows = AttentionWindows([(400, 300)], 640, tiles=True)
+    assert windows.regions(1920, 1080, 960, 540) == [(760, 390, 400, 300)]
+
+
+def test_to_model_maps_a_crop_into_the_full_frame():
+    windows = AttentionWindows([(960, 540)], 640)
+    region = (480, 270, 960, 540)
+    # Centre du modèle du recadrage = centre de l'image entière
+    rows = np.array([[320, 320, 320, 320, 0.9, 1], [0, 0, 640, 640, 0.5, 2]], dtype=np.float32)
+    mapped = windows.to_model(rows, region, 1920, 1080)
+
+    assert mapped is rows
+    np.testing.assert_allclose(mapped[0, :4], (320, 320, 320, 320))
+    np.testing.assert_allclose(mapped[1, :4], (160, 160, 480, 480))
+    np.testing.assert_allclose(mapped[:, 4:], [[0.9, 1], [0.5, 2]])
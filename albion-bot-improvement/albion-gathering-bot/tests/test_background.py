@@ -0,0 +1,91 @@
+import threading
+import time
+
+import numpy as np
+
+from Application.Capture.background import FrameRing
+
+
+def publish(ring, value, shape=(4, 6, 4), timestamp=0.0):
+    slot, buffer = ring.write_slot(shape)
+    buffer[:] = value
+    return ring.publish(slot, buffer, timestamp)
+
+
+def test_empty_ring_has_no_frame():
+    ring = FrameRing()
+    assert ring.latest() is None
+    assert ring.count == 0
+
+
+def test_latest_is_a_copy_of_the_head():
+    ring = FrameRing(3)
+    for value in (1, 2, 3, 4):
+        publish(ring, value, timestamp=value / 10)
+
+    frame = ring.latest()
+    assert (frame.image == 4).all()
+    assert (frame.timestamp, frame.index) == (0.4, 4)
+
+    # La copie ne change pas quand le producteur réécrit l'anneau
+    for value in (5, 6, 7):
+        publish(ring, value)
+    assert (frame.image == 4).all()
+
+
+def test_write_slot_is_never_the_head():
+    ring = FrameRing(2)
+    for value in range(5):
+        slot, buffer = ring.write_slot((2, 2, 4))
+        assert slot != ring._head
+        ring.publish(slot, buffer, 0.0)
+
+
+def test_foreign_images_are_copied_into_the_ring():
+    ring = FrameRing()
+    slot, _ = ring.write_slot((4, 6, 4))
+    pooled = np.full((3, 5, 4), 9, dtype=np.uint8)
+    published = ring.publish(slot, pooled, 0.0)
+
+    assert published is not pooled
+    pooled[:] = 0
+    assert (ring.latest().image == 9).all()
+
+
+def test_latest_copies_a_region():
+    ring = FrameRing()
+    slot, buffer = ring.write_slot((4, 6, 4))
+    buffer[:] = np.arange(6, dtype=np.uint8)[None, :, None]
+    ring.publish(slot, buffer, 0.0)
+    region = ring.latest(bounds=(2, 1, 5, 3)).image
+    assert region.shape == (2, 3, 4)
+    assert region[0, :, 0].tolist() == [2, 3, 4]
+
+
+def test_wait_returns_immediately_for_a_newer_frame():
+    ring = FrameRing()
+    publish(ring, 1)
+    publish(ring, 2)
+    assert ring.wait(0, timeout=0) == 2
+
+
+def test_wait_times_out_without_a_new_frame():
+    ring = FrameRing()
+    publish(ring, 1)
+    started = time.perf_counter()
+    assert ring.wait(1, timeout=0.05) == 1
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_wait_wakes_up_on_publish():
+    ring = FrameRing()
+    publish(ring, 1)
+    timer = threading.Timer(0.02, publish, (ring, 2))
+    timer.start()
+    try:
+        started = time.perf_counter()
+        assert ring.wait(1, timeout=5) == 2
+        assert time.perf_counter() - started < 1
+    finally:
+        timer.cancel()
+    assert (ring.latest(after=1, timeout=0).image == 2).all()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from Application.Albion.evaluation import ClassCounts
+
+EXPECTED = np.array([
+    [0, 0, 100, 100, 1.0, 1],
+    [200, 200, 300, 300, 1.0, 1],
+    [400, 400, 450, 450, 1.0, 2],
+], dtype=np.float32)
+
+
+def test_perfect_predictions():
+    counts = ClassCounts()
+    counts.add(EXPECTED, EXPECTED)
+    assert counts.overall() == {"precision": 1.0, "recall": 1.0, "f1": 1.0, "predicted": 3, "expected": 3}
+
+
+def test_a_box_is_matched_once_by_the_most_confident_prediction():
+    counts = ClassCounts()
+    predicted = [
+        [0, 0, 100, 100, 0.6, 1],
+        [2, 2, 102, 102, 0.9, 1],  # doublon plus sûr, apparié en premier
+    ]
+    counts.add(predicted, EXPECTED[:1])
+    assert counts.true_positives[1] == 1
+    assert counts.predicted[1] == 2
+    assert counts.overall()["precision"] == 0.5
+
+
+def test_class_and_iou_must_match():
+    counts = ClassCounts()
+    counts.add([
+        [0, 0, 100, 100, 0.9, 2],  # bonne boîte, mauvaise classe
+        [200, 200, 260, 260, 0.9, 1],  # IoU 0.36, sous le seuil
+        [400, 400, 450, 450, 0.9, 2],
+    ], EXPECTED)
+    assert dict(counts.true_positives) == {2: 1}
+    assert counts.report()["1"]["recall"] == 0.0
+    assert counts.report()["2"]["precision"] == 0.5
+
+
+def test_empty_frames_only_count_boxes():
+    counts = ClassCounts()
+    counts.add(np.zeros((0, 6)), EXPECTED)
+    counts.add(EXPECTED[:1], [])
+    scores = counts.overall()
+    assert (scores["predicted"], scores["expected"]) == (1, 3)
+    assert scores["precision"] == 0.0 and scores["recall"] == 0.0 and scores["f1"] == 0.0
+
+
+def test_report_names_and_totals():
+    counts = ClassCounts()
+    counts.add(EXPECTED[:2], EXPECTED)
+    report = counts.report({1: "Fiber", 2: "Ore"})
+    assert set(report) == {"Fiber", "Ore", "all"}
+    assert report["Fiber"]["f1"] == 1.0
+    assert report["Ore"] == {"precision": 1.0, "recall": 0.0, "f1": 0.0, "predicted": 0, "expected": 1}
+    assert report["all"]["recall"] == pytest.approx(2 / 3)
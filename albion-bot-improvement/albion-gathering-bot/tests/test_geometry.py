@@ -0,0 +1,54 @@
+import threading
+
+from Application.Capture import ScreenInformation
+from Application.Capture.geometry import WindowGeometry
+
+
+class MovingWindow:
+    """Fenêtre qui alterne entre deux géométries à chaque interrogation"""
+
+    GEOMETRIES = ((0, 0, 1280, 720), (100, 50, 1920, 1080))
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        top, left, width, height = self.GEOMETRIES[self.calls % 2]
+        self.calls += 1
+        return ScreenInformation.from_client_area(top=top, left=left, width=width, height=height)
+
+
+def test_to_screen_follows_window():
+    provider = MovingWindow()
+    changes = []
+    geometry = WindowGeometry(provider, refresh_interval=3600)
+    geometry.on_change(lambda window, resized: changes.append(resized))
+
+    window = geometry.current()
+    assert geometry.to_screen(320, 320) == (window.width / 2 + window.left, window.height / 2 + window.top)
+
+    geometry.invalidate()
+    moved = geometry.current()
+    assert (moved.width, moved.height) == (1920, 1080)
+    assert geometry.to_screen(640, 0) == (1920 + moved.left, moved.top)
+    assert changes == [True]
+
+
+def test_snapshots_stay_consistent_across_threads():
+    geometry = WindowGeometry(MovingWindow(), refresh_interval=0)
+    errors = []
+
+    def read():
+        for _ in range(2000):
+            snapshot = geometry.snapshot()
+            window, region = snapshot.window, snapshot.grab_coordinates
+            if snapshot.scale_x != window.width / 640 or \
+                    (region["left"], region["top"], region["width"]) != (window.left, window.top, window.width):
+                errors.append(snapshot)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
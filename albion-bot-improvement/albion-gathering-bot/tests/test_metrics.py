@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from Application.Albion.metrics import PipelineMetrics, StageTimer
+
+
+def test_stage_timer_keeps_the_latest_window():
+    timer = StageTimer(4)
+    for milliseconds in range(1, 7):
+        timer.record(milliseconds / 1000)
+    stats = timer.stats()
+    assert stats["count"] == 6
+    assert stats["mean"] == pytest.approx(4.5)
+    assert stats["p50"] == pytest.approx(4.5)
+
+
+def test_empty_stage_has_no_stats():
+    assert PipelineMetrics(log_interval=0).stats("inference") is None
+
+
+def test_concurrent_records_are_all_counted():
+    metrics = PipelineMetrics(window=64, log_interval=0)
+
+    def work():
+        for _ in range(5000):
+            metrics.record("inference", 0.01)
+            metrics.gauge("input_size", 640)
+            metrics.frame_done()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.stats("inference")["count"] == 20000
+    assert metrics.stats("inference")["p99"] == pytest.approx(10.0)
+    assert metrics.gauge_stats("input_size") == {"current": 640, "frames": {640: 20000}}
+    assert metrics.frames == 20000
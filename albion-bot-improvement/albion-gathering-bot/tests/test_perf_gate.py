@@ -0,0 +1,37 @@
+from benchmarks.perf_gate import compare
+
+
+def statuses(baseline, current):
+    return {name: status for name, _, _, _, _, status in compare(baseline, current)}
+
+
+def test_within_tolerance_is_ok():
+    # 10 % + 1 ms de tolérance sur le p95 d'inférence
+    assert statuses({"inference_p95_ms": 20.0}, {"inference_p95_ms": 21.9}) == {"inference_p95_ms": "ok"}
+
+
+def test_direction_of_each_metric():
+    baseline = {"inference_p95_ms": 20.0, "resources_per_hour": 100.0}
+    assert statuses(baseline, {"inference_p95_ms": 25.0, "resources_per_hour": 90.0}) == {
+        "inference_p95_ms": "RÉGRESSION", "resources_per_hour": "RÉGRESSION"}
+    assert statuses(baseline, {"inference_p95_ms": 15.0, "resources_per_hour": 110.0}) == {
+        "inference_p95_ms": "amélioration", "resources_per_hour": "amélioration"}
+
+
+def test_absolute_tolerance_covers_small_values():
+    # 10 % de 2 ms est sous le bruit de mesure : la tolérance absolue de 1 ms s'applique
+    assert statuses({"total_p95_ms": 2.0}, {"total_p95_ms": 2.9}) == {"total_p95_ms": "ok"}
+
+
+def test_zero_tolerance_metric():
+    assert statuses({"frame_buffers": 3}, {"frame_buffers": 4}) == {"frame_buffers": "RÉGRESSION"}
+
+
+def test_missing_and_new_metrics():
+    rows = compare({"inference_p95_ms": 20.0}, {"resources_per_hour": 16.0})
+    assert {row[0]: row[5] for row in rows} == {"inference_p95_ms": "MANQUANTE", "resources_per_hour": "nouvelle"}
+    assert all(row[3] is None for row in rows)
+
+
+def test_unmeasured_metrics_are_skipped():
+    assert compare({}, {}) == []
@@ -0,0 +1,57 @@
+import numpy as np
+
+from Application.Albion.postprocess import DETECTION_DTYPE, merge_detections, rank, to_detection_array
+
+ROWS = np.array([
+    [300, 300, 340, 340, 0.9, 1],  # centre (320, 320), distance 100
+    [210, 210, 230, 230, 0.8, 2],  # centre (220, 220), distance 0
+    [400, 220, 440, 220, 0.7, 1],  # centre (420, 220), distance 200
+    [210, 250, 230, 250, 0.6, 3],  # centre (220, 250), distance 30
+], dtype=np.float32)
+ORIGIN = (220, 220)
+
+
+def test_detection_array_fields():
+    detections = to_detection_array(ROWS, ORIGIN, track_ids=[5, 6, 7, 8])
+    assert detections.dtype == DETECTION_DTYPE
+    np.testing.assert_allclose(detections["center"][0], (320, 320))
+    np.testing.assert_allclose(detections["distance"], (100 * np.sqrt(2), 0, 200, 30), rtol=1e-6)
+    assert detections["cls"].tolist() == [1, 2, 1, 3]
+    assert detections["track"].tolist() == [5, 6, 7, 8]
+    assert not detections["screen"].any()
+
+
+def test_untracked_and_empty_arrays():
+    assert (to_detection_array(ROWS, ORIGIN)["track"] == -1).all()
+    assert len(to_detection_array(np.zeros((0, 6)), ORIGIN)) == 0
+    assert len(rank(to_detection_array([], ORIGIN), k=3)) == 0
+
+
+def test_rank_sorts_by_distance():
+    ranked = rank(to_detection_array(ROWS, ORIGIN))
+    assert ranked["cls"].tolist() == [2, 3, 1, 1]
+    assert np.all(np.diff(ranked["distance"]) >= 0)
+
+
+def test_rank_nearest_k_matches_the_full_sort():
+    rng = np.random.default_rng(0)
+    boxes = rng.uniform(0, 600, (200, 2))
+    rows = np.hstack([boxes, boxes + 20, rng.uniform(0.5, 1, (200, 1)), rng.integers(0, 5, (200, 1))])
+    detections = to_detection_array(rows, ORIGIN)
+    np.testing.assert_array_equal(rank(detections, k=10)["distance"], rank(detections)["distance"][:10])
+
+
+def test_rank_filters_classes():
+    ranked = rank(to_detection_array(ROWS, ORIGIN), k=1, classes={1})
+    assert ranked["cls"].tolist() == [1]
+    np.testing.assert_allclose(ranked["center"][0], (320, 320))
+
+
+def test_merge_keeps_the_most_confident_duplicate():
+    rows = np.array([
+        [0, 0, 100, 100, 0.6, 1],
+        [2, 2, 102, 102, 0.9, 1],  # doublon plus sûr
+        [2, 2, 102, 102, 0.5, 2],  # autre classe, conservé
+    ], dtype=np.float32)
+    merged = merge_detections(rows)
+    assert merged[:, 4].tolist() == [np.float32(0.9), np.float32(0.5)]
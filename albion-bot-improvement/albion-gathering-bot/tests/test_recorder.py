@@ -0,0 +1,45 @@
+import numpy as np
+
+from Application.Capture.recorder import SessionRecorder
+from Application.Capture.replay import ReplayCapture
+
+
+def record(path, frames, **kwargs):
+    recorder = SessionRecorder(str(path), chunk_size=2, **kwargs)
+    recorder.start()
+    for i, frame in enumerate(frames):
+        recorder.record(frame, 10.0 + i / 30, None)
+    recorder.stop()
+    return recorder
+
+
+def gradient(i, height=48, width=64):
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[..., 0] = np.arange(width, dtype=np.uint8)[None, :] * 3
+    frame[..., 1] = np.arange(height, dtype=np.uint8)[:, None] * 4
+    frame[..., 2] = 40 * i
+    frame[..., 3] = 255
+    return frame
+
+
+def test_default_recording_keeps_window_resolution(tmp_path):
+    frames = [gradient(i) for i in range(3)]
+    recorder = record(tmp_path, frames)
+    assert recorder.frames_written == 3
+
+    capture = ReplayCapture(str(tmp_path))
+    assert (capture.window.width, capture.window.height) == (64, 48)
+    for frame in frames:
+        image = capture.latest_frame().image
+        # JPEG : avec perte, mais proche de l'original
+        assert np.abs(image[..., :3].astype(int) - frame[..., :3]).mean() < 4
+    assert capture.latest_frame().image is None
+
+
+def test_png_recording_is_lossless(tmp_path):
+    frames = [gradient(i) for i in range(3)]
+    record(tmp_path, frames, codec="png")
+
+    capture = ReplayCapture(str(tmp_path))
+    for frame in frames:
+        assert np.array_equal(capture.latest_frame().image[..., :3], frame[..., :3])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from Application.Capture import replay
+from Application.Capture.replay import ReplayCapture
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def frames(tmp_path):
+    path = tmp_path / "frames.npy"
+    # Image i remplie de la valeur i : on reconnaît l'image servie
+    np.save(path, np.stack([np.full((8, 12, 3), i, dtype=np.uint8) for i in range(3)]))
+    return str(path)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(replay, "perf_counter", clock)
+    return clock
+
+
+def served(capture):
+    frame = capture.latest_frame()
+    return None if frame.image is None else int(frame.image[0, 0, 0])
+
+
+def test_each_frame_once_then_finished(frames):
+    capture = ReplayCapture(frames, fps=10)
+    assert [served(capture) for _ in range(3)] == [0, 1, 2]
+    assert served(capture) is None
+    assert capture.finished
+
+
+def test_real_time_replay_ends_after_last_frame_period(frames, clock):
+    capture = ReplayCapture(frames, speed=1.0, fps=10)
+    assert served(capture) == 0
+    clock.now += 0.25
+    assert served(capture) == 2
+    # La dernière image reste servie pendant sa période, puis le flux se termine
+    clock.now += 0.04
+    assert served(capture) == 2
+    assert not capture.finished
+    clock.now += 0.02
+    assert served(capture) is None
+    assert capture.finished
+
+
+def test_real_time_replay_loops_from_start(frames, clock):
+    capture = ReplayCapture(frames, speed=1.0, loop=True, fps=10)
+    assert served(capture) == 0
+    clock.now += 0.35
+    assert served(capture) == 0
+    clock.now += 0.15
+    assert served(capture) == 1
+    assert not capture.finished
+
+
+def test_grab_region_is_an_owned_copy(frames):
+    capture = ReplayCapture(frames, fps=10)
+    capture.register_region("corner", 0, 0, 4, 4, reference=(12, 8))
+    frame = capture.latest_frame()
+    patch = capture.grab_region("corner")
+    patch[:] = 255
+    assert frame.image[0, 0, 0] == 0
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from Application.Albion.resolution import ResolutionController
+
+
+def controller(**kwargs):
+    return ResolutionController(budget_ms=20, sizes=(320, 416, 512, 640), window=10, cooldown=5, **kwargs)
+
+
+def test_sizes_must_be_multiples_of_32():
+    with pytest.raises(ValueError):
+        ResolutionController(20, sizes=(320, 500))
+
+
+def test_steps_down_when_over_budget():
+    resolution = controller()
+    assert resolution.size == 640
+    sizes = [resolution.record(0.030) for _ in range(5)]
+    assert sizes[:4] == [640] * 4
+    assert sizes[-1] == 512
+    assert resolution.switches == 1
+
+
+def test_steps_up_when_the_larger_size_fits():
+    resolution = controller()
+    for _ in range(5):
+        resolution.record(0.030)
+    assert resolution.size == 512
+    # 8 ms à 512 donnent 12.5 ms attendues à 640, sous 85 % du budget
+    for _ in range(5):
+        resolution.record(0.008)
+    assert resolution.size == 640
+
+
+def test_cooldown_holds_the_size_after_a_switch():
+    resolution = controller()
+    for _ in range(5):
+        resolution.record(0.030)
+    for _ in range(4):
+        assert resolution.record(0.030) == 512
+
+
+def test_samples_of_another_size_are_dropped():
+    resolution = controller()
+    for _ in range(5):
+        resolution.record(0.030, 640)
+    assert resolution.size == 512
+    # Images lancées à 640 avant le changement : sans effet sur la fenêtre de 512
+    for _ in range(20):
+        assert resolution.record(0.001, 640) == 512
+    assert resolution.switches == 1
+
+
+def test_concurrent_records_keep_a_consistent_state():
+    resolution = ResolutionController(budget_ms=20, window=20, cooldown=10)
+    barrier = threading.Barrier(4)
+
+    def work():
+        barrier.wait()
+        for _ in range(2000):
+            size = resolution.size
+            resolution.record(0.030 if size > 320 else 0.010, size)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resolution.size in resolution.sizes
+    assert len(resolution._samples) <= resolution._samples.maxlen
+    assert resolution.switches >= 3
@@ -0,0 +1,92 @@
+import numpy as np
+
+from Application.Albion.tracker import ResourceTracker
+
+
+def rows(*boxes, conf=0.9, cls=1):
+    return np.array([[*box, conf, cls] for box in boxes], dtype=np.float32).reshape(-1, 6)
+
+
+def textured_frame(shift=(0, 0)):
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (80, 80), dtype=np.uint8)
+    frame = np.kron(small, np.ones((8, 8), dtype=np.uint8))
+    frame = np.roll(frame, shift[::-1], axis=(0, 1))
+    return np.dstack([frame] * 3 + [np.full_like(frame, 255)])
+
+
+def test_update_keeps_ids_of_matched_resources():
+    tracker = ResourceTracker(640)
+    tracker.update(rows((100, 100, 140, 140), (300, 300, 340, 340)))
+    first = tracker.track_ids().tolist()
+    assert first == [0, 1]
+
+    # Les deux ressources ont un peu bougé, dans l'ordre inverse
+    tracker.update(rows((304, 302, 344, 342), (102, 101, 142, 141)))
+    assert tracker.track_ids().tolist() == [1, 0]
+
+
+def test_update_does_not_match_another_class():
+    tracker = ResourceTracker(640)
+    tracker.update(rows((100, 100, 140, 140), cls=1))
+    tracker.update(rows((100, 100, 140, 140), cls=2))
+    # Nouvelle piste pour la classe 2, l'ancienne est gardée hors de la vue
+    assert tracker.track_ids().tolist() == [1]
+    assert tracker.ids.tolist() == [1, 0]
+
+
+def test_missed_tracks_are_dropped_after_max_misses():
+    tracker = ResourceTracker(640, max_misses=2)
+    tracker.update(rows((100, 100, 140, 140)))
+    for _ in range(2):
+        tracker.update(rows())
+        assert tracker.ids.tolist() == [0]
+        assert len(tracker.rows()) == 0
+
+    tracker.update(rows())
+    assert len(tracker.ids) == 0
+
+    # Ressource revue : nouvel identifiant
+    tracker.update(rows((100, 100, 140, 140)))
+    assert tracker.track_ids().tolist() == [1]
+
+
+def test_a_missed_track_found_again_keeps_its_id():
+    tracker = ResourceTracker(640)
+    tracker.update(rows((100, 100, 140, 140)))
+    tracker.update(rows())
+    tracker.update(rows((101, 100, 141, 140)))
+    assert tracker.track_ids().tolist() == [0]
+    assert tracker.misses.tolist() == [0]
+
+
+def test_tracks_follow_the_view_between_inferences():
+    tracker = ResourceTracker(640, interval=5)
+    assert tracker.needs_detection(textured_frame())
+    tracker.update(rows((100, 100, 140, 140)))
+
+    assert not tracker.needs_detection(textured_frame(shift=(10, -5)))
+    moved = tracker.step()
+    np.testing.assert_allclose(moved[0, :4], (110, 95, 150, 135), atol=1.0)
+    assert tracker.stats()["tracked"] == 1
+
+
+def test_interval_forces_a_full_inference():
+    tracker = ResourceTracker(640, interval=3)
+    frame = textured_frame()
+    tracker.needs_detection(frame)
+    tracker.update(rows((100, 100, 140, 140)))
+    # Une inférence toutes les 3 images : deux images suivies entre deux inférences
+    for _ in range(2):
+        assert not tracker.needs_detection(frame)
+        tracker.step()
+    assert tracker.needs_detection(frame)
+
+
+def test_nothing_tracked_forces_a_full_inference():
+    tracker = ResourceTracker(640)
+    frame = textured_frame()
+    tracker.needs_detection(frame)
+    tracker.update(rows())
+    assert tracker.needs_detection(frame)
+    assert tracker.stats()["degraded"] == 1